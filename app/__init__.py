@@ -1,21 +1,58 @@
-from flask import Flask
-
 from app.config import Config
-from app.extensions import db, login_manager, migrate
-from app.models import User
-from app.routes import register_routes
+from app.extensions import db, login_manager
+
+
+def create_app(with_migrations=True):
+    """Build the Flask app.
 
+    Routes, models and services are imported here rather than at package
+    import, so ``import app`` stays cheap.  Serving processes pass
+    ``with_migrations=False`` to skip Flask-Migrate, which pulls in Alembic and
+    is only needed by the ``flask db`` commands.
+    """
+    from flask import Flask
+
+    from app.cli import register_commands
+    from app.models import User
+    from app.routes import register_routes
+    from app.services.archive import archive_store
+    from app.services.assets import static_assets
+    from app.services.ballot_audit import ballot_audit
+    from app.services.ballot_buffer import ballot_buffer
+    from app.services.compression import response_compressor
+    from app.services.invitations import invitation_dispatcher
+    from app.services.live_irv import live_irv
+    from app.services.mail import mailer
+    from app.services.margins import margin_analyses
+    from app.services.packed_ballots import ballot_store
+    from app.services.passwords import password_hasher
+    from app.services.rate_limit import rate_limiter
+    from app.services.replicas import replica_router
+    from app.services.results import results_cache
+    from app.services.sqlite_profile import single_writer, sqlite_profile
+    from app.services.usernames import username_index
+    from app.services.voter_codes import voter_code_index
+    from app.services.whatif import withdrawal_previews
 
-def create_app():
     app = Flask(
         __name__,
         template_folder="../templates",
         static_folder="../static",
     )
     app.config.from_object(Config)
+    if app.config["TRUSTED_PROXY_COUNT"]:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+
+        proxies = app.config["TRUSTED_PROXY_COUNT"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Before anything opens a connection, so every SQLite connection gets the pragmas.
+    sqlite_profile.init_app(app)
+    if with_migrations:
+        from app.extensions import migrate
+
+        migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = "login"
 
@@ -24,9 +61,44 @@ def create_app():
         return User.query.get(int(user_id))
 
     register_routes(app)
+    register_commands(app)
+    archive_store.init_app(app)
+    ballot_audit.init_app(app)
+    ballot_buffer.init_app(app)
+    ballot_store.init_app(app)
+    response_compressor.init_app(app)
+    mailer.init_app(app)
+    margin_analyses.init_app(app)
+    invitation_dispatcher.init_app(app)
+    live_irv.init_app(app)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
+    replica_router.init_app(app)
+    results_cache.init_app(app)
+    single_writer.init_app(app)
+    static_assets.init_app(app)
+    username_index.init_app(app)
+    voter_code_index.init_app(app)
+    withdrawal_previews.init_app(app)
+
+    if app.config["PRECOMPILE_TEMPLATES"]:
+        # Compiled once in the preloading master, shared by every forked worker.
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
     return app
 
 
-app = create_app()
+def __getattr__(name):
+    # ``from app import app`` (flask --app app, create_db.py) still works, but
+    # the app is only built when something asks for it.
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    if name == "migrate":
+        from app.extensions import migrate
+
+        return migrate
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["app", "db", "migrate", "create_app"]
@@ -0,0 +1,247 @@
+import os
+import time
+
+import click
+from flask.cli import AppGroup, with_appcontext
+
+from app.extensions import db
+from app.models import BallotAuditTree, Meeting, Motion, PackedBallot
+from app.services.archive import archive_path, archive_store
+from app.services.ballot_audit import ballot_audit
+from app.services.ballots import ballot_model_for
+from app.services.packed_ballots import ballot_store, encode_ballot
+from app.services.recount import recount_motions
+
+assets_cli = AppGroup("assets", help="Build fingerprinted static assets.")
+ballots_cli = AppGroup("ballots", help="Maintain the packed ballot store.")
+audit_cli = AppGroup("audit", help="Check the ballot audit log.")
+archive_cli = AppGroup("archive", help="Move closed meetings to cold storage.")
+
+
+@assets_cli.command("build")
+def build_static_assets():
+    """Fingerprint, compress and resize ``static/`` into ``static/dist``.
+
+    Run it on every deploy; workers pick up the new manifest when they start.
+    """
+    from flask import current_app
+
+    from app.services.assets import build_assets
+
+    report = build_assets(current_app.static_folder)
+    for name, hashed, size, gzip_size, brotli_size in report:
+        compressed = "".join(
+            f"  {label} {value}"
+            for label, value in (("gzip", gzip_size), ("br", brotli_size))
+            if value is not None
+        )
+        click.echo(f"{name} -> {hashed} ({size} bytes{compressed})")
+    dist = os.path.normpath(os.path.join(current_app.static_folder, "dist"))
+    click.echo(f"Wrote {len(report)} files to {dist}.")
+
+
+@ballots_cli.command("pack")
+@click.option("--motion-id", type=int, multiple=True, help="Only pack these motions.")
+@click.option(
+    "--batch-size", type=int, default=2000, show_default=True, help="Rows per insert."
+)
+def pack_ballots(motion_id, batch_size):
+    """Rebuild packed ballots from the per-option vote rows.
+
+    Run it once after switching ``BALLOT_STORE`` to ``dual`` so ballots cast
+    before the switch are packed too; each motion is replaced and committed
+    on its own.
+    """
+    query = db.session.query(Motion.id, Motion.type).order_by(Motion.id)
+    if motion_id:
+        query = query.filter(Motion.id.in_(motion_id))
+
+    for current_id, motion_type in query.all():
+        vote_model, value_field = ballot_model_for(motion_type)
+        value_column = (
+            getattr(vote_model, value_field) if value_field else db.literal(None)
+        )
+        rows = (
+            db.session.query(vote_model.voter_id, vote_model.option_id, value_column)
+            .filter(vote_model.motion_id == current_id)
+            .order_by(vote_model.voter_id, vote_model.id)
+            .all()
+        )
+
+        ballot_store.delete_for_motions([current_id])
+        pending = []
+        packed = 0
+        voter_id = None
+        choices = []
+        for row_voter_id, option_id, value in rows:
+            if row_voter_id != voter_id and choices:
+                pending.append(_packed_row(current_id, voter_id, motion_type, choices))
+                choices = []
+            voter_id = row_voter_id
+            choices.append((option_id, value))
+            if len(pending) >= batch_size:
+                db.session.execute(db.insert(PackedBallot), pending)
+                packed += len(pending)
+                pending = []
+        if choices:
+            pending.append(_packed_row(current_id, voter_id, motion_type, choices))
+        if pending:
+            db.session.execute(db.insert(PackedBallot), pending)
+            packed += len(pending)
+        db.session.commit()
+        click.echo(f"Motion {current_id} ({motion_type}): packed {packed} ballots.")
+
+
+def _packed_row(motion_id, voter_id, motion_type, choices):
+    return {
+        "motion_id": motion_id,
+        "voter_id": voter_id,
+        "payload": encode_ballot(motion_type, choices),
+    }
+
+
+@audit_cli.command("verify")
+@click.option("--motion-id", type=int, multiple=True, help="Only check these motions.")
+def verify_audit_log(motion_id):
+    """Recompute each motion's audit tree from its records and compare.
+
+    Reports records whose payload no longer matches its leaf hash, stored
+    nodes or frontiers that differ, and published roots that do not match.
+    Exits with status 1 if anything is wrong.
+    """
+    query = db.session.query(BallotAuditTree.motion_id).order_by(BallotAuditTree.motion_id)
+    if motion_id:
+        query = query.filter(BallotAuditTree.motion_id.in_(motion_id))
+
+    failed = False
+    for (current_id,) in query.all():
+        problems = ballot_audit.verify(current_id)
+        if problems:
+            failed = True
+            click.echo(f"Motion {current_id}: {len(problems)} problems.")
+            for problem in problems:
+                click.echo(f"  {problem}")
+        else:
+            click.echo(f"Motion {current_id}: ok.")
+    if failed:
+        raise SystemExit(1)
+
+
+@archive_cli.command("meetings")
+@click.option("--meeting-id", type=int, multiple=True, help="Only archive these meetings.")
+@click.option("--batch-size", type=int, help="Rows deleted per commit [ARCHIVE_BATCH_SIZE].")
+@click.option("--dry-run", is_flag=True, help="List the meetings without archiving them.")
+def archive_meetings(meeting_id, batch_size, dry_run):
+    """Archive every meeting whose motions are all closed.
+
+    Each meeting's ballots, options and voters are written to one compressed
+    column file in ``ARCHIVE_DIR``, then its ballot rows are deleted in
+    batches.  Results keep working: tallies read archived meetings from the
+    file.  Naming an already archived meeting with ``--meeting-id`` finishes
+    the row deletion of an interrupted run.
+    """
+    if batch_size:
+        archive_store.batch_size = batch_size
+    meetings = archive_store.eligible_meetings()
+    if meeting_id:
+        meetings = [meeting for meeting in meetings if meeting.id in meeting_id]
+        meetings += (
+            Meeting.query.filter(Meeting.id.in_(meeting_id), Meeting.archived_at.isnot(None))
+            .order_by(Meeting.id)
+            .all()
+        )
+
+    for meeting in meetings:
+        if dry_run:
+            state = "already archived" if meeting.archived_at else "eligible"
+            click.echo(f"Meeting {meeting.id} ({meeting.title}): {state}.")
+            continue
+        if meeting.archived_at is None:
+            header = archive_store.archive(meeting)
+            path = archive_path(archive_store.directory, meeting.id)
+            rows = sum(motion["rows"] for motion in header["motions"])
+            click.echo(
+                f"Meeting {meeting.id}: wrote {rows} vote rows to {path} "
+                f"({os.path.getsize(path)} bytes)."
+            )
+        deleted = archive_store.purge(meeting.id)
+        click.echo(f"Meeting {meeting.id}: deleted {deleted} rows.")
+    if not meetings:
+        click.echo("No meetings to archive.")
+
+
+@click.command("recount")
+@click.option("--meeting-id", type=int, multiple=True, help="Only recount these meetings.")
+@click.option(
+    "--from", "date_from", type=click.DateTime(["%Y-%m-%d"]), help="Meetings on or after."
+)
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]), help="Meetings on or before.")
+@click.option("--workers", type=int, help="Recount processes [RECOUNT_WORKERS].")
+@with_appcontext
+def recount(meeting_id, date_from, date_to, workers):
+    """Recount every motion of the selected meetings and diff the results.
+
+    Ballots are loaded with Core queries from the vote rows (or the archive
+    file of an archived meeting), counted with the same engines as the
+    results pages, and compared with what those pages show.  Point
+    ``DATABASE_URL`` at a restored dump to recount it.  Prints one line per
+    motion as it finishes and exits with status 1 if any result differs.
+    """
+    from flask import current_app
+
+    query = (
+        db.select(Motion.id)
+        .join(Meeting, Meeting.id == Motion.meeting_id)
+        .order_by(Meeting.id, Motion.id)
+    )
+    if meeting_id:
+        query = query.where(Meeting.id.in_(meeting_id))
+    if date_from:
+        query = query.where(Meeting.meeting_date >= date_from.date())
+    if date_to:
+        query = query.where(Meeting.meeting_date <= date_to.date())
+    motion_ids = db.session.execute(query).scalars().all()
+    db.session.remove()
+    if workers is None:
+        workers = current_app.config["RECOUNT_WORKERS"]
+
+    started = time.perf_counter()
+    counted = differing = 0
+    totals = {"load_ms": 0.0, "recount_ms": 0.0, "shown_ms": 0.0}
+    for report in recount_motions(motion_ids, workers):
+        if report.get("missing"):
+            click.echo(f"Motion {report['motion_id']}: deleted during the recount.")
+            continue
+        counted += 1
+        for key in totals:
+            totals[key] += report[key]
+        verdict = "matches" if not report["difference_count"] else "DIFFERS"
+        click.echo(
+            f"Motion {report['motion_id']} ({report['type']}, {report['ballots']} ballots): "
+            f"load {report['load_ms']:.0f} ms, recount {report['recount_ms']:.0f} ms, "
+            f"shown {report['shown_ms']:.0f} ms, {verdict}."
+        )
+        if report["difference_count"]:
+            differing += 1
+            for path, shown, recounted in report["differences"]:
+                click.echo(f"  {path}: shown {shown!r}, recount {recounted!r}")
+            hidden = report["difference_count"] - len(report["differences"])
+            if hidden:
+                click.echo(f"  ... and {hidden} more.")
+
+    click.echo(
+        f"Recounted {counted} motions in {time.perf_counter() - started:.2f} s "
+        f"with {max(workers, 1)} processes (load {totals['load_ms'] / 1000:.2f} s, "
+        f"recount {totals['recount_ms'] / 1000:.2f} s, "
+        f"shown {totals['shown_ms'] / 1000:.2f} s); {differing} differ."
+    )
+    if differing:
+        raise SystemExit(1)
+
+
+def register_commands(app):
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(audit_cli)
+    app.cli.add_command(ballots_cli)
+    app.cli.add_command(recount)
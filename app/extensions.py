@@ -1,7 +1,17 @@
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from app.services.replicas import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
-migrate = Migrate()
+
+
+def __getattr__(name):
+    # Flask-Migrate imports Alembic (~100 ms); only the ``flask db`` commands use it.
+    if name == "migrate":
+        from flask_migrate import Migrate
+
+        globals()["migrate"] = Migrate()
+        return globals()["migrate"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,14 @@
+from app.models.ballot_audit import BallotAuditNode, BallotAuditRecord, BallotAuditTree
+from app.models.ballot_submission import BallotSubmission
 from app.models.candidate_vote import CandidateVote
 from app.models.cumulative_vote import CumulativeVote
+from app.models.invitation_job import InvitationJob
 from app.models.meeting import Meeting
 from app.models.motion import Motion
 from app.models.option import Option
+from app.models.packed_ballot import PackedBallot
 from app.models.preference_vote import PreferenceVote
+from app.models.replication_heartbeat import ReplicationHeartbeat
 from app.models.user import User
 from app.models.voter import Voter
 from app.models.yes_no_vote import YesNoVote
@@ -20,4 +25,11 @@ __all__ = [
     "CumulativeVote",
     "PreferenceVote",
     "ScoreVote",
+    "BallotSubmission",
+    "InvitationJob",
+    "PackedBallot",
+    "ReplicationHeartbeat",
+    "BallotAuditRecord",
+    "BallotAuditNode",
+    "BallotAuditTree",
 ]
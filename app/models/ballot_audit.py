@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class BallotAuditRecord(db.Model):
+    """One appended ballot submission or replacement; a leaf of the motion's Merkle tree."""
+
+    __tablename__ = "ballot_audit_records"
+    __table_args__ = (
+        db.Index("ix_ballot_audit_records_motion_voter", "motion_id", "voter_id"),
+    )
+
+    motion_id = db.Column(db.Integer, db.ForeignKey("motions.id"), primary_key=True)
+    leaf_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    # No foreign key: the log outlives voters removed from the roll.
+    voter_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(10), nullable=False)
+    # Canonical JSON; the leaf hash is computed over exactly these bytes.
+    payload = db.Column(db.Text, nullable=False)
+    leaf_hash = db.Column(db.LargeBinary(32), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class BallotAuditNode(db.Model):
+    """Hash of a complete subtree: leaves ``position * 2**level`` up to the next multiple."""
+
+    __tablename__ = "ballot_audit_nodes"
+
+    motion_id = db.Column(db.Integer, db.ForeignKey("motions.id"), primary_key=True)
+    level = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    position = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    hash = db.Column(db.LargeBinary(32), nullable=False)
+
+
+class BallotAuditTree(db.Model):
+    """Current size and frontier of a motion's audit tree, and the root published at close."""
+
+    __tablename__ = "ballot_audit_trees"
+
+    motion_id = db.Column(db.Integer, db.ForeignKey("motions.id"), primary_key=True)
+    size = db.Column(db.Integer, nullable=False, default=0)
+    # Roots of the complete subtrees covering the leaves, largest first, 32 bytes each.
+    peaks = db.Column(db.LargeBinary, nullable=False, default=b"")
+    published_root = db.Column(db.String(64), nullable=True)
+    published_size = db.Column(db.Integer, nullable=True)
+    published_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class BallotSubmission(db.Model):
+    __tablename__ = "ballot_submissions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(64), unique=True, nullable=False)
+    voter_id = db.Column(db.Integer, db.ForeignKey("voters.id"), nullable=False)
+    motion_id = db.Column(db.Integer, db.ForeignKey("motions.id"), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
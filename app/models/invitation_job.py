@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class InvitationJob(db.Model):
+    __tablename__ = "invitation_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey("meetings.id"), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="PENDING")
+    # Absolute voter link with a "{code}" placeholder, captured from the request.
+    link_template = db.Column(db.String(500), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    # Keyset cursor: every voter with a lower id has been handled.
+    last_voter_id = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
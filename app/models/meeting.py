@@ -3,6 +3,11 @@ from app.extensions import db
 
 class Meeting(db.Model):
     __tablename__ = "meetings"
+    __table_args__ = (
+        db.Index(
+            "ix_meetings_admin_schedule", "admin_id", "meeting_date", "start_time", "id"
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -11,6 +16,8 @@ class Meeting(db.Model):
     start_time = db.Column(db.Time, nullable=True)
     end_time = db.Column(db.Time, nullable=True)
     admin_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    # Set once ``flask archive meetings`` has moved the ballots to the archive file.
+    archived_at = db.Column(db.DateTime, nullable=True)
 
     motions = db.relationship("Motion", backref="meeting", lazy=True)
     voters = db.relationship("Voter", backref="meeting", lazy=True)
@@ -13,6 +13,8 @@ class Motion(db.Model):
     score_max = db.Column(db.Integer, nullable=True)
     budget_points = db.Column(db.Integer, nullable=True)
     status = db.Column(db.String(20), nullable=False, default="DRAFT")
+    # Bumped whenever ballots, options or anything shown in the results changes.
+    vote_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     options = db.relationship("Option", backref="motion", lazy=True)
     yes_no_votes = db.relationship("YesNoVote", backref="motion", lazy=True)
@@ -0,0 +1,14 @@
+from app.extensions import db
+
+
+class PackedBallot(db.Model):
+    """A voter's whole ballot on one motion, encoded by ``app.services.packed_ballots``."""
+
+    __tablename__ = "packed_ballots"
+
+    # Clustered on (motion_id, voter_id) so a tally reads one contiguous range.
+    motion_id = db.Column(db.Integer, db.ForeignKey("motions.id"), primary_key=True)
+    voter_id = db.Column(
+        db.Integer, db.ForeignKey("voters.id"), primary_key=True, index=True
+    )
+    payload = db.Column(db.LargeBinary, nullable=False)
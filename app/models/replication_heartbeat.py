@@ -0,0 +1,10 @@
+from app.extensions import db
+
+
+class ReplicationHeartbeat(db.Model):
+    """Single row the primary stamps every few seconds; its age on a replica is that replica's lag."""
+
+    __tablename__ = "replication_heartbeats"
+
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.Float, nullable=False)
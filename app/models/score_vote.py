@@ -3,6 +3,15 @@ from app.extensions import db
 
 class ScoreVote(db.Model):
     __tablename__ = "score_votes"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "voter_id",
+            "motion_id",
+            "option_id",
+            name="uq_score_votes_voter_motion_option",
+        ),
+        db.Index("ix_score_votes_motion_voter", "motion_id", "voter_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     voter_id = db.Column(db.Integer, db.ForeignKey("voters.id"), nullable=False)
@@ -3,11 +3,15 @@ from app.extensions import db
 
 class Voter(db.Model):
     __tablename__ = "voters"
+    __table_args__ = (
+        db.Index("ix_voters_meeting_id_name", "meeting_id", "name", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey("meetings.id"), nullable=False)
     name = db.Column(db.String(200), nullable=False)
     code = db.Column(db.String(50), unique=True, nullable=False)
+    email = db.Column(db.String(150), nullable=True)
 
     yes_no_votes = db.relationship("YesNoVote", backref="voter", lazy=True)
     candidate_votes = db.relationship("CandidateVote", backref="voter", lazy=True)
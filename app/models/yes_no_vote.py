@@ -3,6 +3,12 @@ from app.extensions import db
 
 class YesNoVote(db.Model):
     __tablename__ = "yes_no_votes"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "voter_id", "motion_id", name="uq_yes_no_votes_voter_motion"
+        ),
+        db.Index("ix_yes_no_votes_motion_voter", "motion_id", "voter_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     voter_id = db.Column(db.Integer, db.ForeignKey("voters.id"), nullable=False)
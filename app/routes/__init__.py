@@ -1,4 +1,5 @@
 from app.routes.admin import register_admin_routes
+from app.routes.api import register_api_routes
 from app.routes.auth import register_auth_routes
 from app.routes.public import register_public_routes
 
@@ -7,3 +8,4 @@ def register_routes(app):
     register_auth_routes(app)
     register_public_routes(app)
     register_admin_routes(app)
+    register_api_routes(app)
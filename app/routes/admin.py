@@ -1,11 +1,24 @@
-from flask import abort, flash, jsonify, redirect, render_template, request, url_for
+from flask import (
+    abort,
+    flash,
+    get_flashed_messages,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_template,
+    url_for,
+)
+import hmac
 from datetime import date, datetime, time
 from flask_login import current_user, login_required
 
 from app.extensions import db
 from app.models import (
+    BallotSubmission,
     CandidateVote,
     CumulativeVote,
+    InvitationJob,
     Meeting,
     Motion,
     Option,
@@ -14,14 +27,33 @@ from app.models import (
     Voter,
     YesNoVote,
 )
-from app.services.security import generate_voter_code
-from app.services.voting import (
-    tally_candidate_election,
-    tally_cumulative_votes,
-    tally_preference_sequential_irv,
-    tally_score_votes,
-    tally_yes_no_abstain,
+from app.services.archive import archive_store
+from app.services.ballot_audit import ballot_audit
+from app.services.ballots import BALLOT_MODELS, bump_vote_version
+from app.services.invitations import InvitationInProgress, invitation_dispatcher
+from app.services.mail import mailer
+from app.services.metrics import metrics
+from app.services.packed_ballots import ballot_store
+from app.services.pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
+    parse_limit,
 )
+from app.services.replicas import read_only
+from app.services.results import results_cache
+from app.services.security import generate_voter_code
+from app.services.voter_codes import voter_code_index
+from app.services.voting.source import vote_entries
+
+ARCHIVED_ERROR = "This meeting is archived and can no longer be changed."
+
+MEETING_STATUS_FILTERS = {
+    "upcoming": "Upcoming",
+    "past": "Past",
+    "unscheduled": "No date",
+    "open": "Voting open",
+}
 
 
 def register_admin_routes(app):
@@ -85,20 +117,172 @@ def register_admin_routes(app):
         if meeting.admin_id != current_user.id:
             abort(403)
 
+    def parse_email(raw_value):
+        """Return ``(email, error)``; a blank value clears the address."""
+        email = (raw_value or "").strip().lower()
+        if not email:
+            return None, None
+        local, _, domain = email.partition("@")
+        if not local or "." not in domain or " " in email or len(email) > 150:
+            return None, "Invalid email address."
+        return email, None
+
+    def invitation_job_data(job):
+        if job is None:
+            return None
+        return {
+            "id": job.id,
+            "status": job.status,
+            "total": job.total,
+            "sent": job.sent,
+            "failed": job.failed,
+            "running": invitation_dispatcher.is_running(job),
+            "error": job.error,
+            "updated_at": job.updated_at.isoformat(),
+        }
+
+    def meeting_sort_keys():
+        # MySQL has no NULLS LAST, so each nullable column is preceded by an
+        # is-null flag; undated meetings and untimed ones sort after the rest.
+        return [
+            db.case((Meeting.meeting_date.is_(None), 1), else_=0),
+            Meeting.meeting_date,
+            db.case((Meeting.start_time.is_(None), 1), else_=0),
+            Meeting.start_time,
+            Meeting.id,
+        ]
+
+    def decode_meeting_cursor(raw_value):
+        values = decode_cursor(raw_value)
+        if values is None or len(values) != 5:
+            return None
+        try:
+            date_null, date_raw, time_null, time_raw, meeting_id = values
+            return [
+                int(date_null),
+                date.fromisoformat(date_raw) if date_raw else None,
+                int(time_null),
+                time.fromisoformat(time_raw) if time_raw else None,
+                int(meeting_id),
+            ]
+        except (TypeError, ValueError):
+            return None
+
+    def meeting_ballot_counts(meeting_ids):
+        """Ballots cast per meeting, one per voter and motion, in one grouped query."""
+        if not meeting_ids:
+            return {}
+        motion_ids = db.select(Motion.id).where(Motion.meeting_id.in_(meeting_ids))
+        ballots = db.union_all(
+            *(
+                db.select(model.motion_id, model.voter_id)
+                .where(model.motion_id.in_(motion_ids))
+                .distinct()
+                for model, _ in BALLOT_MODELS.values()
+            )
+        ).subquery()
+        rows = db.session.execute(
+            db.select(Motion.meeting_id, db.func.count())
+            .select_from(ballots.join(Motion, Motion.id == ballots.c.motion_id))
+            .group_by(Motion.meeting_id)
+        )
+        return dict(rows.all())
+
     @app.route("/admin/meetings")
     @login_required
     def admin_meetings():
-        meetings = Meeting.query.filter_by(admin_id=current_user.id).all()
-        meetings.sort(
-            key=lambda meeting: (
-                meeting.meeting_date is None,
-                meeting.meeting_date or date.max,
-                meeting.start_time is None,
-                meeting.start_time or time.max,
-                meeting.id,
+        limit = parse_limit(request.args.get("limit"), default=25, maximum=100)
+        date_from = parse_date_value(request.args.get("from"))
+        date_to = parse_date_value(request.args.get("to"))
+        status = request.args.get("status", "")
+        if status not in MEETING_STATUS_FILTERS:
+            status = ""
+
+        motion_count = (
+            db.select(db.func.count(Motion.id))
+            .where(Motion.meeting_id == Meeting.id)
+            .scalar_subquery()
+        )
+        voter_count = (
+            db.select(db.func.count(Voter.id))
+            .where(Voter.meeting_id == Meeting.id)
+            .scalar_subquery()
+        )
+        query = db.session.query(Meeting, motion_count, voter_count).filter(
+            Meeting.admin_id == current_user.id
+        )
+        if date_from:
+            query = query.filter(Meeting.meeting_date >= date_from)
+        if date_to:
+            query = query.filter(Meeting.meeting_date <= date_to)
+        today = date.today()
+        if status == "upcoming":
+            query = query.filter(Meeting.meeting_date >= today)
+        elif status == "past":
+            query = query.filter(Meeting.meeting_date < today)
+        elif status == "unscheduled":
+            query = query.filter(Meeting.meeting_date.is_(None))
+        elif status == "open":
+            query = query.filter(
+                db.select(Motion.id)
+                .where(Motion.meeting_id == Meeting.id, Motion.status == "OPEN")
+                .exists()
             )
+
+        keys = meeting_sort_keys()
+        cursor = decode_meeting_cursor(request.args.get("after"))
+        if cursor is not None:
+            query = query.filter(keyset_after(keys, cursor))
+        rows = query.order_by(*keys).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1][0]
+            next_cursor = encode_cursor(
+                [
+                    int(last.meeting_date is None),
+                    last.meeting_date.isoformat() if last.meeting_date else None,
+                    int(last.start_time is None),
+                    last.start_time.isoformat() if last.start_time else None,
+                    last.id,
+                ]
+            )
+
+        meetings = [row[0] for row in rows]
+        ballot_counts = meeting_ballot_counts(
+            [meeting.id for meeting in meetings if meeting.archived_at is None]
+        )
+        for meeting in meetings:
+            if meeting.archived_at is not None:
+                ballot_counts[meeting.id] = archive_store.get(meeting.id).ballot_count()
+        counts = {
+            meeting.id: {
+                "motions": motions,
+                "voters": voters,
+                "ballots": ballot_counts.get(meeting.id, 0),
+            }
+            for meeting, motions, voters in rows
+        }
+        filters = {
+            key: value
+            for key, value in (
+                ("from", date_from.isoformat() if date_from else ""),
+                ("to", date_to.isoformat() if date_to else ""),
+                ("status", status),
+            )
+            if value
+        }
+        return render_template(
+            "admin/meetings.html",
+            meetings=meetings,
+            counts=counts,
+            filters=filters,
+            status_filters=MEETING_STATUS_FILTERS,
+            first_page=cursor is None,
+            next_cursor=next_cursor,
         )
-        return render_template("admin/meetings.html", meetings=meetings)
 
     @app.route("/admin/meetings/new", methods=["GET", "POST"])
     @login_required
@@ -175,7 +359,161 @@ def register_admin_routes(app):
     def meeting_detail(meeting_id):
         meeting = Meeting.query.get_or_404(meeting_id)
         ensure_meeting_owner(meeting)
-        return render_template("admin/meeting_detail.html", meeting=meeting)
+        voter_count = (
+            db.session.query(db.func.count(Voter.id))
+            .filter(Voter.meeting_id == meeting.id)
+            .scalar()
+        )
+        motion_count = (
+            db.session.query(db.func.count(Motion.id))
+            .filter(Motion.meeting_id == meeting.id)
+            .scalar()
+        )
+        return render_template(
+            "admin/meeting_detail.html",
+            meeting=meeting,
+            voter_count=voter_count,
+            motion_count=motion_count,
+        )
+
+    @app.route("/admin/meetings/<int:meeting_id>/voters.json")
+    @login_required
+    def meeting_voters_page(meeting_id):
+        meeting = Meeting.query.get_or_404(meeting_id)
+        ensure_meeting_owner(meeting)
+
+        sort_columns = {"name": Voter.name, "code": Voter.code, "id": Voter.id}
+        sort = request.args.get("sort", "name")
+        if sort not in sort_columns:
+            sort = "name"
+        descending = request.args.get("dir") == "desc"
+        limit = parse_limit(request.args.get("limit"))
+        search = (request.args.get("q") or "").strip()
+
+        query = db.session.query(
+            Voter.id, Voter.name, Voter.code, Voter.email
+        ).filter(Voter.meeting_id == meeting.id)
+        if search:
+            query = query.filter(
+                db.or_(
+                    Voter.name.ilike(f"%{search}%"),
+                    Voter.code.like(f"{search.upper()}%"),
+                )
+            )
+
+        cursor = decode_cursor(request.args.get("after"))
+        total = query.count() if cursor is None else None
+        keys = [sort_columns[sort], Voter.id] if sort != "id" else [Voter.id]
+        if cursor is not None and len(cursor) == len(keys):
+            query = query.filter(keyset_after(keys, cursor, descending))
+        order = [key.desc() if descending else key.asc() for key in keys]
+        rows = query.order_by(*order).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            last_values = {"name": last.name, "code": last.code, "id": last.id}
+            next_cursor = encode_cursor(
+                [last_values[sort], last.id] if sort != "id" else [last.id]
+            )
+
+        return jsonify(
+            {
+                "ok": True,
+                "total": total,
+                "next_cursor": next_cursor,
+                "voters": [
+                    {
+                        "id": row.id,
+                        "name": row.name,
+                        "code": row.code,
+                        "email": row.email,
+                        "link": url_for(
+                            "voter_dashboard", code=row.code, _external=True
+                        ),
+                    }
+                    for row in rows
+                ],
+            }
+        )
+
+    @app.route("/admin/meetings/<int:meeting_id>/motions.json")
+    @login_required
+    def meeting_motions_page(meeting_id):
+        meeting = Meeting.query.get_or_404(meeting_id)
+        ensure_meeting_owner(meeting)
+
+        sort_columns = {
+            "id": Motion.id,
+            "title": Motion.title,
+            "status": Motion.status,
+            "type": Motion.type,
+        }
+        sort = request.args.get("sort", "id")
+        if sort not in sort_columns:
+            sort = "id"
+        descending = request.args.get("dir") == "desc"
+        limit = parse_limit(request.args.get("limit"))
+        search = (request.args.get("q") or "").strip()
+
+        query = Motion.query.filter(Motion.meeting_id == meeting.id)
+        if search:
+            query = query.filter(Motion.title.ilike(f"%{search}%"))
+
+        cursor = decode_cursor(request.args.get("after"))
+        total = query.count() if cursor is None else None
+        keys = [sort_columns[sort], Motion.id] if sort != "id" else [Motion.id]
+        if cursor is not None and len(cursor) == len(keys):
+            query = query.filter(keyset_after(keys, cursor, descending))
+        order = [key.desc() if descending else key.asc() for key in keys]
+        motions = query.order_by(*order).limit(limit + 1).all()
+
+        has_more = len(motions) > limit
+        motions = motions[:limit]
+        next_cursor = None
+        if has_more:
+            last = motions[-1]
+            next_cursor = encode_cursor(
+                [getattr(last, sort), last.id] if sort != "id" else [last.id]
+            )
+
+        options_by_motion = {}
+        if motions:
+            option_rows = (
+                db.session.query(Option.motion_id, Option.text)
+                .filter(Option.motion_id.in_([motion.id for motion in motions]))
+                .order_by(Option.id)
+                .all()
+            )
+            for motion_id, text in option_rows:
+                options_by_motion.setdefault(motion_id, []).append(text)
+
+        return jsonify(
+            {
+                "ok": True,
+                "total": total,
+                "next_cursor": next_cursor,
+                "motions": [
+                    {
+                        "id": motion.id,
+                        "title": motion.title,
+                        "type": motion.type,
+                        "status": motion.status,
+                        "num_winners": motion.num_winners,
+                        "approved_threshold_pct": motion.approved_threshold_pct,
+                        "score_max": motion.score_max,
+                        "budget_points": motion.budget_points,
+                        "options": options_by_motion.get(motion.id, []),
+                        "status_url": url_for(
+                            "update_motion_status", motion_id=motion.id
+                        ),
+                    }
+                    for motion in motions
+                ],
+            }
+        )
 
     @app.route("/admin/meetings/<int:meeting_id>/delete", methods=["POST"])
     @login_required
@@ -185,8 +523,12 @@ def register_admin_routes(app):
 
         motion_ids = [motion.id for motion in meeting.motions]
         voter_ids = [voter.id for voter in meeting.voters]
+        voter_codes = [voter.code for voter in meeting.voters]
 
         if motion_ids:
+            BallotSubmission.query.filter(
+                BallotSubmission.motion_id.in_(motion_ids)
+            ).delete(synchronize_session=False)
             YesNoVote.query.filter(YesNoVote.motion_id.in_(motion_ids)).delete(
                 synchronize_session=False
             )
@@ -202,6 +544,8 @@ def register_admin_routes(app):
             ScoreVote.query.filter(ScoreVote.motion_id.in_(motion_ids)).delete(
                 synchronize_session=False
             )
+            ballot_store.delete_for_motions(motion_ids)
+            ballot_audit.delete_for_motions(motion_ids)
             Option.query.filter(Option.motion_id.in_(motion_ids)).delete(
                 synchronize_session=False
             )
@@ -210,6 +554,9 @@ def register_admin_routes(app):
             )
 
         if voter_ids:
+            BallotSubmission.query.filter(
+                BallotSubmission.voter_id.in_(voter_ids)
+            ).delete(synchronize_session=False)
             YesNoVote.query.filter(YesNoVote.voter_id.in_(voter_ids)).delete(
                 synchronize_session=False
             )
@@ -225,10 +572,19 @@ def register_admin_routes(app):
             ScoreVote.query.filter(ScoreVote.voter_id.in_(voter_ids)).delete(
                 synchronize_session=False
             )
+            ballot_store.delete_for_voters(voter_ids)
             Voter.query.filter(Voter.id.in_(voter_ids)).delete(synchronize_session=False)
 
+        InvitationJob.query.filter_by(meeting_id=meeting.id).delete(
+            synchronize_session=False
+        )
+        archived = meeting.archived_at is not None
         db.session.delete(meeting)
         db.session.commit()
+        for code in voter_codes:
+            voter_code_index.discard(code)
+        if archived:
+            archive_store.remove(meeting_id)
 
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return {"ok": True}
@@ -310,6 +666,12 @@ def register_admin_routes(app):
         meeting = Meeting.query.get_or_404(meeting_id)
         ensure_meeting_owner(meeting)
 
+        if request.method == "POST" and meeting.archived_at is not None:
+            if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+                return {"ok": False, "error": ARCHIVED_ERROR}, 409
+            flash(ARCHIVED_ERROR, "error")
+            return redirect(url_for("meeting_detail", meeting_id=meeting.id))
+
         if request.method == "POST":
             title = (request.form.get("title") or "").strip()
             motion_type = request.form.get("type")
@@ -422,16 +784,23 @@ def register_admin_routes(app):
 
         if request.method == "POST":
             name = (request.form.get("name") or "").strip()
-            if not name:
-                error = {"ok": False, "error": "Voter name is required."}
+            email, email_error = parse_email(request.form.get("email"))
+            if not name or email_error:
+                error = {"ok": False, "error": email_error or "Voter name is required."}
                 if request.headers.get("X-Requested-With") == "XMLHttpRequest":
                     return error, 400
                 flash(error["error"], "error")
                 return redirect(url_for("meeting_detail", meeting_id=meeting.id))
 
-            voter = Voter(meeting_id=meeting.id, name=name, code=generate_voter_code())
+            voter = Voter(
+                meeting_id=meeting.id,
+                name=name,
+                email=email,
+                code=generate_voter_code(),
+            )
             db.session.add(voter)
             db.session.commit()
+            voter_code_index.add(voter.code)
 
             if request.headers.get("X-Requested-With") == "XMLHttpRequest":
                 return {
@@ -440,6 +809,7 @@ def register_admin_routes(app):
                         "id": voter.id,
                         "name": voter.name,
                         "code": voter.code,
+                        "email": voter.email,
                     },
                 }
 
@@ -449,122 +819,112 @@ def register_admin_routes(app):
         flash("Voter added successfully.", "success")
         return redirect(url_for("meeting_detail", meeting_id=meeting.id))
 
-    @app.route("/admin/meetings/<int:meeting_id>/results")
+    @app.route("/admin/meetings/<int:meeting_id>/invitations", methods=["GET", "POST"])
     @login_required
-    def meeting_results(meeting_id):
+    def meeting_invitations(meeting_id):
         meeting = Meeting.query.get_or_404(meeting_id)
         ensure_meeting_owner(meeting)
-        results = []
-
-        for motion in meeting.motions:
-            if motion.type == "PREFERENCE":
-                pref_result = tally_preference_sequential_irv(motion)
-                results.append(
-                    {
-                        "motion": motion,
-                        "result_type": motion.type,
-                        "pref": pref_result,
-                    }
-                )
-                continue
-
-            if motion.type == "FPTP":
-                candidate_result = tally_candidate_election(motion)
-                results.append(
-                    {
-                        "motion": motion,
-                        "result_type": motion.type,
-                        "fptp": candidate_result,
-                    }
-                )
-                continue
 
-            if motion.type == "SCORE":
-                score_result = tally_score_votes(motion)
-                results.append(
-                    {
-                        "motion": motion,
-                        "result_type": motion.type,
-                        "score": score_result,
-                    }
-                )
-                continue
+        if request.method == "GET":
+            job = invitation_dispatcher.latest(meeting.id)
+            return jsonify({"ok": True, "job": invitation_job_data(job)})
+
+        if not mailer.configured:
+            return jsonify({"ok": False, "error": "Email is not configured."}), 400
+        has_recipients = (
+            db.session.query(Voter.id)
+            .filter(Voter.meeting_id == meeting.id, Voter.email.isnot(None))
+            .first()
+        )
+        if has_recipients is None:
+            return (
+                jsonify({"ok": False, "error": "No voters have an email address."}),
+                400,
+            )
 
-            if motion.type == "CUMULATIVE":
-                cumulative_result = tally_cumulative_votes(motion)
-                results.append(
-                    {
-                        "motion": motion,
-                        "result_type": motion.type,
-                        "cumulative": cumulative_result,
-                    }
-                )
-                continue
+        # Built once so the worker thread does not need a request context.
+        link_template = url_for(
+            "voter_dashboard", code="CODEPLACEHOLDER", _external=True
+        ).replace("CODEPLACEHOLDER", "{code}")
+        try:
+            job = invitation_dispatcher.start(meeting.id, link_template)
+        except InvitationInProgress as error:
+            return jsonify({"ok": False, "error": str(error)}), 409
+        return jsonify({"ok": True, "job": invitation_job_data(job)}), 202
+
+    @app.route(
+        "/admin/meetings/<int:meeting_id>/invitations/<int:job_id>/resume",
+        methods=["POST"],
+    )
+    @login_required
+    def resume_invitations(meeting_id, job_id):
+        meeting = Meeting.query.get_or_404(meeting_id)
+        ensure_meeting_owner(meeting)
+        job = InvitationJob.query.filter_by(
+            id=job_id, meeting_id=meeting.id
+        ).first_or_404()
 
-            results.append(
-                {
-                    "motion": motion,
-                    "result_type": motion.type,
-                    "yes_no": tally_yes_no_abstain(motion),
-                }
-            )
+        try:
+            job = invitation_dispatcher.resume(job)
+        except InvitationInProgress as error:
+            return jsonify({"ok": False, "error": str(error)}), 409
+        return jsonify({"ok": True, "job": invitation_job_data(job)}), 202
 
-        return render_template(
+    @app.route("/admin/meetings/<int:meeting_id>/results")
+    @login_required
+    @read_only
+    def meeting_results(meeting_id):
+        meeting = Meeting.query.get_or_404(meeting_id)
+        ensure_meeting_owner(meeting)
+        motion_ids = [motion.id for motion in meeting.motions]
+        # The page streams, so its headers (and the session cookie) go out
+        # before the body is rendered; read the flashes now so the cookie
+        # already reflects them.  Each card is tallied as it is sent, with the
+        # motion reloaded because the view's database session has been
+        # removed by then.
+        get_flashed_messages(with_categories=True)
+
+        return stream_template(
             "admin/meeting_results.html",
             meeting=meeting,
-            results=results,
+            has_motions=bool(motion_ids),
+            fragments=(
+                results_cache.render(db.session.get(Motion, motion_id))
+                for motion_id in motion_ids
+            ),
         )
 
     @app.route("/admin/meetings/<int:meeting_id>/votes")
     @login_required
+    @read_only
     def meeting_votes(meeting_id):
         meeting = Meeting.query.get_or_404(meeting_id)
         ensure_meeting_owner(meeting)
+        voters_by_id = {voter.id: voter for voter in meeting.voters}
         motions_detail = []
 
         for motion in meeting.motions:
-            voter_map = {}
-            if motion.type == "PREFERENCE":
-                votes_for_motion = motion.preference_votes
-            elif motion.type == "FPTP":
-                votes_for_motion = motion.candidate_votes
-            elif motion.type == "CUMULATIVE":
-                votes_for_motion = motion.cumulative_votes
-            elif motion.type == "SCORE":
-                votes_for_motion = motion.score_votes
-            else:
-                votes_for_motion = motion.yes_no_votes
-
-            for vote in votes_for_motion:
-                voter_map.setdefault(vote.voter_id, {"voter": vote.voter, "votes": []})
-                voter_map[vote.voter_id]["votes"].append(vote)
+            option_text = {option.id: option.text for option in motion.options}
+            choices_by_voter = {}
+            # The archive file once the meeting is archived, the vote rows before.
+            for voter_id, option_id, value in vote_entries(motion):
+                choices_by_voter.setdefault(voter_id, []).append(
+                    (option_text.get(option_id, ""), value)
+                )
 
             rows = []
-            for data in voter_map.values():
-                voter = data["voter"]
-                vote_list = data["votes"]
-
+            for voter_id, choices in choices_by_voter.items():
                 if motion.type == "PREFERENCE":
-                    sorted_votes = sorted(
-                        vote_list,
-                        key=lambda item: item.preference_rank,
-                    )
-                    parts = []
-                    for item in sorted_votes:
-                        parts.append(f"{item.preference_rank}: {item.option.text}")
-                    choice_display = ", ".join(parts)
-                elif motion.type == "CUMULATIVE":
                     choice_display = ", ".join(
-                        f"{item.option.text}: {item.points:g}" for item in vote_list
-                    )
-                elif motion.type == "SCORE":
-                    choice_display = ", ".join(
-                        f"{item.option.text}: {item.score}" for item in vote_list
+                        f"{rank}: {text}"
+                        for text, rank in sorted(choices, key=lambda choice: choice[1])
                     )
+                elif motion.type in ("CUMULATIVE", "SCORE"):
+                    choice_display = ", ".join(f"{text}: {value:g}" for text, value in choices)
                 else:
-                    choice_display = ", ".join(item.option.text for item in vote_list)
+                    choice_display = ", ".join(text for text, _ in choices)
 
-                rows.append({"voter": voter, "choice_display": choice_display})
+                rows.append({"voter": voters_by_id[voter_id], "choice_display": choice_display})
 
             rows.sort(key=lambda row: row["voter"].name.lower())
 
@@ -572,7 +932,7 @@ def register_admin_routes(app):
                 {
                     "motion": motion,
                     "rows": rows,
-                    "num_voters_voted": len(voter_map),
+                    "num_voters_voted": len(choices_by_voter),
                     "num_possible_voters": len(meeting.voters),
                 }
             )
@@ -592,6 +952,12 @@ def register_admin_routes(app):
         if not new_name or len(new_name.strip()) == 0:
             return jsonify({"error": "Voter name is required"}), 400
 
+        if "email" in request.form:
+            email, email_error = parse_email(request.form.get("email"))
+            if email_error:
+                return jsonify({"error": email_error}), 400
+            voter.email = email
+
         try:
             voter.name = new_name
             db.session.commit()
@@ -605,10 +971,21 @@ def register_admin_routes(app):
     @login_required
     def delete_user(voter_id):
         voter = Voter.query.get_or_404(voter_id)
+        if voter.meeting.archived_at is not None:
+            return jsonify({"error": ARCHIVED_ERROR}), 409
 
         try:
+            motion_ids = [
+                motion_id
+                for (motion_id,) in db.session.query(Motion.id).filter_by(
+                    meeting_id=voter.meeting_id
+                )
+            ]
+            ballot_store.delete_for_voters([voter.id])
             db.session.delete(voter)
+            bump_vote_version(*motion_ids)
             db.session.commit()
+            voter_code_index.discard(voter.code)
             flash("Voter deleted successfully.", "success")
             return jsonify({"success": True}), 200
         except Exception:
@@ -619,6 +996,8 @@ def register_admin_routes(app):
     @login_required
     def update_motion(motion_id):
         motion = Motion.query.get_or_404(motion_id)
+        if motion.meeting.archived_at is not None:
+            return jsonify({"error": ARCHIVED_ERROR}), 409
         motion.title = request.form.get("title")
         motion.type = request.form.get("type")
         motion.num_winners = (
@@ -670,6 +1049,8 @@ def register_admin_routes(app):
             }
             if new_status not in allowed_statuses:
                 return jsonify({"error": "Invalid status value"}), 400
+            if new_status == "CLOSED" and motion.status != "CLOSED":
+                ballot_audit.publish(motion)
             motion.status = new_status
 
         if motion.type in ["FPTP", "PREFERENCE", "SCORE", "CUMULATIVE"]:
@@ -686,6 +1067,7 @@ def register_admin_routes(app):
                 CumulativeVote.query.filter_by(motion_id=motion.id).delete(
                     synchronize_session=False
                 )
+                ballot_store.delete_for_motions([motion.id])
             except Exception:
                 pass
 
@@ -695,6 +1077,8 @@ def register_admin_routes(app):
             for name in [entry.strip() for entry in raw_options.split("\n") if entry.strip()]:
                 db.session.add(Option(text=name, motion_id=motion.id))
 
+        bump_vote_version(motion.id)
+
         try:
             db.session.commit()
             flash("Motion updated successfully.", "success")
@@ -709,6 +1093,9 @@ def register_admin_routes(app):
         motion = Motion.query.get_or_404(motion_id)
 
         try:
+            BallotSubmission.query.filter_by(motion_id=motion.id).delete(
+                synchronize_session=False
+            )
             YesNoVote.query.filter_by(motion_id=motion.id).delete(
                 synchronize_session=False
             )
@@ -724,6 +1111,8 @@ def register_admin_routes(app):
             ScoreVote.query.filter_by(motion_id=motion.id).delete(
                 synchronize_session=False
             )
+            ballot_store.delete_for_motions([motion.id])
+            ballot_audit.delete_for_motions([motion.id])
             Option.query.filter_by(motion_id=motion.id).delete(synchronize_session=False)
             db.session.delete(motion)
             db.session.commit()
@@ -733,6 +1122,16 @@ def register_admin_routes(app):
             db.session.rollback()
             return jsonify({"error": "Database error: Could not delete motion"}), 500
 
+    @app.route("/admin/metrics")
+    def admin_metrics():
+        # For operators and scrapers only: the internal counters are not for
+        # meeting admins, so the route is hidden unless METRICS_TOKEN is set.
+        token = app.config["METRICS_TOKEN"]
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+            abort(404)
+        return jsonify(metrics.snapshot())
+
     @app.route("/update_motion_status/<int:motion_id>", methods=["POST"])
     @login_required
     def update_motion_status(motion_id):
@@ -740,8 +1139,13 @@ def register_admin_routes(app):
         new_status = request.form.get("status", "").upper()
         allowed_statuses = {"DRAFT", "OPEN", "CLOSED"}
 
-        if new_status in allowed_statuses:
+        if motion.meeting.archived_at is not None:
+            flash(ARCHIVED_ERROR, "danger")
+        elif new_status in allowed_statuses:
+            if new_status == "CLOSED" and motion.status != "CLOSED":
+                ballot_audit.publish(motion)
             motion.status = new_status
+            bump_vote_version(motion.id)
             db.session.commit()
             flash(f"Status updated to {new_status}", "success")
         else:
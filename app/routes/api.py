@@ -0,0 +1,270 @@
+import math
+
+from flask import jsonify, request
+from flask_login import current_user, login_required
+
+from app.extensions import db
+from app.models import Meeting, Motion, Voter
+from app.services.ballot_audit import ballot_audit
+from app.services.ballot_buffer import BallotBufferFull, ballot_buffer
+from app.services.ballots import BallotError, parse_ballot, submit_ballot
+from app.services.live_irv import live_irv
+from app.services.margins import margin_analyses
+from app.services.pagination import parse_limit
+from app.services.rate_limit import rate_limited
+from app.services.replicas import read_only
+from app.services.results import (
+    DEFAULT_ROUND_LIMIT,
+    MAX_ROUND_LIMIT,
+    paginate_rounds,
+    results_cache,
+    results_etag,
+    serialize_result,
+)
+from app.services.voter_codes import voter_code_index
+from app.services.whatif import withdrawal_previews
+
+
+def register_api_routes(app):
+    def results_response(payload, etag):
+        response = jsonify(payload)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    def not_modified(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    def round_paging():
+        seat = request.args.get("seat", type=int)
+        round_offset = max(request.args.get("round_offset", 0, type=int), 0)
+        round_limit = parse_limit(
+            request.args.get("round_limit"),
+            default=DEFAULT_ROUND_LIMIT,
+            maximum=MAX_ROUND_LIMIT,
+        )
+        return seat, round_offset, round_limit
+
+    @app.route("/api/meetings/<int:meeting_id>/results")
+    @login_required
+    @read_only
+    def api_meeting_results(meeting_id):
+        admin_id = (
+            db.session.query(Meeting.admin_id).filter_by(id=meeting_id).scalar()
+        )
+        if admin_id is None:
+            return {"ok": False, "error": "Meeting not found."}, 404
+        if admin_id != current_user.id:
+            return {"ok": False, "error": "Forbidden."}, 403
+
+        versions = (
+            db.session.query(Motion.id, Motion.vote_version)
+            .filter_by(meeting_id=meeting_id)
+            .all()
+        )
+        etag = results_etag(meeting_id, [tuple(row) for row in versions])
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+
+        motions = Motion.query.filter_by(meeting_id=meeting_id).order_by(Motion.id).all()
+        etag = results_etag(
+            meeting_id, [(motion.id, motion.vote_version) for motion in motions]
+        )
+        # Seat summaries only; the per-motion endpoint pages through IRV rounds.
+        return results_response(
+            {
+                "ok": True,
+                "meeting_id": meeting_id,
+                "motions": [
+                    paginate_rounds(results_cache.data(motion), round_limit=0)
+                    for motion in motions
+                ],
+            },
+            etag,
+        )
+
+    @app.route("/api/motions/<int:motion_id>/results")
+    @login_required
+    @read_only
+    def api_motion_results(motion_id):
+        row = (
+            db.session.query(Motion.vote_version, Meeting.id, Meeting.admin_id)
+            .join(Meeting, Meeting.id == Motion.meeting_id)
+            .filter(Motion.id == motion_id)
+            .first()
+        )
+        if row is None:
+            return {"ok": False, "error": "Motion not found."}, 404
+        vote_version, meeting_id, admin_id = row
+        if admin_id != current_user.id:
+            return {"ok": False, "error": "Forbidden."}, 403
+
+        seat, round_offset, round_limit = round_paging()
+        variant = f"{seat}|{round_offset}|{round_limit}"
+        etag = results_etag(meeting_id, [(motion_id, vote_version)], variant)
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+
+        motion = db.session.get(Motion, motion_id)
+        etag = results_etag(meeting_id, [(motion.id, motion.vote_version)], variant)
+        data = paginate_rounds(results_cache.data(motion), seat, round_offset, round_limit)
+        return results_response({"ok": True, **data}, etag)
+
+    @app.route("/api/motions/<int:motion_id>/audit")
+    @login_required
+    @read_only
+    def api_motion_audit(motion_id):
+        motion = db.session.get(Motion, motion_id)
+        if motion is None:
+            return {"ok": False, "error": "Motion not found."}, 404
+        if motion.meeting.admin_id != current_user.id:
+            return {"ok": False, "error": "Forbidden."}, 403
+        return {"ok": True, "motion_id": motion.id, **ballot_audit.summary(motion.id)}
+
+    @app.route("/api/motions/<int:motion_id>/margin")
+    @login_required
+    @read_only
+    def api_motion_margin(motion_id):
+        motion = db.session.get(Motion, motion_id)
+        if motion is None:
+            return {"ok": False, "error": "Motion not found."}, 404
+        if motion.meeting.admin_id != current_user.id:
+            return {"ok": False, "error": "Forbidden."}, 403
+        if motion.type != "PREFERENCE":
+            return {"ok": False, "error": "Margins are only computed for preference motions."}, 400
+
+        # Searched in the background; poll until the analysis is ready.
+        state, analysis = margin_analyses.analysis(motion)
+        if state == "done":
+            return {"ok": True, "motion_id": motion.id, "pending": False, **analysis}
+        headers = {"Retry-After": str(math.ceil(app.config["MARGIN_TIME_BUDGET_SECONDS"]))}
+        if state == "busy":
+            return {"ok": False, "error": "Margin analyses are busy; retry shortly."}, 503, headers
+        return {"ok": True, "motion_id": motion.id, "pending": True}, 202, headers
+
+    @app.route("/api/motions/<int:motion_id>/live")
+    @login_required
+    @read_only
+    def api_motion_live(motion_id):
+        motion = db.session.get(Motion, motion_id)
+        if motion is None:
+            return {"ok": False, "error": "Motion not found."}, 404
+        if motion.meeting.admin_id != current_user.id:
+            return {"ok": False, "error": "Forbidden."}, 403
+        if motion.type != "PREFERENCE" or motion.status != "OPEN":
+            return {"ok": False, "error": "Live counts are only for open preference motions."}, 400
+
+        provisional = serialize_result(live_irv.provisional(motion))
+        return {
+            "ok": True,
+            "motion_id": motion.id,
+            "vote_version": motion.vote_version,
+            **provisional,
+        }
+
+    @app.route("/api/motions/<int:motion_id>/what-if")
+    @login_required
+    @read_only
+    def api_motion_what_if(motion_id):
+        motion = db.session.get(Motion, motion_id)
+        if motion is None:
+            return {"ok": False, "error": "Motion not found."}, 404
+        if motion.meeting.admin_id != current_user.id:
+            return {"ok": False, "error": "Forbidden."}, 403
+        if motion.type != "PREFERENCE":
+            return {"ok": False, "error": "What-if counts are only for preference motions."}, 400
+
+        try:
+            excluded = {
+                int(value)
+                for raw in request.args.getlist("exclude")
+                for value in raw.split(",")
+                if value.strip()
+            }
+        except ValueError:
+            return {"ok": False, "error": "Excluded options must be option ids."}, 400
+        option_ids = {option.id for option in motion.options}
+        if not excluded:
+            return {"ok": False, "error": "Give at least one option to exclude."}, 400
+        if not excluded <= option_ids:
+            return {"ok": False, "error": "Excluded options must belong to the motion."}, 400
+        if excluded == option_ids:
+            return {"ok": False, "error": "At least one option must remain."}, 400
+
+        preview = withdrawal_previews.preview(motion, excluded)
+        return {"ok": True, "motion_id": motion.id, **preview}
+
+    @app.route("/api/vote/<code>/motion/<int:motion_id>", methods=["POST"])
+    @rate_limited(as_json=True)
+    def api_vote_motion(code, motion_id):
+        if not voter_code_index.might_exist(code):
+            return {"ok": False, "error": "Unknown voter code or motion."}, 404
+
+        row = (
+            db.session.query(Voter.id, Motion, Meeting.archived_at)
+            .join(Motion, Motion.meeting_id == Voter.meeting_id)
+            .join(Meeting, Meeting.id == Voter.meeting_id)
+            .filter(Voter.code == code, Motion.id == motion_id)
+            .first()
+        )
+        if row is None:
+            return {"ok": False, "error": "Unknown voter code or motion."}, 404
+
+        voter_id, motion, archived_at = row
+        if archived_at is not None:
+            return {"ok": False, "error": "This meeting is archived."}, 409
+        if motion.status != "OPEN":
+            return {"ok": False, "error": "This motion is not open for voting."}, 409
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return {"ok": False, "error": "Expected a JSON object."}, 400
+
+        idempotency_key = (request.headers.get("Idempotency-Key") or "").strip() or None
+        if idempotency_key and len(idempotency_key) > 64:
+            return {"ok": False, "error": "Idempotency-Key is too long."}, 400
+
+        try:
+            choices = parse_ballot(motion, payload)
+        except BallotError as error:
+            return {"ok": False, "error": error.message}, 400
+
+        if ballot_buffer.enabled:
+            try:
+                ballot_buffer.submit(voter_id, motion.id, choices)
+            except BallotBufferFull:
+                return {"ok": False, "error": "Ballot buffer is full; retry shortly."}, 503
+            replayed = False
+        else:
+            replayed = not submit_ballot(voter_id, motion, choices, idempotency_key)
+        return {
+            "ok": True,
+            "motion_id": motion_id,
+            "choices": len(choices),
+            "replayed": replayed,
+        }
+
+    @app.route("/api/vote/<code>/motion/<int:motion_id>/audit")
+    @rate_limited(as_json=True)
+    def api_vote_audit(code, motion_id):
+        if not voter_code_index.might_exist(code):
+            return {"ok": False, "error": "Unknown voter code or motion."}, 404
+
+        row = (
+            db.session.query(Voter.id, Motion.id)
+            .join(Motion, Motion.meeting_id == Voter.meeting_id)
+            .filter(Voter.code == code, Motion.id == motion_id)
+            .first()
+        )
+        if row is None:
+            return {"ok": False, "error": "Unknown voter code or motion."}, 404
+
+        voter_id, motion_id = row
+        return {
+            "ok": True,
+            "motion_id": motion_id,
+            **ballot_audit.summary(motion_id),
+            "records": ballot_audit.proofs(motion_id, voter_id),
+        }
@@ -8,15 +8,18 @@ from flask import (
     url_for,
 )
 from flask_login import login_required, login_user, logout_user
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from app.extensions import db
 from app.models import User
+from app.services.mail import MailQueueFull
+from app.services.metrics import metrics
+from app.services.passwords import PasswordHasherBusy, password_hasher
 from app.services.security import (
     generate_reset_token,
     send_reset_email,
     verify_reset_token,
 )
+from app.services.usernames import username_index
 
 
 def register_auth_routes(app):
@@ -27,15 +30,22 @@ def register_auth_routes(app):
             email = request.form.get("email")
             password = request.form.get("password")
 
+            try:
+                password_hash = password_hasher.hash(password)
+            except PasswordHasherBusy:
+                flash("The server is busy. Please try again in a moment.", "danger")
+                return redirect(url_for("signup"))
+
             new_user = User(
                 username=username,
                 email=email,
-                password_hash=generate_password_hash(password, method="pbkdf2:sha256"),
+                password_hash=password_hash,
             )
 
             try:
                 db.session.add(new_user)
                 db.session.commit()
+                username_index.add(new_user.username)
                 flash("Account created successfully! Please log in.", "success")
                 return redirect(url_for("login"))
             except Exception:
@@ -47,10 +57,9 @@ def register_auth_routes(app):
 
     @app.route("/check-username", methods=["POST"])
     def check_username():
-        data = request.get_json()
-        username = data.get("username", "").strip()
-        user = User.query.filter_by(username=username).first()
-        return jsonify({"exists": user is not None})
+        data = request.get_json(silent=True) or {}
+        username = data.get("username", "")
+        return jsonify({"exists": username_index.exists(username)})
 
     @app.route("/login", methods=["GET", "POST"])
     def login():
@@ -62,14 +71,36 @@ def register_auth_routes(app):
             remember = bool(request.form.get("remember"))
 
             user = User.query.filter_by(username=username).first()
-            if not user or not check_password_hash(user.password_hash, password):
+            try:
+                valid = user is not None and password_hasher.verify(
+                    user.password_hash, password
+                )
+            except PasswordHasherBusy:
+                error = "Too many sign-ins right now. Please try again in a moment."
+                return render_template("login_signup/login.html", error=error), 503
+
+            if not valid:
                 error = "Invalid username or password."
             else:
+                if password_hasher.needs_rehash(user.password_hash):
+                    upgrade_password_hash(user, password)
                 login_user(user, remember=remember)
                 return redirect(url_for("admin_meetings"))
 
         return render_template("login_signup/login.html", error=error)
 
+    def upgrade_password_hash(user, password):
+        # A failed upgrade must not block the sign-in; it is retried next time.
+        try:
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+            metrics.increment("passwords.rehashed")
+        except Exception:
+            db.session.rollback()
+            current_app.logger.warning(
+                "Could not upgrade password hash for user %s", user.id, exc_info=True
+            )
+
     @app.route("/forgot-password", methods=["GET", "POST"])
     def forgot_password():
         if request.method == "POST":
@@ -84,6 +115,12 @@ def register_auth_routes(app):
                 reset_url = url_for("reset_password", token=reset_token, _external=True)
                 try:
                     send_reset_email(user.email, reset_url)
+                except MailQueueFull:
+                    flash(
+                        "Too many reset requests right now. Please try again shortly.",
+                        "reset_error",
+                    )
+                    return redirect(url_for("forgot_password"))
                 except Exception:
                     flash(
                         "Email service is not configured. Please contact the administrator.",
@@ -128,9 +165,11 @@ def register_auth_routes(app):
                 flash("Password must be at least 8 characters long.", "reset_error")
                 return redirect(url_for("reset_password", token=token))
 
-            user.password_hash = generate_password_hash(
-                new_password, method="pbkdf2:sha256"
-            )
+            try:
+                user.password_hash = password_hasher.hash(new_password)
+            except PasswordHasherBusy:
+                flash("The server is busy. Please try again in a moment.", "reset_error")
+                return redirect(url_for("reset_password", token=token))
             db.session.commit()
             flash("Password reset successfully!", "success")
             return redirect(url_for("login"))
@@ -1,24 +1,28 @@
+import uuid
+from types import SimpleNamespace
+
 from flask import flash, redirect, render_template, request, send_from_directory, session, url_for
 
-from app.extensions import db
-from app.models import (
-    CandidateVote,
-    CumulativeVote,
-    Motion,
-    PreferenceVote,
-    ScoreVote,
-    Voter,
-    YesNoVote,
-)
+from app.models import Motion
+from app.services.archive import archive_store
+from app.services.assets import static_assets
+from app.services.ballot_buffer import BallotBufferFull, ballot_buffer
+from app.services.ballots import BallotError, parse_ballot, submit_ballot
+from app.services.rate_limit import rate_limited
+from app.services.replicas import read_only
+from app.services.voter_codes import voter_code_index
 
 
 def register_public_routes(app):
     @app.route("/favicon.ico")
     def favicon():
+        # The URL never changes, so unlike fingerprinted assets it is only
+        # cached for a day.
         return send_from_directory(
             app.static_folder,
-            "Votora_Favicon.png",
+            static_assets.resolve("Votora_Favicon.png", width=32),
             mimetype="image/png",
+            max_age=24 * 3600,
         )
 
     @app.route("/")
@@ -26,6 +30,7 @@ def register_public_routes(app):
         return render_template("index.html")
 
     @app.route("/join", methods=["GET", "POST"])
+    @rate_limited()
     def join_meeting():
         if request.method == "POST":
             raw_code = request.form.get("voter_code") or ""
@@ -35,11 +40,12 @@ def register_public_routes(app):
                 flash("Please enter a private key.", "join_error")
                 return redirect(url_for("join_meeting"))
 
-            voter = Voter.query.filter_by(code=code).first()
+            voter = voter_code_index.find_voter(code)
             if voter:
                 session["voter_id"] = voter.id
                 session["voter_name"] = voter.name
                 session["voter_code"] = voter.code
+                session["voter_meeting_id"] = voter.meeting_id
                 return redirect(url_for("voter_dashboard", code=voter.code))
 
             flash("Invalid private key. Please try again.", "join_error")
@@ -52,6 +58,7 @@ def register_public_routes(app):
         session.pop("voter_id", None)
         session.pop("voter_name", None)
         session.pop("voter_code", None)
+        session.pop("voter_meeting_id", None)
         return redirect(url_for("join_meeting"))
 
     @app.route("/voting-systems")
@@ -59,8 +66,10 @@ def register_public_routes(app):
         return render_template("voting_systems.html")
 
     @app.route("/vote/<code>")
+    @rate_limited()
+    @read_only
     def voter_dashboard(code):
-        voter = Voter.query.filter_by(code=code).first()
+        voter = voter_code_index.find_voter(code)
 
         if not voter:
             return render_template(
@@ -74,13 +83,16 @@ def register_public_routes(app):
 
         meeting = voter.meeting
         motions = meeting.motions
-        voted_motion_ids = {
-            *{vote.motion_id for vote in voter.yes_no_votes},
-            *{vote.motion_id for vote in voter.candidate_votes},
-            *{vote.motion_id for vote in voter.preference_votes},
-            *{vote.motion_id for vote in voter.score_votes},
-            *{vote.motion_id for vote in voter.cumulative_votes},
-        }
+        if meeting.archived_at is not None:
+            voted_motion_ids = archive_store.get(meeting.id).voted_motion_ids(voter.id)
+        else:
+            voted_motion_ids = {
+                *{vote.motion_id for vote in voter.yes_no_votes},
+                *{vote.motion_id for vote in voter.candidate_votes},
+                *{vote.motion_id for vote in voter.preference_votes},
+                *{vote.motion_id for vote in voter.score_votes},
+                *{vote.motion_id for vote in voter.cumulative_votes},
+            }
 
         return render_template(
             "voter/motion_list.html",
@@ -92,8 +104,9 @@ def register_public_routes(app):
         )
 
     @app.route("/vote/<code>/motion/<int:motion_id>", methods=["GET", "POST"])
+    @rate_limited()
     def vote_motion(code, motion_id):
-        voter = Voter.query.filter_by(code=code).first()
+        voter = voter_code_index.find_voter(code)
 
         if not voter:
             return render_template(
@@ -114,7 +127,20 @@ def register_public_routes(app):
         preference_ranks = {}
         score_values = {}
         cumulative_values = {}
-        if motion.type == "PREFERENCE":
+        if meeting.archived_at is not None:
+            # The vote rows are gone; show the ballot kept in the archive.
+            archived = archive_store.for_motion(motion)
+            choices = archived.voter_choices(motion.id, voter.id) if archived else []
+            values = {
+                "PREFERENCE": preference_ranks,
+                "SCORE": score_values,
+                "CUMULATIVE": cumulative_values,
+            }.get(motion.type)
+            if values is not None:
+                values.update(choices)
+            elif choices:
+                simple_vote = SimpleNamespace(option_id=choices[0][0])
+        elif motion.type == "PREFERENCE":
             votes_for_motion = [
                 vote for vote in voter.preference_votes if vote.motion_id == motion.id
             ]
@@ -143,168 +169,43 @@ def register_public_routes(app):
                 None,
             )
 
-        if request.method == "POST":
-            if motion.type == "PREFERENCE":
-                existing_pref_votes = PreferenceVote.query.filter_by(
-                    voter_id=voter.id, motion_id=motion.id
-                ).all()
-                for existing in existing_pref_votes:
-                    db.session.delete(existing)
-
-                ranks = []
-                for option in motion.options:
-                    value = request.form.get(f"opt_{option.id}_rank")
-                    if not value:
-                        continue
-                    try:
-                        rank = int(value)
-                    except ValueError:
-                        continue
-                    if rank <= 0:
-                        continue
-                    ranks.append((rank, option.id))
-
-                for rank, option_id in ranks:
-                    db.session.add(
-                        PreferenceVote(
-                            voter_id=voter.id,
-                            motion_id=motion.id,
-                            option_id=option_id,
-                            preference_rank=rank,
-                        )
-                    )
-            elif motion.type == "SCORE":
-                existing_score_votes = ScoreVote.query.filter_by(
-                    voter_id=voter.id, motion_id=motion.id
-                ).all()
-                for existing in existing_score_votes:
-                    db.session.delete(existing)
-
-                for option in motion.options:
-                    value = request.form.get(f"opt_{option.id}_score")
-                    if value is None or value == "":
-                        continue
-                    try:
-                        score_value = round(float(value), 1)
-                    except ValueError:
-                        continue
-                    if score_value < 0:
-                        continue
-                    if motion.score_max is not None and score_value > motion.score_max:
-                        score_value = float(motion.score_max)
-
-                    db.session.add(
-                        ScoreVote(
-                            voter_id=voter.id,
-                            motion_id=motion.id,
-                            option_id=option.id,
-                            score=score_value,
-                        )
-                    )
-            elif motion.type == "CUMULATIVE":
-                existing_votes = CumulativeVote.query.filter_by(
-                    voter_id=voter.id, motion_id=motion.id
-                ).all()
-                for existing in existing_votes:
-                    db.session.delete(existing)
-
-                budget = motion.budget_points
-                if budget is None:
-                    flash("Budget is not set for this motion.", "danger")
-                    return render_template(
-                        "voter/vote_motion.html",
-                        invalid=False,
-                        voter=voter,
-                        meeting=meeting,
-                        motion=motion,
-                        simple_vote=simple_vote,
-                        preference_ranks=preference_ranks,
-                        score_values=score_values,
-                        cumulative_values=cumulative_values,
-                    )
-
-                total_points = 0.0
-                cumulative_values = {}
-                for option in motion.options:
-                    raw_value = request.form.get(f"opt_{option.id}_points")
-                    if raw_value is None or raw_value == "":
-                        points_value = 0.0
-                    else:
-                        try:
-                            points_value = float(raw_value)
-                        except ValueError:
-                            points_value = 0.0
-                    if points_value < 0:
-                        flash("Points cannot be negative.", "danger")
-                        cumulative_values[option.id] = points_value
-                        return render_template(
-                            "voter/vote_motion.html",
-                            invalid=False,
-                            voter=voter,
-                            meeting=meeting,
-                            motion=motion,
-                            simple_vote=simple_vote,
-                            preference_ranks=preference_ranks,
-                            score_values=score_values,
-                            cumulative_values=cumulative_values,
-                        )
-
-                    total_points += points_value
-                    cumulative_values[option.id] = points_value
+        if request.method == "POST" and meeting.archived_at is not None:
+            flash("This meeting is archived; its ballots can no longer be changed.", "danger")
+            return redirect(url_for("voter_dashboard", code=voter.code))
 
-                if abs(total_points - float(budget)) > 1e-6:
-                    flash(
-                        f"You must allocate exactly {budget} points.\nCurrent total: {total_points}.",
-                        "danger",
-                    )
-                    return render_template(
-                        "voter/vote_motion.html",
-                        invalid=False,
-                        voter=voter,
-                        meeting=meeting,
-                        motion=motion,
-                        simple_vote=simple_vote,
-                        preference_ranks=preference_ranks,
-                        score_values=score_values,
-                        cumulative_values=cumulative_values,
-                    )
+        if request.method == "POST" and motion.status != "OPEN":
+            flash("This motion is not open for voting.", "danger")
+            return redirect(url_for("voter_dashboard", code=voter.code))
 
-                for option in motion.options:
-                    points_value = cumulative_values.get(option.id, 0.0)
-                    db.session.add(
-                        CumulativeVote(
-                            voter_id=voter.id,
-                            motion_id=motion.id,
-                            option_id=option.id,
-                            points=points_value,
-                        )
+        if request.method == "POST":
+            try:
+                choices = parse_ballot(motion, request.form)
+            except BallotError as error:
+                flash(error.message, "danger")
+                return render_template(
+                    "voter/vote_motion.html",
+                    invalid=False,
+                    voter=voter,
+                    meeting=meeting,
+                    motion=motion,
+                    simple_vote=simple_vote,
+                    preference_ranks=preference_ranks,
+                    score_values=score_values,
+                    cumulative_values=error.values or cumulative_values,
+                    submission_id=uuid.uuid4().hex,
+                )
+
+            if ballot_buffer.enabled:
+                try:
+                    ballot_buffer.submit(voter.id, motion.id, choices)
+                except BallotBufferFull:
+                    flash("Voting is very busy right now. Please submit again.", "danger")
+                    return redirect(
+                        url_for("vote_motion", code=voter.code, motion_id=motion.id)
                     )
             else:
-                selected_option_id = request.form.get("option")
-                if selected_option_id:
-                    try:
-                        option_id_int = int(selected_option_id)
-                    except ValueError:
-                        option_id_int = None
-
-                    if option_id_int is not None:
-                        vote_model = CandidateVote if motion.type == "FPTP" else YesNoVote
-                        if simple_vote is None:
-                            simple_vote = vote_model.query.filter_by(
-                                voter_id=voter.id, motion_id=motion.id
-                            ).first()
-                        if simple_vote:
-                            simple_vote.option_id = option_id_int
-                        else:
-                            db.session.add(
-                                vote_model(
-                                    voter_id=voter.id,
-                                    motion_id=motion.id,
-                                    option_id=option_id_int,
-                                )
-                            )
-
-            db.session.commit()
+                submission_id = (request.form.get("submission_id") or "").strip()
+                submit_ballot(voter.id, motion, choices, submission_id[:64] or None)
             flash("Your vote for this motion has been recorded.", "success")
             return redirect(url_for("voter_dashboard", code=voter.code))
 
@@ -318,4 +219,5 @@ def register_public_routes(app):
             preference_ranks=preference_ranks,
             score_values=score_values,
             cumulative_values=cumulative_values,
+            submission_id=uuid.uuid4().hex,
         )
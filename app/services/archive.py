@@ -0,0 +1,374 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+
+from app.extensions import db
+from app.models import BallotSubmission, Meeting, Motion, PackedBallot, Voter
+from app.services.ballots import BALLOT_MODELS, vote_rows_select
+from app.services.metrics import metrics
+from app.services.packed_ballots import VALUE_KINDS, VALUE_TYPECODES, ballot_store
+
+MAGIC = b"VOTEARC1"
+FORMAT_VERSION = 1
+# Header length, right after the magic; the JSON header follows.
+HEADER_LENGTH = struct.Struct("<I")
+SUFFIX = ".varc"
+
+_SWAP = sys.byteorder != "little"
+
+
+def archive_path(directory, meeting_id):
+    return os.path.join(directory, f"meeting-{meeting_id}{SUFFIX}")
+
+
+def _pack(values, typecode):
+    column = array(typecode, values)
+    if _SWAP:
+        column.byteswap()
+    return zlib.compress(column.tobytes(), 6)
+
+
+def _unpack(blob, typecode):
+    column = array(typecode)
+    column.frombytes(zlib.decompress(blob))
+    if _SWAP:
+        column.byteswap()
+    return column
+
+
+def _motion_entries(motion):
+    """``(voter_id, option_id, value)`` for ``motion``, by voter and then rank or row order."""
+    if ballot_store.reads_packed:
+        for voter_id, option_ids, values in sorted(
+            ballot_store.ballots(motion.id), key=lambda ballot: ballot[0]
+        ):
+            if values is None:
+                for option_id in option_ids:
+                    yield voter_id, option_id, None
+            else:
+                yield from zip([voter_id] * len(option_ids), option_ids, values)
+        return
+
+    yield from db.session.execute(
+        vote_rows_select(motion.type, motion.id), execution_options={"yield_per": 5000}
+    )
+
+
+def write_archive(meeting, path):
+    """Write every ballot, option and voter of ``meeting`` to ``path``.
+
+    Layout: ``MAGIC``, a uint32 header length, a JSON header, then zlib
+    compressed little-endian columns at the offsets (from the end of the
+    header) the header gives.  Each motion has three columns sorted by voter:
+    voter ids as deltas from the previous row (mostly 0 or small, so they
+    compress to almost nothing), option ids, and the rank or value when the
+    motion type has one.  The voter roll is one compressed JSON column.
+    Returns the header.
+    """
+    blobs = []
+    offset = 0
+
+    def add(blob):
+        nonlocal offset
+        blobs.append(blob)
+        span = [offset, len(blob)]
+        offset += len(blob)
+        return span
+
+    motions = []
+    for motion in sorted(meeting.motions, key=lambda motion: motion.id):
+        typecode = VALUE_TYPECODES[VALUE_KINDS.get(motion.type, 0)]
+        deltas, option_ids, values = array("I"), array("I"), []
+        previous = 0
+        ballots = 0
+        for voter_id, option_id, value in _motion_entries(motion):
+            if voter_id != previous or not deltas:
+                ballots += 1
+            deltas.append(voter_id - previous)
+            previous = voter_id
+            option_ids.append(option_id)
+            values.append(value)
+        columns = {
+            "voter_id": add(_pack(deltas, "I")),
+            "option_id": add(_pack(option_ids, "I")),
+        }
+        if typecode is not None:
+            columns["value"] = add(_pack(values, typecode))
+        motions.append(
+            {
+                "id": motion.id,
+                "type": motion.type,
+                "title": motion.title,
+                "options": [[option.id, option.text] for option in motion.options],
+                "rows": len(option_ids),
+                "ballots": ballots,
+                "value_type": typecode,
+                "columns": columns,
+            }
+        )
+
+    voters = db.session.query(Voter.id, Voter.name, Voter.email).filter(
+        Voter.meeting_id == meeting.id
+    )
+    roll = json.dumps([list(row) for row in voters.order_by(Voter.id)]).encode()
+    header = {
+        "format": FORMAT_VERSION,
+        "meeting_id": meeting.id,
+        "title": meeting.title,
+        "archived_at": datetime.utcnow().isoformat(),
+        "voters": add(zlib.compress(roll, 6)),
+        "motions": motions,
+    }
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+
+    partial = path + ".tmp"
+    with open(partial, "wb") as handle:
+        handle.write(MAGIC)
+        handle.write(HEADER_LENGTH.pack(len(encoded)))
+        handle.write(encoded)
+        for blob in blobs:
+            handle.write(blob)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(partial, path)
+    return header
+
+
+class MeetingArchive:
+    """Read-only view of one archive file, memory-mapped.
+
+    Only the header is parsed on open; a motion's columns are decompressed
+    from the mapping when asked for, so the pages of other motions are never
+    read.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a meeting archive.")
+        (length,) = HEADER_LENGTH.unpack_from(self._map, len(MAGIC))
+        start = len(MAGIC) + HEADER_LENGTH.size
+        self.header = json.loads(self._map[start : start + length])
+        if self.header["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported archive format {self.header['format']}.")
+        self._data = start + length
+        self.motions = {motion["id"]: motion for motion in self.header["motions"]}
+
+    def _column(self, span, typecode):
+        start = self._data + span[0]
+        return _unpack(self._map[start : start + span[1]], typecode)
+
+    def columns(self, motion_id):
+        """``(voter_ids, option_ids, values)``; ``values`` is None for single-choice motions."""
+        motion = self.motions[motion_id]
+        columns = motion["columns"]
+        voter_ids = self._column(columns["voter_id"], "I")
+        total = 0
+        for row, delta in enumerate(voter_ids):
+            total += delta
+            voter_ids[row] = total
+        option_ids = self._column(columns["option_id"], "I")
+        values = None
+        if "value" in columns:
+            values = self._column(columns["value"], motion["value_type"])
+        return voter_ids, option_ids, values
+
+    def entries(self, motion_id):
+        voter_ids, option_ids, values = self.columns(motion_id)
+        if values is None:
+            return zip(voter_ids, option_ids, [None] * len(option_ids))
+        return zip(voter_ids, option_ids, values)
+
+    def ballots(self, motion_id):
+        """Yield ``(voter_id, option_ids)`` per voter, preference ballots in rank order."""
+        voter_ids, option_ids, _ = self.columns(motion_id)
+        start = 0
+        for row in range(1, len(voter_ids) + 1):
+            if row == len(voter_ids) or voter_ids[row] != voter_ids[start]:
+                yield voter_ids[start], option_ids[start:row].tolist()
+                start = row
+
+    def voter_choices(self, motion_id, voter_id):
+        """``[(option_id, value), ...]`` of one voter's ballot, empty if they did not vote."""
+        voter_ids, option_ids, values = self.columns(motion_id)
+        start = bisect_left(voter_ids, voter_id)
+        end = bisect_right(voter_ids, voter_id, lo=start)
+        if values is None:
+            return [(option_id, None) for option_id in option_ids[start:end]]
+        return list(zip(option_ids[start:end], values[start:end]))
+
+    def voted_motion_ids(self, voter_id):
+        voted = set()
+        for motion_id, motion in self.motions.items():
+            voter_ids = self._column(motion["columns"]["voter_id"], "I")
+            total = 0
+            for delta in voter_ids:
+                total += delta
+                if total >= voter_id:
+                    break
+            if total == voter_id:
+                voted.add(motion_id)
+        return voted
+
+    def ballot_count(self):
+        """Ballots cast, one per voter and motion, as ``meeting_ballot_counts`` counts them."""
+        return sum(motion["ballots"] for motion in self.motions.values())
+
+    def voters(self):
+        """The roll at archive time as ``[voter_id, name, email]`` lists."""
+        span = self.header["voters"]
+        start = self._data + span[0]
+        return json.loads(zlib.decompress(self._map[start : start + span[1]]))
+
+    def close(self):
+        self._map.close()
+
+
+class ArchiveStore:
+    """Cold storage for meetings whose motions are all closed.
+
+    ``archive`` writes a meeting to ``ARCHIVE_DIR``, reads the file back to
+    check it, marks the meeting archived, and only then deletes its ballot
+    rows, ``ARCHIVE_BATCH_SIZE`` at a time with a commit after each batch, so
+    the hot vote tables are never locked for long.  From the moment the
+    meeting is marked, ``vote_entries`` and ``ranked_ballots`` (so every tally
+    and the results pages) read its ballots from the archive.  Options and
+    voters stay in the database for the admin pages and are copied into the
+    file so it stands alone.  Open archives are cached per process.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config["ARCHIVE_DIR"]
+        if not os.path.isabs(self.directory):
+            self.directory = os.path.join(os.path.dirname(app.root_path), self.directory)
+        self.batch_size = app.config["ARCHIVE_BATCH_SIZE"]
+        self.cache_size = app.config["ARCHIVE_CACHE_SIZE"]
+
+    def get(self, meeting_id):
+        with self._lock:
+            archive = self._open.get(meeting_id)
+            if archive is not None:
+                self._open.move_to_end(meeting_id)
+                return archive
+        archive = MeetingArchive(archive_path(self.directory, meeting_id))
+        metrics.increment("archive.opens")
+        with self._lock:
+            self._open[meeting_id] = archive
+            while len(self._open) > self.cache_size:
+                # Not closed: a request may still be reading it; the GC unmaps it.
+                self._open.popitem(last=False)
+        return archive
+
+    def for_motion(self, motion):
+        """The archive holding ``motion``'s ballots, or None if they are in the database."""
+        meeting = db.session.get(Meeting, motion.meeting_id)
+        if meeting is None or meeting.archived_at is None:
+            return None
+        archive = self.get(meeting.id)
+        return archive if motion.id in archive.motions else None
+
+    def eligible_meetings(self):
+        """Unarchived meetings with at least one motion and every motion closed."""
+        not_closed = db.exists().where(
+            Motion.meeting_id == Meeting.id, Motion.status != "CLOSED"
+        )
+        has_motions = db.exists().where(Motion.meeting_id == Meeting.id)
+        return (
+            Meeting.query.filter(Meeting.archived_at.is_(None), has_motions, ~not_closed)
+            .order_by(Meeting.id)
+            .all()
+        )
+
+    def archive(self, meeting):
+        """Export ``meeting``, verify the file and mark the meeting archived; commits."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = archive_path(self.directory, meeting.id)
+        header = write_archive(meeting, path)
+
+        written = MeetingArchive(path)
+        try:
+            for motion in header["motions"]:
+                voter_ids, option_ids, _ = written.columns(motion["id"])
+                if len(voter_ids) != motion["rows"] or len(option_ids) != motion["rows"]:
+                    raise RuntimeError(f"Archive of meeting {meeting.id} did not read back.")
+        finally:
+            written.close()
+
+        meeting.archived_at = datetime.utcnow()
+        db.session.commit()
+        with self._lock:
+            self._open.pop(meeting.id, None)
+        metrics.increment("archive.meetings")
+        return header
+
+    def purge(self, meeting_id):
+        """Delete the archived meeting's ballot rows in batches; returns rows deleted.
+
+        Safe to rerun, e.g. after an interrupted run.
+        """
+        motion_ids = [
+            motion_id
+            for (motion_id,) in db.session.query(Motion.id).filter(
+                Motion.meeting_id == meeting_id
+            )
+        ]
+        if not motion_ids:
+            return 0
+        deleted = 0
+        models = [model for model, _ in BALLOT_MODELS.values()] + [BallotSubmission]
+        for model in models:
+            while True:
+                ids = [
+                    row_id
+                    for (row_id,) in db.session.query(model.id)
+                    .filter(model.motion_id.in_(motion_ids))
+                    .limit(self.batch_size)
+                ]
+                if not ids:
+                    break
+                model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+                db.session.commit()
+                deleted += len(ids)
+        for motion_id in motion_ids:
+            while True:
+                voter_ids = [
+                    voter_id
+                    for (voter_id,) in db.session.query(PackedBallot.voter_id)
+                    .filter(PackedBallot.motion_id == motion_id)
+                    .limit(self.batch_size)
+                ]
+                if not voter_ids:
+                    break
+                PackedBallot.query.filter(
+                    PackedBallot.motion_id == motion_id,
+                    PackedBallot.voter_id.in_(voter_ids),
+                ).delete(synchronize_session=False)
+                db.session.commit()
+                deleted += len(voter_ids)
+        metrics.increment("archive.rows_deleted", deleted)
+        return deleted
+
+    def remove(self, meeting_id):
+        """Drop the archive of a deleted meeting."""
+        with self._lock:
+            self._open.pop(meeting_id, None)
+        path = archive_path(self.directory, meeting_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+archive_store = ArchiveStore()
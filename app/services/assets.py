@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, request, send_from_directory
+
+from app.services.metrics import metrics
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+
+# Resized copies made by ``flask assets build``; templates ask for one with
+# ``url_for('static', filename=..., w=<width>)``.
+IMAGE_WIDTHS = {
+    "Votora_Favicon.png": (32, 88, 180),
+    "Votora_Logo.png": (312,),
+}
+
+COMPRESSIBLE_TYPES = ("application/javascript", "application/json", "image/svg+xml")
+
+
+def variant_name(filename, width):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}@{width}w{ext}"
+
+
+def _is_compressible(filename):
+    mimetype = mimetypes.guess_type(filename)[0] or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        relative_root = os.path.relpath(root, static_folder)
+        if relative_root == ".":
+            dirs[:] = [name for name in dirs if name != DIST_DIR]
+        for name in sorted(files):
+            path = os.path.join(relative_root, name) if relative_root != "." else name
+            yield path.replace(os.sep, "/")
+
+
+def build_assets(static_folder):
+    """Write fingerprinted copies of every static file to ``static/dist``.
+
+    Text files also get ``.gz`` and, with the ``brotli`` package, ``.br``
+    siblings; with Pillow, PNGs are re-encoded and the widths in
+    ``IMAGE_WIDTHS`` are produced.  Returns one ``(name, hashed name, bytes,
+    gzip bytes, brotli bytes)`` row per file written; the name to hashed name
+    map is saved as ``dist/manifest.json``.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest = {}
+    report = []
+
+    def emit(name, data):
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = f"{DIST_DIR}/{stem}.{digest}{ext}"
+        target = os.path.join(static_folder, *hashed.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as handle:
+            handle.write(data)
+        gzip_size = brotli_size = None
+        if _is_compressible(name):
+            gzip_size = _write_smaller(target + ".gz", data, gzip.compress(data, 9, mtime=0))
+            if brotli is not None:
+                brotli_size = _write_smaller(
+                    target + ".br", data, brotli.compress(data, quality=11)
+                )
+        manifest[name] = hashed
+        report.append((name, hashed, len(data), gzip_size, brotli_size))
+
+    for name in _source_files(static_folder):
+        with open(os.path.join(static_folder, name), "rb") as handle:
+            data = handle.read()
+        if Image is not None and name.lower().endswith(".png"):
+            emit(name, _optimised_png(Image, data))
+            for width in IMAGE_WIDTHS.get(name, ()):
+                emit(variant_name(name, width), _optimised_png(Image, data, width))
+        else:
+            emit(name, data)
+
+    with open(os.path.join(dist, MANIFEST_NAME), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    return report
+
+
+def _write_smaller(path, original, compressed):
+    if len(compressed) >= len(original):
+        return None
+    with open(path, "wb") as handle:
+        handle.write(compressed)
+    return len(compressed)
+
+
+def _optimised_png(Image, data, width=None):
+    with Image.open(io.BytesIO(data)) as image:
+        if width is not None and width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="PNG", optimize=True)
+    optimised = output.getvalue()
+    # Resized copies always count; a re-encode only if it actually saved bytes.
+    return optimised if width is not None or len(optimised) < len(data) else data
+
+
+class StaticAssets:
+    """Serves the fingerprinted files written by ``flask assets build``.
+
+    When ``static/dist/manifest.json`` exists, ``url_for('static', ...)``
+    resolves to the hashed copy (or its resized variant for ``w=<width>``),
+    which is served with a one-year ``immutable`` lifetime and a precompressed
+    ``.br``/``.gz`` body when the client accepts one.  Without a manifest the
+    plain files are served as before.
+    """
+
+    def __init__(self):
+        self.manifest = {}
+        self.max_age = 0
+
+    def init_app(self, app):
+        self.max_age = app.config["STATIC_ASSETS_MAX_AGE"]
+        if app.config["STATIC_ASSETS_ENABLED"] and app.static_folder:
+            self.manifest = self._load(app.static_folder)
+        app.url_defaults(self._rewrite_url)
+        app.view_functions["static"] = self.send_static
+        metrics.register_gauge("static_assets.fingerprinted", lambda: len(self.manifest))
+
+    def resolve(self, filename, width=None):
+        if width is not None:
+            hashed = self.manifest.get(variant_name(filename, width))
+            if hashed is not None:
+                return hashed
+        return self.manifest.get(filename, filename)
+
+    def send_static(self, filename):
+        if not filename.startswith(f"{DIST_DIR}/"):
+            return current_app.send_static_file(filename)
+
+        static_folder = current_app.static_folder
+        served, encoding = filename, None
+        for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if candidate in request.accept_encodings and os.path.isfile(
+                os.path.join(static_folder, *filename.split("/")) + suffix
+            ):
+                served, encoding = filename + suffix, candidate
+                break
+
+        response = send_from_directory(
+            static_folder,
+            served,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            max_age=self.max_age,
+        )
+        response.cache_control.immutable = True
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+            metrics.increment(f"static_assets.{encoding}")
+        if _is_compressible(filename):
+            response.vary.add("Accept-Encoding")
+        return response
+
+    def _rewrite_url(self, endpoint, values):
+        if endpoint != "static":
+            return
+        width = values.pop("w", None)
+        if self.manifest and "filename" in values:
+            values["filename"] = self.resolve(values["filename"], width)
+
+    def _load(self, static_folder):
+        path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,382 @@
+import hashlib
+import json
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import BallotAuditNode, BallotAuditRecord, BallotAuditTree
+from app.services.metrics import metrics
+
+HASH_SIZE = 32
+# Session.info key: motion id -> _Frontier, valid for one transaction.
+_FRONTIERS_KEY = "ballot_audit_frontiers"
+
+_RECORDS = BallotAuditRecord.__table__
+_NODES = BallotAuditNode.__table__
+_TREES = BallotAuditTree.__table__
+
+
+def leaf_hash(payload):
+    """RFC 6962 leaf hash of a record's canonical JSON ``payload``."""
+    return hashlib.sha256(b"\x00" + payload.encode()).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _split(peaks):
+    return [peaks[offset : offset + HASH_SIZE] for offset in range(0, len(peaks), HASH_SIZE)]
+
+
+def _bag(peaks):
+    """Root over consecutive complete subtrees, largest first (RFC 6962 shape)."""
+    root = peaks[-1]
+    for peak in reversed(peaks[:-1]):
+        root = node_hash(peak, root)
+    return root
+
+
+def tree_root(peaks):
+    """Merkle tree head for the frontier ``peaks`` (bytes, 32 per peak)."""
+    if not peaks:
+        return hashlib.sha256(b"").digest()
+    return _bag(_split(peaks))
+
+
+def verify_inclusion(leaf, index, size, path, root):
+    """Check an audit ``path`` (RFC 9162, 2.1.3.2) for leaf ``index`` of a ``size``-leaf tree."""
+    if index >= size:
+        return False
+    fn, sn = index, size - 1
+    result = leaf
+    for sibling in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            result = node_hash(sibling, result)
+            while not fn & 1 and fn:
+                fn >>= 1
+                sn >>= 1
+        else:
+            result = node_hash(result, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and result == root
+
+
+def _peak_ranges(size):
+    """``(start, level)`` of each complete subtree of the frontier, largest first."""
+    ranges = []
+    start = 0
+    for level in range(size.bit_length() - 1, -1, -1):
+        if size >> level & 1:
+            ranges.append((start, level))
+            start += 1 << level
+    return ranges
+
+
+class _Frontier:
+    """A motion's tree size and peaks as of the last append in ``transaction``."""
+
+    __slots__ = ("transaction", "size", "peaks")
+
+    def __init__(self, transaction, size, peaks):
+        self.transaction = transaction
+        self.size = size
+        self.peaks = peaks
+
+
+class BallotAuditLog:
+    """Append-only log of every ballot stored, with one Merkle tree per motion.
+
+    ``store_ballot`` appends a record (who, what, submission or replacement)
+    in the ballot's own transaction.  The tree follows RFC 6962: each append
+    hashes the new leaf into the frontier of complete subtrees kept on the
+    motion's ``ballot_audit_trees`` row, storing the O(log n) interior nodes
+    it completes (one on average), so nothing is ever rehashed.  That row is
+    locked for the rest of the transaction, which orders appends per motion;
+    a batch of ballots in one transaction locks and loads it once.
+
+    Closing a motion publishes its root.  A voter can fetch an inclusion proof
+    for each of their records: the sibling hashes inside the complete subtree
+    holding the leaf come from stored nodes, the rest from the frontier.
+    """
+
+    def __init__(self):
+        self.enabled = False
+
+    def init_app(self, app):
+        self.enabled = app.config["BALLOT_AUDIT_ENABLED"]
+        if not event.contains(Session, "after_soft_rollback", _forget_frontiers):
+            event.listen(Session, "after_soft_rollback", _forget_frontiers)
+
+    def append(self, voter_id, motion, choices, replaced=False):
+        """Log ``choices`` as the voter's ballot on ``motion``; the caller commits."""
+        if not self.enabled:
+            return
+        frontier = self._frontier(motion.id)
+        connection = db.session.connection()
+        index = frontier.size
+        action = "REPLACE" if replaced else "SUBMIT"
+        created_at = datetime.utcnow()
+        payload = json.dumps(
+            {
+                "motion_id": motion.id,
+                "leaf_index": index,
+                "voter_id": voter_id,
+                "action": action,
+                "choices": [list(choice) for choice in choices],
+                "at": created_at.isoformat(),
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        digest = leaf_hash(payload)
+        # Core statements on the session's connection: three ORM objects per
+        # ballot through the unit of work cost more than the hashing, and the
+        # audit rows never need the autoflush.
+        connection.execute(
+            _RECORDS.insert().values(
+                motion_id=motion.id,
+                leaf_index=index,
+                voter_id=voter_id,
+                action=action,
+                payload=payload,
+                leaf_hash=digest,
+                created_at=created_at,
+            )
+        )
+
+        # Merge with the equal-sized subtrees ending where this leaf starts.
+        peaks = frontier.peaks
+        level = 0
+        nodes = []
+        while index >> level & 1:
+            digest = node_hash(peaks[-HASH_SIZE:], digest)
+            peaks = peaks[:-HASH_SIZE]
+            level += 1
+            nodes.append(
+                {
+                    "motion_id": motion.id,
+                    "level": level,
+                    "position": index >> level,
+                    "hash": digest,
+                }
+            )
+        if nodes:
+            connection.execute(_NODES.insert(), nodes)
+        frontier.peaks = peaks + digest
+        frontier.size = index + 1
+        connection.execute(
+            _TREES.update()
+            .where(_TREES.c.motion_id == motion.id)
+            .values(size=frontier.size, peaks=frontier.peaks)
+        )
+        metrics.increment("ballot_audit.appends")
+
+    def publish(self, motion):
+        """Record the motion's current root as its published one; the caller commits."""
+        if not self.enabled:
+            return
+        frontier = self._frontier(motion.id)
+        db.session.connection().execute(
+            _TREES.update()
+            .where(_TREES.c.motion_id == motion.id)
+            .values(
+                published_root=tree_root(frontier.peaks).hex(),
+                published_size=frontier.size,
+                published_at=datetime.utcnow(),
+            )
+        )
+
+    def summary(self, motion_id):
+        row = self._tree_row(motion_id)
+        if row is None:
+            return {
+                "size": 0,
+                "root": tree_root(b"").hex(),
+                "published_root": None,
+                "published_size": None,
+                "published_at": None,
+            }
+        return {
+            "size": row.size,
+            "root": tree_root(row.peaks).hex(),
+            "published_root": row.published_root,
+            "published_size": row.published_size,
+            "published_at": row.published_at.isoformat() if row.published_at else None,
+        }
+
+    def proofs(self, motion_id, voter_id):
+        """Each of the voter's records with its audit path against the current root."""
+        tree = self._tree_row(motion_id)
+        if tree is None:
+            return []
+        # Sorted here: ORDER BY leaf_index steers SQLite off the voter index.
+        records = sorted(
+            BallotAuditRecord.query.filter_by(motion_id=motion_id, voter_id=voter_id),
+            key=lambda record: record.leaf_index,
+        )
+        if not records:
+            return []
+
+        peaks = _split(tree.peaks)
+        ranges = _peak_ranges(tree.size)
+        plans = []
+        leaves, nodes = set(), set()
+        for record in records:
+            index = record.leaf_index
+            peak = next(
+                number
+                for number, (start, level) in enumerate(ranges)
+                if index < start + (1 << level)
+            )
+            siblings = [(level, (index >> level) ^ 1) for level in range(ranges[peak][1])]
+            leaves.update(position for level, position in siblings if level == 0)
+            nodes.update(key for key in siblings if key[0] > 0)
+            plans.append((record, peak, siblings))
+
+        # Two queries however many records and levels are involved.
+        hashes = {}
+        if leaves:
+            for position, digest in db.session.query(
+                BallotAuditRecord.leaf_index, BallotAuditRecord.leaf_hash
+            ).filter(
+                BallotAuditRecord.motion_id == motion_id,
+                BallotAuditRecord.leaf_index.in_(leaves),
+            ):
+                hashes[0, position] = digest
+        if nodes:
+            for level, position, digest in db.session.query(
+                BallotAuditNode.level, BallotAuditNode.position, BallotAuditNode.hash
+            ).filter(
+                BallotAuditNode.motion_id == motion_id,
+                # A superset that SQLite answers with primary key probes;
+                # a row-value IN would scan every node of the motion.
+                BallotAuditNode.level.in_({level for level, _ in nodes}),
+                BallotAuditNode.position.in_({position for _, position in nodes}),
+            ):
+                hashes[level, position] = digest
+
+        root = _bag(peaks)
+        proofs = []
+        for record, peak, siblings in plans:
+            path = [hashes[key] for key in siblings]
+            if peak < len(peaks) - 1:
+                path.append(_bag(peaks[peak + 1 :]))
+            path.extend(reversed(peaks[:peak]))
+            proofs.append(
+                {
+                    "leaf_index": record.leaf_index,
+                    "action": record.action,
+                    "payload": record.payload,
+                    "leaf_hash": record.leaf_hash.hex(),
+                    "path": [digest.hex() for digest in path],
+                    "verified": verify_inclusion(
+                        record.leaf_hash, record.leaf_index, tree.size, path, root
+                    ),
+                }
+            )
+        return proofs
+
+    def verify(self, motion_id, batch_size=5000):
+        """Recompute every leaf and node of the motion's tree from the stored payloads.
+
+        Returns the problems found (empty when the log is intact): payloads
+        that no longer match their leaf hash, stored nodes that differ from the
+        recomputed ones, and a root that differs from the frontier or the
+        published root.
+        """
+        problems = []
+        tree = self._tree_row(motion_id)
+        published_size = tree.published_size if tree is not None else None
+        stored_nodes = {
+            (level, position): digest
+            for level, position, digest in db.session.query(
+                BallotAuditNode.level, BallotAuditNode.position, BallotAuditNode.hash
+            ).filter(BallotAuditNode.motion_id == motion_id)
+        }
+        peaks = []
+        size = 0
+        query = (
+            db.session.query(
+                BallotAuditRecord.leaf_index,
+                BallotAuditRecord.payload,
+                BallotAuditRecord.leaf_hash,
+            )
+            .filter(BallotAuditRecord.motion_id == motion_id)
+            .order_by(BallotAuditRecord.leaf_index)
+            .execution_options(yield_per=batch_size)
+        )
+        for index, payload, stored in query:
+            if size == published_size:
+                self._check_published(tree, peaks, problems)
+            if index != size:
+                problems.append(f"Leaf {size} is missing.")
+                break
+            if leaf_hash(payload) != stored:
+                problems.append(f"Leaf {index} does not match its payload.")
+            # Carry on from the stored hash so each problem is reported once.
+            digest = stored
+            level = 0
+            while index >> level & 1:
+                digest = node_hash(peaks.pop(), digest)
+                level += 1
+                if stored_nodes.get((level, index >> level)) != digest:
+                    problems.append(f"Node {level}/{index >> level} does not match.")
+            peaks.append(digest)
+            size += 1
+        if size == published_size:
+            self._check_published(tree, peaks, problems)
+
+        if tree is not None and (tree.size != size or tree.peaks != b"".join(peaks)):
+            problems.append("The stored frontier does not match the records.")
+        return problems
+
+    def _check_published(self, tree, peaks, problems):
+        if tree_root(b"".join(peaks)).hex() != tree.published_root:
+            problems.append("The published root does not match the records.")
+
+    def delete_for_motions(self, motion_ids):
+        if motion_ids:
+            for model in (BallotAuditRecord, BallotAuditNode, BallotAuditTree):
+                model.query.filter(model.motion_id.in_(motion_ids)).delete(
+                    synchronize_session=False
+                )
+
+    def _tree_row(self, motion_id):
+        # Core rather than Session.get: appends update the row behind the ORM's back.
+        return db.session.execute(
+            db.select(_TREES).where(_TREES.c.motion_id == motion_id)
+        ).first()
+
+    def _frontier(self, motion_id):
+        # Begins the transaction if need be, so it is the one the cache keys on.
+        connection = db.session.connection()
+        frontiers = db.session.info.setdefault(_FRONTIERS_KEY, {})
+        transaction = db.session().get_transaction()
+        frontier = frontiers.get(motion_id)
+        if frontier is not None and frontier.transaction is transaction:
+            return frontier
+        row = connection.execute(
+            db.select(_TREES.c.size, _TREES.c.peaks)
+            .where(_TREES.c.motion_id == motion_id)
+            .with_for_update()
+        ).first()
+        if row is None:
+            # A concurrent first ballot fails on the primary key and is retried.
+            connection.execute(_TREES.insert().values(motion_id=motion_id, size=0, peaks=b""))
+            row = (0, b"")
+        frontier = frontiers[motion_id] = _Frontier(transaction, *row)
+        return frontier
+
+
+def _forget_frontiers(session, previous_transaction):
+    # A rolled back savepoint may have undone appends the cache still counts.
+    session.info.pop(_FRONTIERS_KEY, None)
+
+
+ballot_audit = BallotAuditLog()
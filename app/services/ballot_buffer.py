@@ -0,0 +1,378 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.extensions import db
+from app.models import Motion
+from app.services.ballots import bump_vote_version, store_ballot
+
+# Errors that belong to one ballot (a deleted voter or option, say) rather than
+# to the database; such a ballot can never be stored and is set aside.
+RECORD_ERRORS = (IntegrityError, DataError)
+DEAD_LETTER_NAME = "dead-letter.log"
+
+
+class BallotBufferFull(RuntimeError):
+    pass
+
+
+class BallotBuffer:
+    """Write-behind ingestion of validated ballots.
+
+    Each accepted ballot is appended to a per-process log segment and fsynced
+    (concurrent submitters share one fsync) before ``submit`` returns.  A
+    background thread writes pending ballots to the vote tables in a single
+    transaction every ``BALLOT_BUFFER_FLUSH_MS`` or once
+    ``BALLOT_BUFFER_MAX_BATCH`` ballots are waiting.  Only the latest ballot per
+    ``(voter_id, motion_id)`` is kept.
+
+    Each process writes segments named after an owner id unique to its
+    lifetime (pid plus a random token) and holds an ``flock`` on the owner's
+    lock file while it runs; segments whose owner lock can be taken belong to
+    a dead process and are replayed when the app starts.  A ballot that fails
+    on its own (a deleted voter or option) is moved to ``dead-letter.log``
+    instead of holding up the rest of its batch.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}
+        self._sealed = []
+        self._pid = None
+        self._owner_pid = None
+        self._owner = None
+        self._owner_lock = None
+        self._log = None
+        self._log_path = None
+        self._segment_index = 0
+        self._seq = 0
+        self._written = 0
+        self._synced = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config["BALLOT_BUFFER_ENABLED"]
+        if not self.enabled:
+            return
+
+        self.directory = app.config["BALLOT_BUFFER_DIR"]
+        self.flush_interval = app.config["BALLOT_BUFFER_FLUSH_MS"] / 1000.0
+        self.max_batch = app.config["BALLOT_BUFFER_MAX_BATCH"]
+        self.max_pending = app.config["BALLOT_BUFFER_MAX_PENDING"]
+        os.makedirs(self.directory, exist_ok=True)
+        self.recover()
+
+    def submit(self, voter_id, motion_id, choices):
+        """Durably accept a ballot; it reaches the vote tables on the next flush."""
+        self._ensure_started()
+        record = {
+            "voter_id": voter_id,
+            "motion_id": motion_id,
+            "choices": [list(choice) for choice in choices],
+            "ts": time.time(),
+        }
+        key = (voter_id, motion_id)
+
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                self._wake.set()
+                self._space.wait_for(
+                    lambda: len(self._pending) < self.max_pending, timeout=5.0
+                )
+                if len(self._pending) >= self.max_pending:
+                    raise BallotBufferFull("Ballot buffer is full.")
+
+            self._seq += 1
+            record["seq"] = self._seq
+            self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._log.flush()
+            self._written += 1
+            ticket = self._written
+            self._pending[key] = record
+            if len(self._pending) >= self.max_batch:
+                self._wake.set()
+
+        # Rotation swaps segments while holding _sync_lock, so the current log
+        # cannot change underneath us and a rotated-away ticket is already synced.
+        with self._sync_lock:
+            if self._synced < ticket:
+                target = self._written
+                os.fsync(self._log.fileno())
+                self._synced = max(self._synced, target)
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch = self._pending
+            self._pending = {}
+            sealed = self._rotate()
+            self._space.notify_all()
+
+        with self.app.app_context():
+            try:
+                self._store(batch.values())
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception("Ballot buffer flush failed; will retry.")
+                with self._lock:
+                    self._sealed = sealed + self._sealed
+                    for key, record in batch.items():
+                        current = self._pending.get(key)
+                        if current is None or current["seq"] < record["seq"]:
+                            self._pending[key] = record
+                return 0
+
+        for path in sealed:
+            _remove_quietly(path)
+        return len(batch)
+
+    def recover(self):
+        """Replay log segments owned by processes that are no longer running."""
+        claimed = {}
+        dead_owners = {}
+        pattern = os.path.join(self.directory, "ballots-*.log*")
+        for path in sorted(glob.glob(pattern)):
+            owner = _segment_owner(path)
+            if owner is None or owner == self._owner:
+                continue
+            # Also stops the sweep below from dropping the lock of a live owner.
+            if owner not in dead_owners:
+                dead_owners[owner] = self._take_owner_lock(owner)
+            if dead_owners[owner] is None:
+                continue
+            original = path.split(".log")[0] + ".log"
+            self._ensure_owner()
+            target = f"{original}.replay-{self._owner}"
+            try:
+                os.rename(path, target)
+            except OSError:
+                continue
+            claimed[target] = original
+        # Lock files of owners that exited without leaving segments.
+        for path in glob.glob(os.path.join(self.directory, "owner-*.lock")):
+            owner = os.path.basename(path)[len("owner-") : -len(".lock")]
+            if owner != self._owner and owner not in dead_owners:
+                dead_owners[owner] = self._take_owner_lock(owner)
+        for owner, handle in dead_owners.items():
+            if handle is not None:
+                _remove_quietly(self._owner_lock_path(owner))
+                handle.close()
+
+        if not claimed:
+            return 0
+
+        latest = {}
+        for path in claimed:
+            for record in _read_segment(path):
+                key = (record["voter_id"], record["motion_id"])
+                current = latest.get(key)
+                if current is None or (current["ts"], current["seq"]) <= (
+                    record["ts"],
+                    record["seq"],
+                ):
+                    latest[key] = record
+
+        with self.app.app_context():
+            try:
+                self._store(latest.values())
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception(
+                    "Replaying buffered ballots failed; left for the next start."
+                )
+                for path, original in claimed.items():
+                    try:
+                        os.rename(path, original)
+                    except OSError:
+                        pass
+                return 0
+
+        for path in claimed:
+            _remove_quietly(path)
+        self.app.logger.info("Replayed %s buffered ballots.", len(latest))
+        return len(latest)
+
+    def close(self):
+        if self._pid != os.getpid():
+            return
+        self.flush()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                if not self._pending:
+                    _remove_quietly(self._log_path)
+                self._log = None
+            if not self._pending and not self._sealed and self._owner_lock is not None:
+                _remove_quietly(self._owner_lock_path(self._owner))
+
+    def _store(self, records):
+        # One transaction for the batch; if it fails on a ballot, store them one
+        # by one and set aside those that fail on their own.  Anything else
+        # (the database is down, say) propagates and the batch is retried.
+        records = list(records)
+        try:
+            self._apply(records)
+            return
+        except RECORD_ERRORS as exc:
+            db.session.rollback()
+            if len(records) == 1:
+                self._dead_letter(records[0], exc)
+                return
+        for record in records:
+            try:
+                self._apply([record])
+            except RECORD_ERRORS as exc:
+                db.session.rollback()
+                self._dead_letter(record, exc)
+
+    def _dead_letter(self, record, exc):
+        self.app.logger.error(
+            "Ballot of voter %s on motion %s cannot be stored (%s); moved to %s.",
+            record["voter_id"],
+            record["motion_id"],
+            exc.__class__.__name__,
+            DEAD_LETTER_NAME,
+        )
+        entry = dict(record, error=str(getattr(exc, "orig", exc)), failed_at=time.time())
+        with open(os.path.join(self.directory, DEAD_LETTER_NAME), "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _apply(self, records):
+        records = sorted(records, key=lambda record: (record["ts"], record["seq"]))
+        motion_ids = {record["motion_id"] for record in records}
+        motions = {
+            motion.id: motion
+            for motion in Motion.query.filter(Motion.id.in_(motion_ids)).all()
+        }
+        for record in records:
+            motion = motions.get(record["motion_id"])
+            if motion is None:
+                continue
+            choices = [tuple(choice) for choice in record["choices"]]
+            store_ballot(record["voter_id"], motion, choices, bump_version=False)
+        bump_vote_version(*motions)
+        db.session.commit()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._ensure_owner()
+            self._pending = {}
+            self._sealed = []
+            self._log = None
+            self._open_segment()
+            thread = threading.Thread(
+                target=self._run, name="ballot-buffer", daemon=True
+            )
+            thread.start()
+            atexit.register(self.close)
+
+    def _open_segment(self):
+        self._segment_index += 1
+        self._log_path = os.path.join(
+            self.directory, f"ballots-{self._owner}-{self._segment_index}.log"
+        )
+        self._log = open(self._log_path, "x", encoding="utf-8")
+
+    def _owner_lock_path(self, owner):
+        return os.path.join(self.directory, f"owner-{owner}.lock")
+
+    def _ensure_owner(self):
+        # The lock file exists before any segment named after it, and the lock
+        # is released by the kernel however the process ends.
+        if self._owner_pid == os.getpid():
+            return
+        self._owner_pid = os.getpid()
+        self._owner = f"{self._owner_pid}-{uuid.uuid4().hex[:12]}"
+        path = self._owner_lock_path(self._owner)
+        # Locked before it gets its name, so a sweep never sees it unlocked.
+        self._owner_lock = open(f"{path}.new", "x")
+        fcntl.flock(self._owner_lock, fcntl.LOCK_EX)
+        os.rename(f"{path}.new", path)
+        self._segment_index = 0
+
+    def _take_owner_lock(self, owner):
+        """Lock a dead owner's lock file and return it, or None if the owner is alive.
+
+        Segments without a lock file (already cleaned up, or written before
+        owner locks existed) count as dead.
+        """
+        try:
+            handle = open(self._owner_lock_path(owner), "a")
+        except OSError:
+            return None
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        return handle
+
+    def _rotate(self):
+        with self._sync_lock:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log.close()
+            self._synced = self._written
+            self._sealed.append(self._log_path)
+            self._open_segment()
+        sealed, self._sealed = self._sealed, []
+        return sealed
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Ballot buffer flush thread error.")
+
+
+def _segment_owner(path):
+    # ballots-<owner>-<index>.log, or ...log.replay-<owner> once claimed.
+    name = os.path.basename(path)
+    if ".replay-" in name:
+        return name.split(".replay-", 1)[1] or None
+    stem = name[len("ballots-") :].split(".log")[0]
+    owner, _, index = stem.rpartition("-")
+    return owner if owner and index.isdigit() else None
+
+
+def _read_segment(path):
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-append; nothing was acknowledged for it.
+                continue
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+ballot_buffer = BallotBuffer()
@@ -0,0 +1,273 @@
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import (
+    BallotSubmission,
+    CandidateVote,
+    CumulativeVote,
+    Motion,
+    PreferenceVote,
+    ScoreVote,
+    YesNoVote,
+)
+from app.services.ballot_audit import ballot_audit
+from app.services.live_irv import live_irv
+from app.services.packed_ballots import ballot_store
+from app.services.sqlite_profile import single_writer
+
+MAX_SUBMIT_ATTEMPTS = 5
+
+# Motion type -> (vote model, column holding the per-option value).
+BALLOT_MODELS = {
+    "YES_NO": (YesNoVote, None),
+    "FPTP": (CandidateVote, None),
+    "PREFERENCE": (PreferenceVote, "preference_rank"),
+    "SCORE": (ScoreVote, "score"),
+    "CUMULATIVE": (CumulativeVote, "points"),
+}
+
+
+class BallotError(ValueError):
+    def __init__(self, message, values=None):
+        super().__init__(message)
+        self.message = message
+        self.values = values or {}
+
+
+def ballot_model_for(motion_type):
+    return BALLOT_MODELS.get(motion_type, BALLOT_MODELS["YES_NO"])
+
+
+def vote_rows_select(motion_type, motion_id):
+    """Core select of ``(voter_id, option_id, value)`` vote rows for one motion.
+
+    Ordered by voter, then by rank for preference motions and by row id
+    otherwise; ``value`` is NULL for single-choice motions.
+    """
+    vote_model, value_field = ballot_model_for(motion_type)
+    value_column = getattr(vote_model, value_field) if value_field else db.literal(None)
+    order = value_column if motion_type == "PREFERENCE" else vote_model.id
+    return (
+        db.select(vote_model.voter_id, vote_model.option_id, value_column)
+        .where(vote_model.motion_id == motion_id)
+        .order_by(vote_model.voter_id, order)
+    )
+
+
+def parse_ballot(motion, form):
+    """Validate submitted fields for ``motion`` into ``[(option_id, value), ...]``.
+
+    ``form`` is any mapping using the vote form's field names (``option``,
+    ``opt_<id>_rank``, ``opt_<id>_score``, ``opt_<id>_points``).  Single-choice
+    motions yield at most one pair with a ``None`` value.
+    """
+    if motion.type == "PREFERENCE":
+        return _parse_preference(motion, form)
+    if motion.type == "SCORE":
+        return _parse_score(motion, form)
+    if motion.type == "CUMULATIVE":
+        return _parse_cumulative(motion, form)
+    return _parse_single_choice(motion, form)
+
+
+def _parse_preference(motion, form):
+    ranks = []
+    for option in motion.options:
+        value = form.get(f"opt_{option.id}_rank")
+        if not value:
+            continue
+        try:
+            rank = int(value)
+        except (TypeError, ValueError):
+            continue
+        if rank <= 0:
+            continue
+        ranks.append((option.id, rank))
+    return ranks
+
+
+def _parse_score(motion, form):
+    scores = []
+    for option in motion.options:
+        value = form.get(f"opt_{option.id}_score")
+        if value is None or value == "":
+            continue
+        try:
+            score_value = round(float(value), 1)
+        except (TypeError, ValueError):
+            continue
+        if score_value < 0:
+            continue
+        if motion.score_max is not None and score_value > motion.score_max:
+            score_value = float(motion.score_max)
+        scores.append((option.id, score_value))
+    return scores
+
+
+def _parse_cumulative(motion, form):
+    budget = motion.budget_points
+    if budget is None:
+        raise BallotError("Budget is not set for this motion.")
+
+    total_points = 0.0
+    values = {}
+    for option in motion.options:
+        raw_value = form.get(f"opt_{option.id}_points")
+        if raw_value is None or raw_value == "":
+            points_value = 0.0
+        else:
+            try:
+                points_value = float(raw_value)
+            except (TypeError, ValueError):
+                points_value = 0.0
+        values[option.id] = points_value
+        if points_value < 0:
+            raise BallotError("Points cannot be negative.", values)
+        total_points += points_value
+
+    if abs(total_points - float(budget)) > 1e-6:
+        raise BallotError(
+            f"You must allocate exactly {budget} points.\nCurrent total: {total_points}.",
+            values,
+        )
+
+    return [(option.id, values.get(option.id, 0.0)) for option in motion.options]
+
+
+def _parse_single_choice(motion, form):
+    selected_option_id = form.get("option")
+    if not selected_option_id:
+        return []
+    try:
+        option_id = int(selected_option_id)
+    except (TypeError, ValueError):
+        return []
+    if option_id not in {option.id for option in motion.options}:
+        raise BallotError("The selected option does not belong to this motion.")
+    return [(option_id, None)]
+
+
+def bump_vote_version(*motion_ids):
+    """Invalidate cached results for ``motion_ids``; the caller commits."""
+    if not motion_ids:
+        return
+    Motion.query.filter(Motion.id.in_(motion_ids)).update(
+        {Motion.vote_version: Motion.vote_version + 1}, synchronize_session=False
+    )
+
+
+def store_ballot(voter_id, motion, choices, bump_version=True):
+    """Replace the voter's ballot on ``motion`` with ``choices``; the caller commits.
+
+    Pass ``bump_version=False`` when storing many ballots and call
+    ``bump_vote_version`` once for the affected motions instead.
+    """
+    vote_model, value_field = ballot_model_for(motion.type)
+
+    if value_field is None:
+        if not choices:
+            return
+        if bump_version:
+            bump_vote_version(motion.id)
+        option_id = choices[0][0]
+        updated = vote_model.query.filter_by(
+            voter_id=voter_id, motion_id=motion.id
+        ).update({"option_id": option_id}, synchronize_session=False)
+        if not updated:
+            db.session.add(
+                vote_model(voter_id=voter_id, motion_id=motion.id, option_id=option_id)
+            )
+        ballot_store.write(voter_id, motion, choices[:1])
+        ballot_audit.append(voter_id, motion, choices[:1], replaced=bool(updated))
+        return
+
+    if bump_version:
+        bump_vote_version(motion.id)
+    replaced = vote_model.query.filter_by(voter_id=voter_id, motion_id=motion.id).delete(
+        synchronize_session=False
+    )
+    for option_id, value in choices:
+        db.session.add(
+            vote_model(
+                voter_id=voter_id,
+                motion_id=motion.id,
+                option_id=option_id,
+                **{value_field: value},
+            )
+        )
+    ballot_store.write(voter_id, motion, choices)
+    if choices or replaced:
+        ballot_audit.append(voter_id, motion, choices, replaced=bool(replaced))
+    if motion.type == "PREFERENCE":
+        live_irv.record(voter_id, motion, choices, bumped=bump_version)
+
+
+def submit_ballot(voter_id, motion, choices, idempotency_key=None):
+    """Store and commit a ballot, retrying when a concurrent submission conflicts.
+
+    The vote tables carry unique ``(voter_id, motion_id[, option_id])`` keys, so
+    a racing duplicate fails its flush instead of adding rows; the retry then
+    replaces whatever the winner wrote.  A repeated ``idempotency_key`` is
+    acknowledged without touching the ballot and returns ``False``.  On SQLite
+    the ballot is committed by the single writer, batched with others.
+    """
+    if single_writer.enabled:
+        # End this session's transaction so it cannot hold up the writer.
+        db.session.commit()
+        return single_writer.call(
+            _store_submission, voter_id, motion.id, choices, idempotency_key
+        )
+
+    for attempt in range(1, MAX_SUBMIT_ATTEMPTS + 1):
+        try:
+            if idempotency_key:
+                db.session.add(
+                    BallotSubmission(
+                        idempotency_key=idempotency_key,
+                        voter_id=voter_id,
+                        motion_id=motion.id,
+                    )
+                )
+            store_ballot(voter_id, motion, choices)
+            db.session.commit()
+            return True
+        except IntegrityError as error:
+            db.session.rollback()
+            if not _is_unique_violation(error):
+                raise
+            if idempotency_key and BallotSubmission.query.filter_by(
+                idempotency_key=idempotency_key
+            ).first():
+                return False
+            if attempt == MAX_SUBMIT_ATTEMPTS:
+                raise
+    return False
+
+
+def _is_unique_violation(error):
+    # Only a racing duplicate is worth retrying; a foreign key or NOT NULL
+    # failure would fail the same way every time.
+    orig = error.orig
+    code = getattr(orig, "args", (None,))[0] if getattr(orig, "args", None) else None
+    return (
+        "UNIQUE constraint failed" in str(orig)  # SQLite
+        or code == 1062  # MySQL: duplicate entry
+        or getattr(orig, "pgcode", None) == "23505"  # PostgreSQL: unique_violation
+    )
+
+
+def _store_submission(voter_id, motion_id, choices, idempotency_key):
+    # Runs on the single writer, which already holds SQLite's write lock, so
+    # the idempotency check cannot race another submission.
+    if idempotency_key and BallotSubmission.query.filter_by(
+        idempotency_key=idempotency_key
+    ).first():
+        return False
+    if idempotency_key:
+        db.session.add(
+            BallotSubmission(
+                idempotency_key=idempotency_key, voter_id=voter_id, motion_id=motion_id
+            )
+        )
+    store_ballot(voter_id, db.session.get(Motion, motion_id), choices)
+    return True
@@ -0,0 +1,183 @@
+import re
+import time
+import zlib
+
+from flask import request
+
+from app.services.metrics import metrics
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+# Compressed output of a streamed body is pushed to the client once this much
+# input has accumulated, so tiny template chunks do not each cost a flush.
+STREAM_FLUSH_BYTES = 8192
+
+_PRESERVED = re.compile(
+    r"<(pre|textarea|script)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+_INDENTED_LINES = re.compile(r"[ \t]*\n\s*")
+
+
+def minify_html(html):
+    """Drop indentation, trailing spaces and blank lines outside ``pre``,
+    ``textarea`` and ``script`` elements; one newline is kept where there was
+    whitespace, so inline elements keep their spacing.
+    """
+    parts = []
+    position = 0
+    for match in _PRESERVED.finditer(html):
+        parts.append(_INDENTED_LINES.sub("\n", html[position : match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_INDENTED_LINES.sub("\n", html[position:]))
+    return "".join(parts)
+
+
+class ResponseCompressor:
+    """Compresses text responses as they leave the app.
+
+    Brotli is preferred when the ``brotli`` package is installed and the client
+    accepts it, then gzip.  Buffered bodies under ``COMPRESSION_MIN_SIZE``
+    bytes go out as they are; streamed bodies are compressed chunk by chunk.
+    Responses that already carry a ``Content-Encoding`` (the precompressed
+    static files) or come from ``send_file`` are left alone.  With
+    ``MINIFY_HTML`` rendered pages also lose their template indentation.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.minify = False
+        self._brotli = None
+
+    def init_app(self, app):
+        self.enabled = app.config["COMPRESSION_ENABLED"]
+        self.min_size = app.config["COMPRESSION_MIN_SIZE"]
+        self.gzip_level = app.config["COMPRESSION_GZIP_LEVEL"]
+        self.brotli_quality = app.config["COMPRESSION_BROTLI_QUALITY"]
+        self.minify = app.config["MINIFY_HTML"]
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        self._brotli = brotli
+        app.after_request(self.process_response)
+
+    def process_response(self, response):
+        if response.direct_passthrough or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        if self.minify and response.mimetype == "text/html" and not response.is_streamed:
+            data = response.get_data()
+            minified = minify_html(data.decode("utf-8")).encode("utf-8")
+            metrics.increment("compression.minified_bytes_saved", len(data) - len(minified))
+            response.set_data(minified)
+        if (
+            not self.enabled
+            or "Content-Encoding" in response.headers
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = self._negotiate()
+        if encoding is None:
+            return response
+
+        started = time.perf_counter()
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+            metrics.increment("compression.streamed")
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            compressor = self._compressor(encoding)
+            compressed = compressor.compress(data) + compressor.finish()
+            response.set_data(compressed)
+            metrics.increment("compression.bytes_in", len(data))
+            metrics.increment("compression.bytes_out", len(compressed))
+        metrics.increment("compression.ms", (time.perf_counter() - started) * 1000)
+        metrics.increment(f"compression.{encoding}")
+
+        response.headers["Content-Encoding"] = encoding
+        # The compressed bytes differ from the identity body; keep conditional
+        # requests working by matching on the weak tag.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _negotiate(self):
+        accepted = request.accept_encodings
+        if self._brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding):
+        if encoding == "br":
+            return _BrotliCompressor(self._brotli, self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    def _compress_stream(self, chunks, encoding):
+        compressor = self._compressor(encoding)
+        pending = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                output = compressor.compress(chunk)
+                pending += len(chunk)
+                if pending >= STREAM_FLUSH_BYTES:
+                    output += compressor.flush()
+                    pending = 0
+                if output:
+                    yield output
+            yield compressor.finish()
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, brotli, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+response_compressor = ResponseCompressor()
@@ -0,0 +1,224 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import InvitationJob, Meeting, Voter
+from app.services.mail import mailer
+from app.services.metrics import metrics
+
+ACTIVE_STATUSES = ("PENDING", "RUNNING")
+
+
+class InvitationInProgress(RuntimeError):
+    pass
+
+
+class InvitationDispatcher:
+    """Emails every voter with an address their join link and code.
+
+    A job walks the meeting's voters in ``id`` order, ``INVITATION_BATCH_SIZE``
+    rows at a time, sending over one SMTP session at no more than
+    ``INVITATION_RATE_PER_SEC`` messages per second.  Progress and the last
+    voter id handled are committed after every batch (and when the job fails),
+    so a failed or abandoned job resumes where it stopped; at most one batch is
+    re-sent if the process dies mid-batch.
+    """
+
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config["INVITATION_BATCH_SIZE"]
+        self.rate_per_sec = app.config["INVITATION_RATE_PER_SEC"]
+        self.stale_after = timedelta(seconds=app.config["INVITATION_STALE_SECONDS"])
+        self.max_retries = app.config["MAIL_MAX_RETRIES"]
+        self.retry_backoff = app.config["MAIL_RETRY_BACKOFF_SECONDS"]
+
+    def start(self, meeting_id, link_template):
+        latest = self.latest(meeting_id)
+        if latest is not None and self.is_running(latest):
+            raise InvitationInProgress("Invitations are already being sent.")
+
+        total = (
+            db.session.query(db.func.count(Voter.id))
+            .filter(Voter.meeting_id == meeting_id, _has_email())
+            .scalar()
+        )
+        job = InvitationJob(
+            meeting_id=meeting_id, link_template=link_template, total=total
+        )
+        db.session.add(job)
+        db.session.commit()
+        self._spawn(job.id)
+        return job
+
+    def resume(self, job):
+        if job.status == "DONE":
+            return job
+        if self.is_running(job):
+            raise InvitationInProgress("Invitations are already being sent.")
+        job.status = "PENDING"
+        job.error = None
+        job.updated_at = datetime.utcnow()
+        db.session.commit()
+        self._spawn(job.id)
+        return job
+
+    def latest(self, meeting_id):
+        return (
+            InvitationJob.query.filter_by(meeting_id=meeting_id)
+            .order_by(InvitationJob.id.desc())
+            .first()
+        )
+
+    def is_running(self, job):
+        return (
+            job.status in ACTIVE_STATUSES
+            and datetime.utcnow() - job.updated_at < self.stale_after
+        )
+
+    def _spawn(self, job_id):
+        thread = threading.Thread(
+            target=self._run, args=(job_id,), name=f"invitations-{job_id}", daemon=True
+        )
+        thread.start()
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            job = db.session.get(InvitationJob, job_id)
+            try:
+                self._process(job)
+            except Exception as error:
+                self.app.logger.exception("Invitation job %s failed.", job_id)
+                db.session.rollback()
+                job = db.session.get(InvitationJob, job_id)
+                job.status = "FAILED"
+                job.error = str(error)[:1000]
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
+            finally:
+                db.session.remove()
+
+    def _process(self, job):
+        meeting_title = (
+            db.session.query(Meeting.title).filter_by(id=job.meeting_id).scalar()
+        )
+        job.status = "RUNNING"
+        job.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        interval = 1.0 / self.rate_per_sec if self.rate_per_sec > 0 else 0.0
+        next_send_at = time.monotonic()
+        connection = None
+        try:
+            while True:
+                batch = (
+                    db.session.query(Voter.id, Voter.name, Voter.code, Voter.email)
+                    .filter(
+                        Voter.meeting_id == job.meeting_id,
+                        Voter.id > job.last_voter_id,
+                        _has_email(),
+                    )
+                    .order_by(Voter.id)
+                    .limit(self.batch_size)
+                    .all()
+                )
+                if not batch:
+                    break
+
+                for voter_id, name, code, address in batch:
+                    delay = next_send_at - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_send_at = max(next_send_at, time.monotonic()) + interval
+
+                    message = self._build_message(
+                        meeting_title, name, code, address, job.link_template
+                    )
+                    connection, delivered = self._send(connection, message)
+                    if delivered:
+                        job.sent += 1
+                        metrics.increment("invitations.sent")
+                    else:
+                        job.failed += 1
+                        metrics.increment("invitations.failed")
+                    job.last_voter_id = voter_id
+
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
+        except Exception:
+            # Keep what was sent before the failure so a resume does not repeat it.
+            job.updated_at = datetime.utcnow()
+            db.session.commit()
+            raise
+        finally:
+            if connection is not None:
+                _quit_quietly(connection)
+
+        job.status = "DONE"
+        job.updated_at = datetime.utcnow()
+        db.session.commit()
+
+    def _send(self, connection, message):
+        """Send over ``connection``, reconnecting on transient errors.
+
+        Returns ``(connection, delivered)``; a permanently rejected recipient is
+        reported as not delivered, and exhausting the retries raises.
+        """
+        import smtplib
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 1:
+                time.sleep(min(self.retry_backoff * 2 ** (attempt - 2), 60.0))
+            try:
+                if connection is None:
+                    connection = mailer.open_connection()
+                connection.send_message(message)
+                return connection, True
+            except smtplib.SMTPRecipientsRefused:
+                return connection, False
+            except smtplib.SMTPResponseException as error:
+                if not 400 <= error.smtp_code < 500:
+                    return connection, False
+                failure = error
+            except (smtplib.SMTPServerDisconnected, OSError) as error:
+                failure = error
+            if connection is not None:
+                _quit_quietly(connection)
+                connection = None
+        raise failure
+
+    def _build_message(self, meeting_title, name, code, address, link_template):
+        from email.message import EmailMessage
+
+        link = link_template.replace("{code}", code)
+        message = EmailMessage()
+        message["Subject"] = f"Your voting code for {meeting_title}"
+        message["From"] = mailer.default_sender
+        message["To"] = address
+        message.set_content(
+            f"Hello {name},\n\n"
+            f"You have been invited to vote in {meeting_title}.\n\n"
+            f"Join here: {link}\n"
+            f"Your voter code: {code}\n\n"
+            "Keep this code private; anyone with it can vote on your behalf."
+        )
+        return message
+
+
+def _has_email():
+    return db.and_(Voter.email.isnot(None), Voter.email != "")
+
+
+def _quit_quietly(connection):
+    import smtplib
+
+    try:
+        connection.quit()
+    except (smtplib.SMTPException, OSError):
+        connection.close()
+
+
+invitation_dispatcher = InvitationDispatcher()
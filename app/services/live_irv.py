@@ -0,0 +1,158 @@
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Motion
+from app.services.metrics import metrics
+
+# Session.info key: preference ballots stored in the session's open transaction.
+_PENDING_KEY = "live_irv_pending"
+
+
+class _LiveCount:
+    __slots__ = ("version", "count")
+
+    def __init__(self, version, count):
+        self.version = version
+        self.count = count
+
+
+class LiveIrvCounts:
+    """Provisional results of open preference motions, updated as ballots arrive.
+
+    Keeps a per-process LRU of ``IncrementalIrv`` counts by motion id, each
+    tagged with the ``vote_version`` it reflects.  ``store_ballot`` records
+    each preference ballot in the session; once the transaction commits the
+    ballot is applied to the motion's count and the version it bumped is
+    added, so a count stays current through this process's own ballots.  A
+    version the count cannot account for (a ballot stored by another process,
+    a batch from the ballot buffer, a deleted voter, edited options) makes the
+    next read rebuild it from the ballots.
+    """
+
+    def __init__(self):
+        self.max_entries = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def init_app(self, app):
+        self.max_entries = app.config["LIVE_IRV_CACHE_SIZE"]
+        metrics.register_gauge("live_irv.entries", lambda: len(self._entries))
+        for name, listener in (
+            ("after_commit", _apply_committed),
+            ("after_soft_rollback", _forget_rolled_back),
+            ("after_transaction_end", _forget_ended),
+        ):
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+
+    def tracks(self, motion):
+        return (
+            self.max_entries > 0
+            and isinstance(motion, Motion)
+            and motion.type == "PREFERENCE"
+            and motion.status == "OPEN"
+        )
+
+    def tally(self, motion):
+        """Sequential IRV result of ``motion``, from the live count while it is open."""
+        from app.services.voting.preference import tally_preference_sequential_irv
+
+        if not self.tracks(motion):
+            return tally_preference_sequential_irv(motion)
+        entry = self._entry(motion)
+        with self._lock:
+            return entry.count.result()
+
+    def provisional(self, motion):
+        """Winners so far and the latest round counts of ``motion``'s live count."""
+        entry = self._entry(motion)
+        with self._lock:
+            return entry.count.provisional()
+
+    def record(self, voter_id, motion, choices, bumped=True):
+        """Note a preference ballot stored in the current transaction; the caller commits."""
+        if motion.id not in self._entries:
+            return
+        session = db.session()
+        transaction = session.get_nested_transaction() or session.get_transaction()
+        ranking = [option_id for option_id, _ in sorted(choices, key=lambda choice: choice[1])]
+        session.info.setdefault(_PENDING_KEY, []).append(
+            (transaction, motion.id, voter_id, ranking, bumped)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, motion):
+        # The engines import the ballot readers, which import ``store_ballot``.
+        from app.services.voting.preference import IncrementalIrv
+        from app.services.voting.source import OptionRow, voter_rankings
+
+        with self._lock:
+            entry = self._entries.get(motion.id)
+            if entry is not None and entry.version == motion.vote_version:
+                self._entries.move_to_end(motion.id)
+                metrics.increment("live_irv.hits")
+                return entry
+
+        metrics.increment("live_irv.rebuilds")
+        count = IncrementalIrv(
+            dict(voter_rankings(motion)),
+            {option.id: OptionRow(option.id, option.text) for option in motion.options},
+            motion.num_winners,
+        )
+        entry = _LiveCount(motion.vote_version, count)
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[motion.id] = entry
+                self._entries.move_to_end(motion.id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def _apply(self, changes):
+        with self._lock:
+            for _, motion_id, voter_id, ranking, bumped in changes:
+                entry = self._entries.get(motion_id)
+                if entry is None:
+                    continue
+                entry.count.replace(voter_id, ranking)
+                entry.version += bumped
+                metrics.increment("live_irv.updates")
+
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+def _apply_committed(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        live_irv._apply(changes)
+
+
+def _forget_rolled_back(session, previous_transaction):
+    # A rolled back savepoint only undoes the ballots stored inside it.
+    changes = session.info.get(_PENDING_KEY)
+    if changes:
+        changes[:] = [
+            change for change in changes if not _within(change[0], previous_transaction)
+        ]
+
+
+def _forget_ended(session, transaction):
+    # Committed changes are already applied; whatever is left never committed.
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+live_irv = LiveIrvCounts()
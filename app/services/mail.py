@@ -0,0 +1,229 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from app.services.metrics import metrics
+
+
+class MailQueueFull(RuntimeError):
+    pass
+
+
+class Mailer:
+    """Outbound mail sent from a background thread over one reused SMTP session.
+
+    ``send`` only enqueues, so request threads never wait on the SMTP server.
+    The sender keeps a single authenticated connection open between messages,
+    closes it after ``MAIL_IDLE_TIMEOUT`` seconds without mail, and reconnects
+    with exponential backoff when the server drops it.  ``MAIL_BACKEND`` can be
+    ``console`` (log messages) or ``memory`` (keep them in ``outbox``) for local
+    debugging, and ``MAIL_ASYNC=false`` sends inline on a fresh connection.
+    smtplib is only imported once mail is actually sent.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.backend = "smtp"
+        self.outbox = []
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._connection = None
+        self._last_used = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self.backend = app.config["MAIL_BACKEND"]
+        self.async_enabled = app.config["MAIL_ASYNC"]
+        self.queue_size = app.config["MAIL_QUEUE_SIZE"]
+        self.max_retries = app.config["MAIL_MAX_RETRIES"]
+        self.retry_backoff = app.config["MAIL_RETRY_BACKOFF_SECONDS"]
+        self.idle_timeout = app.config["MAIL_IDLE_TIMEOUT"]
+        self.server = app.config["MAIL_SERVER"]
+        self.port = app.config["MAIL_PORT"]
+        self.use_tls = app.config["MAIL_USE_TLS"]
+        self.username = app.config["MAIL_USERNAME"]
+        self.password = app.config["MAIL_PASSWORD"]
+        self.default_sender = app.config["MAIL_DEFAULT_SENDER"]
+        metrics.register_gauge("mail.queued", self.pending)
+
+    @property
+    def configured(self):
+        return self.backend != "smtp" or bool(self.username and self.password)
+
+    def send(self, message):
+        """Queue ``message`` for delivery; raises ``MailQueueFull`` under backlog."""
+        if not message["From"]:
+            del message["From"]
+            message["From"] = self.default_sender
+        if not self.async_enabled:
+            self._deliver(message, reuse_connection=False)
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            metrics.increment("mail.rejected")
+            raise MailQueueFull("Outbound mail queue is full.") from None
+        metrics.increment("mail.queued_total")
+
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def join(self, timeout=None):
+        """Wait until queued mail has been handed to the backend (or given up)."""
+        if self._queue is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout=5.0):
+        if self._pid != os.getpid():
+            return
+        self.join(timeout)
+        self._disconnect()
+
+    def open_connection(self):
+        """Open a session for callers that send many messages themselves.
+
+        Returns an authenticated ``smtplib.SMTP`` for the smtp backend, or an
+        object with the same ``send_message``/``quit`` surface for local ones.
+        """
+        if self.backend != "smtp":
+            return _LocalConnection(self)
+
+        import smtplib
+
+        connection = smtplib.SMTP(self.server, self.port, timeout=30)
+        try:
+            if self.use_tls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        metrics.increment("mail.connections")
+        return connection
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._connection = None
+            thread = threading.Thread(target=self._run, name="mailer", daemon=True)
+            thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            try:
+                message = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if (
+                    self._connection is not None
+                    and time.monotonic() - self._last_used > self.idle_timeout
+                ):
+                    self._disconnect()
+                continue
+
+            try:
+                self._deliver_with_retry(message)
+            except Exception:
+                self.app.logger.exception("Mail sender thread error.")
+            finally:
+                self._queue.task_done()
+
+    def _deliver_with_retry(self, message):
+        import smtplib
+
+        attempt = 0
+        while True:
+            try:
+                self._deliver(message, reuse_connection=True)
+                return
+            except smtplib.SMTPResponseException as error:
+                # 4xx replies are temporary; 5xx means the message will never go.
+                if not 400 <= error.smtp_code < 500:
+                    self._give_up(message, error)
+                    return
+                failure = error
+            except (smtplib.SMTPServerDisconnected, OSError) as error:
+                failure = error
+            except smtplib.SMTPException as error:
+                self._give_up(message, error)
+                return
+
+            self._disconnect()
+            attempt += 1
+            if attempt > self.max_retries:
+                self._give_up(message, failure)
+                return
+            metrics.increment("mail.retries")
+            # The first retry is immediate: usually the server just closed an idle session.
+            if attempt > 1:
+                time.sleep(min(self.retry_backoff * 2 ** (attempt - 2), 60.0))
+
+    def _give_up(self, message, error):
+        metrics.increment("mail.failed")
+        self.app.logger.error("Could not deliver mail to %s: %s", message["To"], error)
+
+    def _deliver(self, message, reuse_connection):
+        if not reuse_connection:
+            with self.open_connection() as connection:
+                connection.send_message(message)
+        else:
+            if self._connection is None:
+                self._connection = self.open_connection()
+            self._connection.send_message(message)
+            self._last_used = time.monotonic()
+        metrics.increment("mail.sent")
+
+    def _disconnect(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        import smtplib
+
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+
+class _LocalConnection:
+    def __init__(self, mailer):
+        self.mailer = mailer
+
+    def send_message(self, message):
+        if self.mailer.backend == "memory":
+            self.mailer.outbox.append(message)
+        else:
+            self.mailer.app.logger.info("Outbound mail:\n%s", message.as_string())
+        return {}
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+mailer = Mailer()
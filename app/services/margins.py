@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+from app.extensions import db
+from app.models import Motion
+from app.services.metrics import metrics
+
+
+class MarginAnalyses:
+    """Margin-of-victory analyses of preference motions, computed off-request.
+
+    Results are kept in a per-process LRU keyed by ``(motion.id,
+    motion.vote_version)``, like ``results_cache``.  A miss starts the search
+    on a background thread and the caller answers "pending"; at most
+    ``MARGIN_MAX_CONCURRENT`` searches run at once per process (each may use
+    ``MARGIN_WORKERS`` processes), and one motion is never searched twice at
+    the same time.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.max_entries = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._running = set()
+        self._slots = None
+
+    def init_app(self, app):
+        self.app = app
+        # Pollers wait for the cached result, so there is always room for one.
+        self.max_entries = max(1, app.config["MARGIN_CACHE_SIZE"])
+        self.time_budget = app.config["MARGIN_TIME_BUDGET_SECONDS"]
+        self.workers = app.config["MARGIN_WORKERS"]
+        self._slots = threading.BoundedSemaphore(max(1, app.config["MARGIN_MAX_CONCURRENT"]))
+        metrics.register_gauge("margins.entries", lambda: len(self._entries))
+        metrics.register_gauge("margins.running", lambda: len(self._running))
+
+    def analysis(self, motion):
+        """``("done", analysis)``, ``("pending", None)`` or ``("busy", None)`` for ``motion``."""
+        key = (motion.id, motion.vote_version)
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+                metrics.increment("margins.hits")
+                return "done", analysis
+            if motion.id in self._running:
+                return "pending", None
+            if not self._slots.acquire(blocking=False):
+                metrics.increment("margins.busy")
+                return "busy", None
+            self._running.add(motion.id)
+
+        metrics.increment("margins.misses")
+        thread = threading.Thread(
+            target=self._run, args=(motion.id,), name=f"margin-{motion.id}", daemon=True
+        )
+        thread.start()
+        return "pending", None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _run(self, motion_id):
+        # Imported on first use: the margin search brings the engines and a process pool.
+        from app.services.voting.margin import analyse_preference_margins
+
+        try:
+            with self.app.app_context():
+                motion = db.session.get(Motion, motion_id)
+                # Keyed by the version the ballots were read at, which may be
+                # newer than the one the request saw.
+                key = (motion.id, motion.vote_version)
+                analysis = analyse_preference_margins(
+                    motion, time_budget=self.time_budget, workers=self.workers
+                )
+            with self._lock:
+                self._entries[key] = analysis
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        except Exception:
+            self.app.logger.exception("Margin analysis of motion %s failed.", motion_id)
+        finally:
+            with self._lock:
+                self._running.discard(motion_id)
+            self._slots.release()
+
+
+margin_analyses = MarginAnalyses()
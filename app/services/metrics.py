@@ -0,0 +1,30 @@
+import threading
+
+
+class Metrics:
+    """Process-local counters plus named gauge callbacks, exposed at /admin/metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def register_gauge(self, name, callback):
+        self._gauges[name] = callback
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def snapshot(self):
+        data = self.counters()
+        for name, callback in self._gauges.items():
+            data[name] = callback()
+        return data
+
+
+metrics = Metrics()
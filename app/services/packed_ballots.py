@@ -0,0 +1,147 @@
+import struct
+import sys
+from array import array
+
+from app.extensions import db
+from app.models import PackedBallot
+from app.services.metrics import metrics
+
+STORE_MODES = ("rows", "dual", "packed")
+
+FORMAT_VERSION = 1
+# version, value kind, choice count
+HEADER = struct.Struct("<BBH")
+
+# Value kind -> array typecode of the per-choice values (None: ids only).
+VALUE_NONE = 0
+VALUE_RANK = 1
+VALUE_FLOAT = 2
+VALUE_TYPECODES = {VALUE_NONE: None, VALUE_RANK: "I", VALUE_FLOAT: "d"}
+
+# Motion type -> value kind stored for it.
+VALUE_KINDS = {
+    "YES_NO": VALUE_NONE,
+    "FPTP": VALUE_NONE,
+    "PREFERENCE": VALUE_RANK,
+    "SCORE": VALUE_FLOAT,
+    "CUMULATIVE": VALUE_FLOAT,
+}
+
+_SWAP = sys.byteorder != "little"
+
+
+def encode_ballot(motion_type, choices):
+    """Pack ``[(option_id, value), ...]`` into bytes.
+
+    Layout: a 4-byte header, the option ids as little-endian uint32, then (for
+    ranked and scored motions) one uint32 rank or float64 value per id.
+    Preference choices are stored in rank order, so a decoded ballot is already
+    the voter's ranking.
+    """
+    kind = VALUE_KINDS.get(motion_type, VALUE_NONE)
+    if kind == VALUE_RANK:
+        choices = sorted(choices, key=lambda choice: choice[1])
+    ids = array("I", (option_id for option_id, _ in choices))
+    parts = [HEADER.pack(FORMAT_VERSION, kind, len(ids)), ids]
+    typecode = VALUE_TYPECODES[kind]
+    if typecode is not None:
+        parts.append(array(typecode, (value for _, value in choices)))
+    if _SWAP:
+        for part in parts[1:]:
+            part.byteswap()
+    return b"".join(bytes(part) for part in parts)
+
+
+def decode_ballot(payload):
+    """Unpack ``payload`` into ``(option_ids, values)``; ``values`` is None for single-choice motions."""
+    version, kind, count = HEADER.unpack_from(payload)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported packed ballot version {version}.")
+    offset = HEADER.size
+    ids = array("I")
+    ids.frombytes(payload[offset : offset + count * ids.itemsize])
+    offset += count * ids.itemsize
+    values = None
+    typecode = VALUE_TYPECODES[kind]
+    if typecode is not None:
+        values = array(typecode)
+        values.frombytes(payload[offset : offset + count * values.itemsize])
+    if _SWAP:
+        ids.byteswap()
+        if values is not None:
+            values.byteswap()
+    return ids, values
+
+
+class BallotStore:
+    """Keeps a packed copy of each ballot, one row per ``(motion_id, voter_id)``.
+
+    ``BALLOT_STORE`` picks the phase of the move away from the per-option vote
+    tables: ``rows`` only writes the old tables, ``dual`` writes both and still
+    tallies from rows, and ``packed`` writes both and tallies from the packed
+    rows.  Backfill existing ballots with ``flask ballots pack`` before
+    switching to ``packed``.
+    """
+
+    def __init__(self):
+        self.mode = "rows"
+
+    def init_app(self, app):
+        mode = app.config["BALLOT_STORE"]
+        if mode not in STORE_MODES:
+            raise ValueError(f"BALLOT_STORE must be one of {', '.join(STORE_MODES)}.")
+        self.mode = mode
+
+    @property
+    def writes_packed(self):
+        return self.mode != "rows"
+
+    @property
+    def reads_packed(self):
+        return self.mode == "packed"
+
+    def write(self, voter_id, motion, choices):
+        """Replace the packed ballot; empty ``choices`` remove it.  The caller commits."""
+        if not self.writes_packed:
+            return
+        if not choices:
+            PackedBallot.query.filter_by(motion_id=motion.id, voter_id=voter_id).delete(
+                synchronize_session=False
+            )
+            return
+        payload = encode_ballot(motion.type, choices)
+        updated = PackedBallot.query.filter_by(
+            motion_id=motion.id, voter_id=voter_id
+        ).update({"payload": payload}, synchronize_session=False)
+        if not updated:
+            db.session.add(
+                PackedBallot(motion_id=motion.id, voter_id=voter_id, payload=payload)
+            )
+        metrics.increment("ballot_store.packed_writes")
+
+    def delete_for_motions(self, motion_ids):
+        # Runs in every mode so rows left by an earlier dual/packed phase go too.
+        if motion_ids:
+            PackedBallot.query.filter(PackedBallot.motion_id.in_(motion_ids)).delete(
+                synchronize_session=False
+            )
+
+    def delete_for_voters(self, voter_ids):
+        if voter_ids:
+            PackedBallot.query.filter(PackedBallot.voter_id.in_(voter_ids)).delete(
+                synchronize_session=False
+            )
+
+    def ballots(self, motion_id):
+        """Yield ``(voter_id, option_ids, values)`` for each packed ballot on the motion."""
+        rows = (
+            db.session.query(PackedBallot.voter_id, PackedBallot.payload)
+            .filter(PackedBallot.motion_id == motion_id)
+            .yield_per(2000)
+        )
+        for voter_id, payload in rows:
+            ids, values = decode_ballot(payload)
+            yield voter_id, ids, values
+
+
+ballot_store = BallotStore()
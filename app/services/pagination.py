@@ -0,0 +1,46 @@
+import base64
+import json
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def keyset_after(columns, values, descending=False):
+    """Filter for rows strictly after ``values`` in ``columns`` order.
+
+    Expands the row comparison into ``a > x OR (a = x AND b > y) ...`` so
+    MySQL can still range-scan a composite index on the same columns.  A
+    ``None`` value only matches by equality (``IS NULL``); nullable columns
+    should follow an is-null flag key that orders the NULLs.
+    """
+    clauses = []
+    for index, column in enumerate(columns):
+        if values[index] is None:
+            continue
+        later = column < values[index] if descending else column > values[index]
+        equal_prefix = [columns[i] == values[i] for i in range(index)]
+        clauses.append(and_(*equal_prefix, later))
+    return or_(*clauses)
+
+
+def parse_limit(raw_value, default=50, maximum=200):
+    try:
+        limit = int(raw_value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(limit, 1), maximum)
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+from app.services.metrics import metrics
+
+
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+
+def normalize_method(method):
+    """Spell out Werkzeug's defaults so ``method`` matches stored hash prefixes.
+
+    ``"pbkdf2"`` becomes ``"pbkdf2:sha256:<DEFAULT_PBKDF2_ITERATIONS>"`` and
+    ``"scrypt"`` becomes ``"scrypt:32768:8:1"``.
+    """
+    name, *args = method.strip().split(":")
+    if name == "pbkdf2":
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes a hash name and an iteration count.")
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == "scrypt":
+        if args and len(args) != 3:
+            raise ValueError("'scrypt' takes n, r and p.")
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    raise ValueError(f"Unsupported password hash method {method!r}.")
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a small, bounded worker pool.
+
+    ``PASSWORD_HASH_METHOD`` takes Werkzeug's method syntax, e.g.
+    ``pbkdf2:sha256:600000`` or ``scrypt:32768:8:1``.  Hashes made with any
+    other method still verify, and ``needs_rehash`` tells the login view to
+    upgrade them.  hashlib releases the GIL while hashing, so the pool caps how
+    many cores sign-ins can occupy at once; callers beyond
+    ``PASSWORD_HASH_MAX_PENDING`` get ``PasswordHasherBusy`` instead of
+    queueing behind a burst.
+    """
+
+    def __init__(self):
+        self.method = normalize_method("pbkdf2:sha256")
+        self.workers = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._slots = None
+        self._pending = 0
+
+    def init_app(self, app):
+        self.method = normalize_method(app.config["PASSWORD_HASH_METHOD"])
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self.max_pending = app.config["PASSWORD_HASH_MAX_PENDING"]
+        self.timeout = app.config["PASSWORD_HASH_TIMEOUT_SECONDS"]
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        metrics.register_gauge("passwords.pending", lambda: self._pending)
+
+    def hash(self, password):
+        return self._call(generate_password_hash, password, method=self.method)
+
+    def verify(self, pwhash, password):
+        return self._call(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split("$", 1)[0] != self.method
+
+    def _call(self, func, *args, **kwargs):
+        if self.workers <= 0 or self._slots is None:
+            return self._timed(func, *args, **kwargs)
+
+        if not self._slots.acquire(blocking=False):
+            metrics.increment("passwords.rejected")
+            raise PasswordHasherBusy("Too many sign-ins in progress.")
+        try:
+            with self._lock:
+                self._pending += 1
+            future = self._ensure_executor().submit(self._timed, func, *args, **kwargs)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeout:
+                future.cancel()
+                metrics.increment("passwords.timeouts")
+                raise PasswordHasherBusy("Password check timed out.") from None
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def _timed(self, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.increment("passwords.hash_ms", (time.perf_counter() - started) * 1000)
+            metrics.increment("passwords.hashes")
+
+    def _ensure_executor(self):
+        if self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+                self._pid = os.getpid()
+        return self._executor
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, session
+
+from app.services.metrics import metrics
+from app.services.voter_codes import normalize_code, voter_code_index
+
+
+class MemoryBucketStore:
+    """Buckets in this process, least recently used first.
+
+    Each take moves its bucket to the end, so idle buckets collect at the
+    front and pruning only looks at those it removes.
+    """
+
+    MAX_KEYS = 100_000
+    IDLE_SECONDS = 300
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, capacity, refill_per_sec, now):
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, capacity, refill_per_sec, now)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            self._prune(now)
+            return allowed, tokens
+
+    def _prune(self, now):
+        # Buckets idle long enough to be full again carry no state worth keeping;
+        # past MAX_KEYS the least recently used go even if they are not.
+        while self._buckets:
+            _, updated_at = next(iter(self._buckets.values()))
+            if len(self._buckets) <= self.MAX_KEYS and now - updated_at <= self.IDLE_SECONDS:
+                break
+            self._buckets.popitem(last=False)
+
+
+class SQLiteBucketStore:
+    """Buckets in a local SQLite file so every worker on the host shares them."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key, capacity, refill_per_sec, now):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+            tokens = _refill(tokens, updated_at, capacity, refill_per_sec, now)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) "
+                "VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+
+def _refill(tokens, updated_at, capacity, refill_per_sec, now):
+    return min(capacity, tokens + max(0.0, now - updated_at) * refill_per_sec)
+
+
+class RateLimiter:
+    """Token buckets per client IP, per voter and per meeting, checked before any DB work.
+
+    Every request is charged to its client IP first, so guessed voter codes
+    are throttled before anything looks them up; behind a proxy,
+    ``TRUSTED_PROXY_COUNT`` makes the IP the client's rather than the proxy's.
+    A request for a voter code that the voter code filter already holds, or
+    carrying a voter session, is then charged to that voter too.  The filter
+    is only read, never rebuilt, to pick the bucket.  The meeting is only
+    known without a query once a voter has joined, so the meeting bucket
+    applies to requests carrying a voter session.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.store = None
+        self.limits = {}
+
+    def init_app(self, app):
+        self.enabled = app.config["RATE_LIMIT_ENABLED"]
+        storage = app.config["RATE_LIMIT_STORAGE"]
+        if storage.startswith("sqlite:///"):
+            self.store = SQLiteBucketStore(storage[len("sqlite:///"):])
+        else:
+            self.store = MemoryBucketStore()
+        self.limits = {
+            "ip": (
+                app.config["RATE_LIMIT_IP_CAPACITY"],
+                app.config["RATE_LIMIT_IP_REFILL_PER_SEC"],
+            ),
+            "voter": (
+                app.config["RATE_LIMIT_VOTER_CAPACITY"],
+                app.config["RATE_LIMIT_VOTER_REFILL_PER_SEC"],
+            ),
+            "meeting": (
+                app.config["RATE_LIMIT_MEETING_CAPACITY"],
+                app.config["RATE_LIMIT_MEETING_REFILL_PER_SEC"],
+            ),
+        }
+
+    def check(self, scope, key):
+        capacity, refill_per_sec = self.limits[scope]
+        allowed, tokens = self.store.take(
+            f"{scope}:{key}", capacity, refill_per_sec, time.time()
+        )
+        if allowed:
+            return True, 0
+        metrics.increment(f"rate_limit.rejected.{scope}")
+        retry_after = (1.0 - tokens) / refill_per_sec if refill_per_sec > 0 else 60
+        return False, max(1, int(retry_after + 0.999))
+
+    def voter(self):
+        """The voter code the current request acts for, or None."""
+        code = (request.view_args or {}).get("code")
+        if code and voter_code_index.known(code):
+            return normalize_code(code)
+        return session.get("voter_code")
+
+    def check_request(self):
+        allowed, retry_after = self.check("ip", request.remote_addr or "unknown")
+        voter = self.voter() if allowed else None
+        if voter:
+            allowed, retry_after = self.check("voter", voter)
+        if allowed and session.get("voter_meeting_id"):
+            allowed, retry_after = self.check("meeting", session["voter_meeting_id"])
+        return allowed, retry_after
+
+
+rate_limiter = RateLimiter()
+
+
+def rate_limited(as_json=False):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not rate_limiter.enabled:
+                return view(*args, **kwargs)
+
+            try:
+                allowed, retry_after = rate_limiter.check_request()
+            except sqlite3.Error:
+                current_app.logger.exception(
+                    "Rate limit store unavailable; allowing request."
+                )
+                allowed, retry_after = True, 0
+            if allowed:
+                return view(*args, **kwargs)
+
+            headers = {"Retry-After": str(retry_after)}
+            if as_json:
+                return {"ok": False, "error": "Too many requests."}, 429, headers
+            return (
+                "Too many requests. Please wait a moment and try again.",
+                429,
+                headers,
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,157 @@
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app.extensions import db
+from app.models import Meeting, Motion, Option
+from app.services.archive import MeetingArchive, archive_path, archive_store
+from app.services.ballots import vote_rows_select
+from app.services.results import RESULT_KEYS, serialize_result, tally_motion
+from app.services.voting.source import MotionSnapshot, OptionRow
+
+# Differences reported per motion; the count is always exact.
+MAX_DIFFERENCES = 20
+
+_worker_context = None
+
+
+def load_snapshot(connection, motion_id):
+    """Load ``motion_id`` and its ballots with Core queries on ``connection``.
+
+    Ballots come from the per-option vote rows, or from the archive file once
+    the meeting is archived; never from the packed ballots or the ORM, so the
+    recount does not share a read path with the results pages.  Returns None
+    if the motion does not exist.
+    """
+    row = connection.execute(
+        db.select(
+            Motion.id,
+            Motion.title,
+            Motion.type,
+            Motion.status,
+            Motion.num_winners,
+            Motion.approved_threshold_pct,
+            Meeting.id,
+            Meeting.archived_at,
+        )
+        .join(Meeting, Meeting.id == Motion.meeting_id)
+        .where(Motion.id == motion_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    *fields, meeting_id, archived_at = row
+    options = [
+        OptionRow(*option)
+        for option in connection.execute(
+            db.select(Option.id, Option.text)
+            .where(Option.motion_id == motion_id)
+            .order_by(Option.id)
+        )
+    ]
+
+    if archived_at is not None:
+        archive = MeetingArchive(archive_path(archive_store.directory, meeting_id))
+        try:
+            entries = list(archive.entries(motion_id)) if motion_id in archive.motions else []
+        finally:
+            archive.close()
+    else:
+        entries = connection.execute(vote_rows_select(row.type, motion_id)).all()
+    return MotionSnapshot(*fields, options=options, entries=entries)
+
+
+def differences(shown, recounted, path="result"):
+    """Yield ``(path, shown, recounted)`` wherever two serialized results disagree.
+
+    Floats are compared with a relative tolerance, since totals summed in a
+    different ballot order may differ in the last bits.
+    """
+    if isinstance(shown, dict) and isinstance(recounted, dict):
+        for key in sorted(shown.keys() | recounted.keys(), key=str):
+            yield from differences(shown.get(key), recounted.get(key), f"{path}.{key}")
+    elif isinstance(shown, list) and isinstance(recounted, list):
+        if len(shown) != len(recounted):
+            yield f"{path} (length)", len(shown), len(recounted)
+        for index, (left, right) in enumerate(zip(shown, recounted)):
+            yield from differences(left, right, f"{path}[{index}]")
+    elif isinstance(shown, float) or isinstance(recounted, float):
+        if not (
+            isinstance(shown, (int, float))
+            and isinstance(recounted, (int, float))
+            and math.isclose(shown, recounted, rel_tol=1e-9, abs_tol=1e-9)
+        ):
+            yield path, shown, recounted
+    elif shown != recounted:
+        yield path, shown, recounted
+
+
+def recount_motion(motion_id):
+    """Recount one motion and compare it with the result the results pages show.
+
+    Returns a small report: timings in milliseconds, the ballot count and up
+    to ``MAX_DIFFERENCES`` differences.  Needs an app context.
+    """
+    started = time.perf_counter()
+    with db.engine.connect() as connection:
+        snapshot = load_snapshot(connection, motion_id)
+    if snapshot is None:
+        return {"motion_id": motion_id, "missing": True}
+    loaded = time.perf_counter()
+
+    key = RESULT_KEYS.get(snapshot.type, "yes_no")
+    recounted = serialize_result(tally_motion(snapshot)[key])
+    counted = time.perf_counter()
+    try:
+        shown = serialize_result(tally_motion(db.session.get(Motion, motion_id))[key])
+    finally:
+        db.session.remove()
+    finished = time.perf_counter()
+
+    found = list(differences(shown, recounted))
+    return {
+        "motion_id": motion_id,
+        "title": snapshot.title,
+        "type": snapshot.type,
+        "ballots": len({entry[0] for entry in snapshot.entries}),
+        "load_ms": (loaded - started) * 1000,
+        "recount_ms": (counted - loaded) * 1000,
+        "shown_ms": (finished - counted) * 1000,
+        "difference_count": len(found),
+        "differences": found[:MAX_DIFFERENCES],
+    }
+
+
+def _init_worker():
+    # Each worker builds its own app, so no database connection crosses the fork.
+    global _worker_context
+    from app import create_app
+
+    _worker_context = create_app(with_migrations=False).app_context()
+    _worker_context.push()
+
+
+def recount_motions(motion_ids, workers):
+    """Yield ``recount_motion`` reports for ``motion_ids`` as they finish.
+
+    With more than one worker the motions are spread over a process pool.
+    At most two motions per worker are in flight and reports are yielded as
+    soon as they arrive, so memory stays flat however many motions are
+    recounted.  The pool workers read ``DATABASE_URL`` like the app does.
+    """
+    if workers <= 1:
+        for motion_id in motion_ids:
+            yield recount_motion(motion_id)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = set()
+        for motion_id in motion_ids:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(recount_motion, motion_id))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
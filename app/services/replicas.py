@@ -0,0 +1,207 @@
+import functools
+import itertools
+import math
+import os
+import threading
+import time
+
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+
+from app.services.metrics import metrics
+
+REPLICA_BIND_PREFIX = "replica_"
+# Flask session key holding the time until which reads stay on the primary.
+PRIMARY_UNTIL_KEY = "_primary_until"
+HEARTBEAT_ID = 1
+
+
+class RoutingSession(Session):
+    """``db.session`` that sends SELECTs from ``read_only`` views to a replica.
+
+    Flushes, INSERT/UPDATE/DELETE statements, ``SELECT ... FOR UPDATE`` and
+    raw SQL always use the primary, as do models with their own bind key.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not replica_router.enabled:
+            return engine
+        if engine is not self._db.engines.get(None):
+            return engine
+        if self._flushing or getattr(clause, "is_dml", False):
+            replica_router.note_write()
+            return engine
+        if (
+            not getattr(clause, "is_select", False)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            return engine
+        return replica_router.read_engine() or engine
+
+
+class ReplicaRouter:
+    """Chooses the replica, if any, that a request may read from.
+
+    Replicas are the ``replica_*`` entries of ``SQLALCHEMY_BINDS``, built from
+    ``DATABASE_REPLICA_URLS``.  Only views wrapped in ``read_only`` use them,
+    and only while:
+
+    * the request has not written anything yet;
+    * the browser has not written within ``REPLICA_STICKY_SECONDS`` (a
+      timestamp in the Flask session gives read-your-writes, e.g. a voter's
+      dashboard right after submitting a ballot);
+    * the replica's lag is at most ``REPLICA_MAX_LAG_SECONDS``.
+
+    Lag is the age of the newest ``replication_heartbeats`` row visible on the
+    replica; a per-process thread stamps that row on the primary every
+    ``REPLICA_HEARTBEAT_SECONDS``, so the figure may overstate the real lag by
+    up to one interval.  Unreachable replicas count as infinitely behind, and
+    with no healthy replica every read goes to the primary.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.bind_keys = []
+        self._lags = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._counter = itertools.count()
+
+    def init_app(self, app):
+        self.app = app
+        self.bind_keys = sorted(
+            key
+            for key in (app.config.get("SQLALCHEMY_BINDS") or {})
+            if key.startswith(REPLICA_BIND_PREFIX)
+        )
+        self.max_lag = app.config["REPLICA_MAX_LAG_SECONDS"]
+        self.sticky_seconds = app.config["REPLICA_STICKY_SECONDS"]
+        self.heartbeat_seconds = app.config["REPLICA_HEARTBEAT_SECONDS"]
+        if not self.enabled:
+            return
+        app.after_request(self._remember_write)
+        metrics.register_gauge("replicas.healthy", lambda: len(self._healthy()))
+        for key in self.bind_keys:
+            metrics.register_gauge(
+                f"replicas.{key}.lag_seconds",
+                functools.partial(self._reported_lag, key),
+            )
+
+    @property
+    def enabled(self):
+        return bool(self.bind_keys)
+
+    def lag(self, bind_key):
+        return self._lags.get(bind_key, math.inf)
+
+    def read_engine(self):
+        """The replica engine for this request, or None to use the primary."""
+        if not has_request_context() or not g.get("_read_only"):
+            return None
+        if g.get("_wrote_primary"):
+            return None
+        if session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+            metrics.increment("replicas.sticky_reads")
+            return None
+
+        from app.extensions import db
+
+        bind_key = g.get("_replica_bind_key")
+        if bind_key is None:
+            # One replica per request, so its reads see a single snapshot.
+            self._ensure_monitor()
+            healthy = self._healthy()
+            if not healthy:
+                metrics.increment("replicas.primary_fallbacks")
+                return None
+            bind_key = g._replica_bind_key = healthy[next(self._counter) % len(healthy)]
+        metrics.increment("replicas.reads")
+        return db.engines[bind_key]
+
+    def note_write(self):
+        if has_request_context():
+            g._wrote_primary = True
+
+    def _reported_lag(self, bind_key):
+        lag = self.lag(bind_key)
+        return None if lag == math.inf else round(lag, 3)
+
+    def _healthy(self):
+        return [key for key in self.bind_keys if self.lag(key) <= self.max_lag]
+
+    def _remember_write(self, response):
+        if g.get("_wrote_primary") and self.sticky_seconds > 0:
+            session[PRIMARY_UNTIL_KEY] = time.time() + self.sticky_seconds
+        return response
+
+    def _ensure_monitor(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Forked workers start their own monitor with fresh measurements.
+            self._lags = {}
+            try:
+                self._check()
+            except Exception:
+                self.app.logger.exception("Replica lag check failed.")
+            thread = threading.Thread(
+                target=self._monitor, name="replica-monitor", daemon=True
+            )
+            thread.start()
+            self._pid = os.getpid()
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.heartbeat_seconds)
+            try:
+                self._check()
+            except Exception:
+                self.app.logger.exception("Replica lag check failed.")
+
+    def _check(self):
+        from app.extensions import db
+        from app.models import ReplicationHeartbeat
+
+        table = ReplicationHeartbeat.__table__
+        with self.app.app_context():
+            now = time.time()
+            with db.engine.begin() as connection:
+                updated = connection.execute(
+                    table.update().where(table.c.id == HEARTBEAT_ID).values(beat_at=now)
+                ).rowcount
+                if not updated:
+                    connection.execute(table.insert().values(id=HEARTBEAT_ID, beat_at=now))
+
+            for key in self.bind_keys:
+                try:
+                    with db.engines[key].connect() as connection:
+                        beat_at = connection.execute(
+                            db.select(table.c.beat_at).where(table.c.id == HEARTBEAT_ID)
+                        ).scalar()
+                except Exception as error:
+                    if self.lag(key) != math.inf:
+                        self.app.logger.warning("Replica %s is unavailable: %s", key, error)
+                    beat_at = None
+                self._lags[key] = max(0.0, now - beat_at) if beat_at is not None else math.inf
+
+
+def read_only(view):
+    """Let ``view`` read from a replica.
+
+    Only for pages that may show data a few seconds old; the request's own
+    writes, and the browser's recent ones, still go to and read from the primary.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # Left set for the whole request, so streamed bodies read from the replica too.
+        g._read_only = True
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,230 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import render_template
+from markupsafe import Markup
+
+from app.models import Option
+from app.services.compression import minify_html
+from app.services.metrics import metrics
+from app.services.voting.source import OptionRow
+
+FRAGMENT_TEMPLATE = "admin/motion_result.html"
+DEFAULT_ROUND_LIMIT = 25
+MAX_ROUND_LIMIT = 200
+
+# Motion type -> key holding the tally in ``tally_motion``'s result.
+RESULT_KEYS = {
+    "PREFERENCE": "pref",
+    "FPTP": "fptp",
+    "SCORE": "score",
+    "CUMULATIVE": "cumulative",
+    "YES_NO": "yes_no",
+}
+
+
+def tally_motion(motion):
+    """Run the tally matching ``motion.type`` and wrap it for the results template."""
+    # Imported on first use so workers that never show results skip the engines.
+    from app.services.live_irv import live_irv
+    from app.services.voting import (
+        tally_candidate_election,
+        tally_cumulative_votes,
+        tally_score_votes,
+        tally_yes_no_abstain,
+    )
+
+    if motion.type == "PREFERENCE":
+        # Open motions are counted live, as ballots arrive.
+        return {
+            "motion": motion,
+            "result_type": motion.type,
+            "pref": live_irv.tally(motion),
+        }
+
+    if motion.type == "FPTP":
+        return {
+            "motion": motion,
+            "result_type": motion.type,
+            "fptp": tally_candidate_election(motion),
+        }
+
+    if motion.type == "SCORE":
+        return {
+            "motion": motion,
+            "result_type": motion.type,
+            "score": tally_score_votes(motion),
+        }
+
+    if motion.type == "CUMULATIVE":
+        return {
+            "motion": motion,
+            "result_type": motion.type,
+            "cumulative": tally_cumulative_votes(motion),
+        }
+
+    return {
+        "motion": motion,
+        "result_type": motion.type,
+        "yes_no": tally_yes_no_abstain(motion),
+    }
+
+
+def serialize_result(value):
+    """Copy a tally result, replacing each ``Option`` with ``{"id", "label"}``."""
+    if isinstance(value, (Option, OptionRow)):
+        return {"id": value.id, "label": value.text}
+    if isinstance(value, dict):
+        return {key: serialize_result(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [serialize_result(item) for item in value]
+    return value
+
+
+def preference_result_data(result):
+    """Serialize a sequential IRV result, folding each seat's round logs into its rounds."""
+    result = serialize_result(result)
+    for seat in result["seats"]:
+        seat["rounds"] = _merge_round_logs(seat["rounds"], seat.pop("round_logs"))
+    return result
+
+
+def motion_result_data(motion):
+    """JSON-ready results for ``motion``; IRV rounds are folded into each seat."""
+    item = tally_motion(motion)
+    result = item[RESULT_KEYS.get(motion.type, "yes_no")]
+    if motion.type == "PREFERENCE":
+        result = preference_result_data(result)
+    else:
+        result = serialize_result(result)
+    return {
+        "motion": {
+            "id": motion.id,
+            "title": motion.title,
+            "type": motion.type,
+            "status": motion.status,
+            "vote_version": motion.vote_version,
+        },
+        "result": result,
+    }
+
+
+def paginate_rounds(data, seat=None, round_offset=0, round_limit=DEFAULT_ROUND_LIMIT):
+    """Slice the IRV rounds of ``data`` without mutating the cached copy.
+
+    ``seat`` keeps only that seat number; ``round_limit=0`` drops the rounds and
+    leaves per-seat summaries.  Other motion types are returned unchanged.
+    """
+    result = data["result"]
+    if data["motion"]["type"] != "PREFERENCE":
+        return data
+
+    seats = result["seats"]
+    if seat is not None:
+        seats = [entry for entry in seats if entry["seat_number"] == seat]
+
+    paged_seats = []
+    for entry in seats:
+        rounds = entry["rounds"]
+        page = rounds[round_offset : round_offset + round_limit] if round_limit else []
+        next_offset = round_offset + round_limit
+        paged_seats.append(
+            {
+                "seat_number": entry["seat_number"],
+                "winner": entry["winner"],
+                "round_count": len(rounds),
+                "rounds": page,
+                "round_offset": round_offset,
+                "next_round_offset": (
+                    next_offset if round_limit and next_offset < len(rounds) else None
+                ),
+            }
+        )
+
+    return {
+        "motion": data["motion"],
+        "result": {**result, "seat_count": len(result["seats"]), "seats": paged_seats},
+    }
+
+
+def results_etag(meeting_id, versions, variant=""):
+    """Strong ETag over ``(motion_id, vote_version)`` pairs and the page requested."""
+    digest = hashlib.sha1(f"{meeting_id}|{sorted(versions)}|{variant}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _merge_round_logs(rounds, round_logs):
+    # A seat can end with a log-only step (e.g. the last remaining candidate).
+    merged = []
+    for index in range(max(len(rounds), len(round_logs))):
+        round_info = rounds[index] if index < len(rounds) else None
+        merged.append(
+            {
+                "round_number": index + 1,
+                "counts": round_info["counts"] if round_info else [],
+                "total": round_info["total"] if round_info else None,
+                "log": round_logs[index] if index < len(round_logs) else [],
+            }
+        )
+    return merged
+
+
+class ResultsCache:
+    """Per-process LRU of rendered result cards and JSON results per motion.
+
+    Entries are keyed by ``(motion.id, motion.vote_version)``; every write that
+    can change a motion's results bumps its version, so a hit is always current
+    and stale entries simply age out.  With ``MINIFY_HTML`` the cards are
+    minified once, before they are cached.
+    """
+
+    def __init__(self):
+        self.max_entries = 0
+        self.minify = False
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def init_app(self, app):
+        self.max_entries = app.config["RESULTS_CACHE_SIZE"]
+        self.minify = app.config["MINIFY_HTML"]
+        metrics.register_gauge("results_cache.entries", lambda: len(self._entries))
+
+    def render(self, motion):
+        def build():
+            html = render_template(FRAGMENT_TEMPLATE, item=tally_motion(motion))
+            return Markup(minify_html(html) if self.minify else html)
+
+        return self._get_or_build(("html", motion.id, motion.vote_version), build)
+
+    def data(self, motion):
+        return self._get_or_build(
+            ("json", motion.id, motion.vote_version),
+            lambda: motion_result_data(motion),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get_or_build(self, key, build):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        if value is not None:
+            metrics.increment("results_cache.hits")
+            return value
+
+        metrics.increment("results_cache.misses")
+        value = build()
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+
+results_cache = ResultsCache()
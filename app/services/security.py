@@ -1,10 +1,10 @@
-import smtplib
 import uuid
-from email.message import EmailMessage
 
 from flask import current_app
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 
+from app.services.mail import mailer
+
 
 def generate_voter_code():
     return uuid.uuid4().hex[:8].upper()
@@ -26,9 +26,11 @@ def verify_reset_token(token, max_age=1800):
 
 
 def send_reset_email(to_email, reset_url):
-    if not current_app.config["MAIL_USERNAME"] or not current_app.config["MAIL_PASSWORD"]:
+    if not mailer.configured:
         raise RuntimeError("Email credentials are not configured.")
 
+    from email.message import EmailMessage
+
     msg = EmailMessage()
     msg["Subject"] = "Reset your Votora password"
     msg["From"] = current_app.config["MAIL_DEFAULT_SENDER"]
@@ -39,13 +41,5 @@ def send_reset_email(to_email, reset_url):
         "This link will expire in 30 minutes. If you did not request this, ignore this email."
     )
 
-    with smtplib.SMTP(
-        current_app.config["MAIL_SERVER"], current_app.config["MAIL_PORT"]
-    ) as server:
-        if current_app.config["MAIL_USE_TLS"]:
-            server.starttls()
-        server.login(
-            current_app.config["MAIL_USERNAME"], current_app.config["MAIL_PASSWORD"]
-        )
-        server.send_message(msg)
-        current_app.logger.info("Password reset email sent to %s", to_email)
+    mailer.send(msg)
+    current_app.logger.info("Password reset email queued for %s", to_email)
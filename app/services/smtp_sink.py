@@ -0,0 +1,142 @@
+"""Minimal local SMTP server that accepts and records mail, for development.
+
+Run ``python -m app.services.smtp_sink --port 8025`` and point ``MAIL_SERVER``
+/ ``MAIL_PORT`` at it with ``MAIL_USE_TLS=false``.  Any credentials are
+accepted.  ``connect_delay`` simulates the handshake cost of a real relay.
+"""
+
+import argparse
+import email
+import socketserver
+import threading
+import time
+from email import policy
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        sink = self.server.sink
+        if sink.connect_delay:
+            time.sleep(sink.connect_delay)
+        with sink.lock:
+            sink.connections += 1
+        self._reply("220 smtp-sink ready")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode("utf-8", "replace").strip().partition(" ")
+            command = command.upper()
+
+            if command == "EHLO":
+                self._reply("250-smtp-sink", "250-AUTH PLAIN LOGIN", "250 8BITMIME")
+            elif command == "HELO":
+                self._reply("250 smtp-sink")
+            elif command == "AUTH":
+                self._auth(argument)
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                sink.record(self._read_data())
+                self._reply("250 OK queued")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _auth(self, argument):
+        mechanism, _, initial = argument.partition(" ")
+        if mechanism.upper() == "LOGIN":
+            self._reply("334 VXNlcm5hbWU6")
+            self.rfile.readline()
+            self._reply("334 UGFzc3dvcmQ6")
+            self.rfile.readline()
+        elif not initial:
+            self._reply("334 ")
+            self.rfile.readline()
+        self._reply("235 Authentication successful")
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+    def _reply(self, *lines):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode("utf-8"))
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """Threaded SMTP stand-in; ``keep_messages=False`` only counts deliveries."""
+
+    def __init__(self, host="127.0.0.1", port=0, connect_delay=0.0, keep_messages=True):
+        self.connect_delay = connect_delay
+        self.keep_messages = keep_messages
+        self.lock = threading.Lock()
+        self.messages = []
+        self.delivered = 0
+        self.connections = 0
+        self._server = _ThreadingServer((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def record(self, raw):
+        with self.lock:
+            self.delivered += 1
+            if self.keep_messages:
+                self.messages.append(
+                    email.message_from_bytes(raw, policy=policy.default)
+                )
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="smtp-sink", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.connect_delay, keep_messages=False)
+    print(f"SMTP sink listening on {args.host}:{args.port}")
+    try:
+        sink._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{sink.delivered} messages over {sink.connections} connections")
+
+
+if __name__ == "__main__":
+    main()
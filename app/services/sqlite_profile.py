@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.services.metrics import metrics
+from app.services.replicas import replica_router
+
+
+def sqlite_pragmas(config):
+    """The ``PRAGMA`` statements run on each new SQLite connection."""
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        # A negative cache_size is in KiB rather than pages.
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE_MB']) * 1024 * 1024}",
+    ]
+
+
+class SqliteProfile:
+    """Tunes every SQLite engine of the app when its connections are opened.
+
+    WAL lets readers carry on while a ballot commits, ``synchronous=NORMAL``
+    drops the fsync from each WAL commit (a power cut may lose the last few
+    commits but never corrupts the file), and the busy timeout makes a writer
+    wait for the lock instead of failing with "database is locked".  Other
+    dialects are left untouched.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.pragmas = []
+
+    def init_app(self, app):
+        self.pragmas = sqlite_pragmas(app.config)
+        with app.app_context():
+            engines = [
+                engine for engine in db.engines.values() if engine.dialect.name == "sqlite"
+            ]
+        for engine in engines:
+            event.listen(engine, "connect", self._configure)
+        self.enabled = bool(engines)
+
+    def _configure(self, dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in self.pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class _Job:
+    __slots__ = ("func", "args", "done", "result", "error")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleWriter:
+    """Serialises SQLite writes through one thread per process.
+
+    ``call`` queues a function and blocks until the transaction that ran it
+    has committed.  The writer takes every job waiting (up to
+    ``SQLITE_WRITER_MAX_BATCH``), opens one ``BEGIN IMMEDIATE`` transaction,
+    runs each job in its own savepoint and commits once, so a rush of ballots
+    costs one lock acquisition and one WAL commit per batch instead of one
+    per ballot.  A job that raises is rolled back alone and its exception is
+    re-raised in the caller.  Only enabled when the primary database is
+    SQLite and ``SQLITE_SINGLE_WRITER`` is on.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.max_batch = app.config["SQLITE_WRITER_MAX_BATCH"]
+        with app.app_context():
+            is_sqlite = db.engine.dialect.name == "sqlite"
+        self.enabled = app.config["SQLITE_SINGLE_WRITER"] and is_sqlite
+        if self.enabled:
+            metrics.register_gauge("sqlite_writer.queued", self._queue.qsize)
+
+    def call(self, func, *args):
+        """Run ``func(*args)`` on the writer thread and return its result.
+
+        ``func`` uses ``db.session`` as usual but must not commit.  The
+        caller's own session should have no open write transaction, or the
+        writer waits for its lock until the busy timeout.
+        """
+        self._ensure_started()
+        # The write happens on another thread; it still counts as this
+        # request's, so the browser's next reads stay on the primary.
+        replica_router.note_write()
+        job = _Job(func, args)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked worker inherits neither the thread nor its waiters.
+            self._queue = queue.Queue()
+            thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self.max_batch:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(jobs)
+            except Exception as error:
+                self.app.logger.exception("SQLite writer batch failed.")
+                for job in jobs:
+                    if job.error is None:
+                        job.error = error
+            finally:
+                for job in jobs:
+                    job.done.set()
+
+    def _write(self, jobs):
+        started = time.perf_counter()
+        with self.app.app_context():
+            try:
+                # Take the write lock up front: a deferred transaction that
+                # reads first can fail to upgrade instead of waiting.
+                db.session.execute(db.text("BEGIN IMMEDIATE"))
+                for job in jobs:
+                    try:
+                        with db.session.begin_nested():
+                            job.result = job.func(*job.args)
+                    except Exception as error:
+                        job.error = error
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        metrics.increment("sqlite_writer.batches")
+        metrics.increment("sqlite_writer.jobs", len(jobs))
+        metrics.increment("sqlite_writer.ms", (time.perf_counter() - started) * 1000)
+
+
+sqlite_profile = SqliteProfile()
+single_writer = SingleWriter()
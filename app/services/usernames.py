@@ -0,0 +1,189 @@
+import bisect
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from app.extensions import db
+from app.models import User
+from app.services.metrics import metrics
+
+
+def normalize_username(username):
+    # MySQL's default collation ignores case and trailing spaces.
+    return (username or "").strip().lower()
+
+
+class UsernameIndex:
+    """Answers ``/check-username`` from a sorted in-memory list of usernames.
+
+    The list is loaded once per process and extended by ``add`` on signup;
+    usernames created or deleted by other workers are picked up by reloading
+    the whole list, at most every ``USERNAME_INDEX_REFRESH_SECONDS`` when a name
+    is not found (an ``id > last seen`` query would skip rows committed out of
+    id order and answer "available" for a taken name).  Results are also kept for
+    ``USERNAME_CHECK_CACHE_SECONDS``, and concurrent checks of the same name
+    share a single lookup, which covers the database path when the index is
+    disabled.
+    """
+
+    MAX_CACHED = 10_000
+
+    def __init__(self):
+        self.enabled = False
+        self.cache_seconds = 0.0
+        self._lock = threading.Lock()
+        self._names = None
+        self._refreshed_at = 0.0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._inflight = {}
+
+    def init_app(self, app):
+        self.enabled = app.config["USERNAME_INDEX_ENABLED"]
+        self.refresh_seconds = app.config["USERNAME_INDEX_REFRESH_SECONDS"]
+        self.cache_seconds = app.config["USERNAME_CHECK_CACHE_SECONDS"]
+        metrics.register_gauge("usernames.entries", self._entries)
+        metrics.register_gauge("usernames.memory_bytes", self._memory_bytes)
+        metrics.register_gauge("usernames.db_queries_per_check", self._query_ratio)
+
+    def exists(self, username):
+        key = normalize_username(username)
+        metrics.increment("usernames.checks")
+        if not key:
+            return False
+
+        cached = self._cached(key)
+        if cached is not None:
+            metrics.increment("usernames.cache_hits")
+            return cached
+
+        username = username.strip()
+        with self._cache_lock:
+            waiter = self._inflight.get(key)
+            leader = waiter is None
+            if leader:
+                waiter = self._inflight[key] = _Lookup()
+        if not leader:
+            metrics.increment("usernames.coalesced")
+            waiter.done.wait()
+            if waiter.error is None:
+                return waiter.result
+            # The leader's lookup failed; fall back to our own.
+            return self._lookup(key, username)
+
+        try:
+            waiter.result = self._lookup(key, username)
+            self._store(key, waiter.result)
+            return waiter.result
+        except Exception as error:
+            waiter.error = error
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+            waiter.done.set()
+
+    def add(self, username):
+        key = normalize_username(username)
+        self._store(key, True)
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._names is not None:
+                _insert(self._names, key)
+
+    def _lookup(self, key, username):
+        if not self.enabled:
+            metrics.increment("usernames.db_queries")
+            return (
+                db.session.query(User.id).filter(User.username == username).first()
+                is not None
+            )
+
+        names = self._names if self._names is not None else self._rebuild()
+        if _contains(names, key):
+            return True
+        stale_before = time.monotonic() - self.refresh_seconds
+        if self._refreshed_at <= stale_before:
+            return _contains(self._rebuild(stale_before), key)
+        metrics.increment("usernames.answered_without_db")
+        return False
+
+    def _cached(self, key):
+        if self.cache_seconds <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return None
+            return value
+
+    def _store(self, key, value):
+        if self.cache_seconds <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = (value, time.monotonic() + self.cache_seconds)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.MAX_CACHED:
+                self._cache.popitem(last=False)
+
+    def _rebuild(self, stale_before=None):
+        """Load every username, unless the list was loaded after ``stale_before``.
+
+        Without ``stale_before`` an existing list is kept as it is.
+        """
+        with self._lock:
+            if self._names is not None and (
+                stale_before is None or self._refreshed_at > stale_before
+            ):
+                # Another thread reloaded it while this one waited for the lock.
+                return self._names
+            metrics.increment("usernames.db_queries")
+            # Taken before the query: rows committed during it are left to the next one.
+            started_at = time.monotonic()
+            names = sorted(
+                normalize_username(username)
+                for (username,) in db.session.query(User.username).yield_per(5000)
+            )
+            self._refreshed_at = started_at
+            self._names = names
+            return names
+
+    def _entries(self):
+        return len(self._names) if self._names else 0
+
+    def _memory_bytes(self):
+        if not self._names:
+            return 0
+        return sys.getsizeof(self._names) + sum(map(sys.getsizeof, self._names))
+
+    def _query_ratio(self):
+        counters = metrics.counters()
+        checks = counters.get("usernames.checks", 0)
+        return counters.get("usernames.db_queries", 0) / checks if checks else 0.0
+
+
+class _Lookup:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _contains(names, key):
+    position = bisect.bisect_left(names, key)
+    return position < len(names) and names[position] == key
+
+
+def _insert(names, key):
+    position = bisect.bisect_left(names, key)
+    if position == len(names) or names[position] != key:
+        names.insert(position, key)
+
+
+username_index = UsernameIndex()
@@ -0,0 +1,193 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+from app.extensions import db
+from app.models import Voter
+from app.services.metrics import metrics
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.num_bits = max(
+            8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.num_hashes):
+            yield (first + index * second) % self.num_bits
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    @property
+    def estimated_false_positive_rate(self):
+        exponent = -self.num_hashes * self.count / self.num_bits
+        return (1 - math.exp(exponent)) ** self.num_hashes
+
+
+def normalize_code(code):
+    # MySQL compares codes case-insensitively and ignores trailing spaces.
+    return (code or "").strip().upper()
+
+
+class VoterCodeIndex:
+    """Per-process bloom filter of voter codes that rules out unknown codes.
+
+    ``create_voter`` adds codes as they are issued.  Codes issued by other
+    workers, and codes deleted or changed anywhere, are picked up by a
+    background thread that rebuilds the filter from every voter row each
+    ``VOTER_CODE_FILTER_REFRESH_SECONDS``; an ``id > last seen`` scan would
+    skip rows committed out of id order.  A lookup is answered from the filter
+    alone, so guessed codes never reach the database.  Deleted codes stay in
+    the filter as harmless false positives until the next rebuild, or until
+    enough accumulate to drop it early.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.app = None
+        self._lock = threading.Lock()
+        self._filter = None
+        self._deleted = 0
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config["VOTER_CODE_FILTER_ENABLED"]
+        self.error_rate = app.config["VOTER_CODE_FILTER_ERROR_RATE"]
+        self.refresh_seconds = app.config["VOTER_CODE_FILTER_REFRESH_SECONDS"]
+        # A filter built for another app's database says nothing about this one.
+        self._filter = None
+        metrics.register_gauge("voter_codes.entries", self._entries)
+        metrics.register_gauge("voter_codes.memory_bytes", self._memory_bytes)
+        metrics.register_gauge(
+            "voter_codes.estimated_false_positive_rate", self._estimated_fp_rate
+        )
+        metrics.register_gauge(
+            "voter_codes.observed_false_positive_rate", self._observed_fp_rate
+        )
+
+    def might_exist(self, code):
+        if not self.enabled:
+            return True
+
+        self._ensure_refresher()
+        bloom = self._filter or self._build()
+        if normalize_code(code) in bloom:
+            metrics.increment("voter_codes.maybe_valid")
+            return True
+
+        metrics.increment("voter_codes.rejected_without_db")
+        return False
+
+    def known(self, code):
+        """Whether the filter as it stands may hold ``code``; never queries the database."""
+        bloom = self._filter
+        return self.enabled and bloom is not None and normalize_code(code) in bloom
+
+    def find_voter(self, code):
+        if not self.might_exist(code):
+            return None
+        voter = Voter.query.filter_by(code=code).first()
+        if voter is None and self.enabled:
+            metrics.increment("voter_codes.false_positives")
+        return voter
+
+    def add(self, code):
+        if not self.enabled:
+            return
+        with self._lock:
+            bloom = self._filter
+            if bloom is None:
+                return
+            bloom.add(normalize_code(code))
+            if bloom.count > bloom.capacity:
+                self._filter = None
+
+    def discard(self, code):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._filter is None:
+                return
+            self._deleted += 1
+            if self._deleted > self._filter.count // 4:
+                self._filter = None
+
+    def rebuild(self):
+        """Replace the filter with one built from every voter row now."""
+        return self._build(replace=True)
+
+    def _build(self, replace=False):
+        with self._lock:
+            if self._filter is not None and not replace:
+                # Another thread built it while this one waited for the lock.
+                return self._filter
+            total = db.session.query(db.func.count(Voter.id)).scalar() or 0
+            bloom = BloomFilter(max(1024, total * 2), self.error_rate)
+            for (code,) in db.session.query(Voter.code).yield_per(5000):
+                bloom.add(normalize_code(code))
+            metrics.increment("voter_codes.rebuilds")
+            self._deleted = 0
+            self._filter = bloom
+            return bloom
+
+    def _ensure_refresher(self):
+        if self._pid == os.getpid() or self.refresh_seconds <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Forked workers start their own thread; the parent's did not survive.
+            thread = threading.Thread(
+                target=self._refresh_periodically, name="voter-code-filter", daemon=True
+            )
+            thread.start()
+            self._pid = os.getpid()
+
+    def _refresh_periodically(self):
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                with self.app.app_context():
+                    self.rebuild()
+            except Exception:
+                self.app.logger.exception("Voter code filter rebuild failed.")
+
+    def _entries(self):
+        return self._filter.count if self._filter else 0
+
+    def _memory_bytes(self):
+        return len(self._filter.bits) if self._filter else 0
+
+    def _estimated_fp_rate(self):
+        return self._filter.estimated_false_positive_rate if self._filter else 0.0
+
+    def _observed_fp_rate(self):
+        counters = metrics.counters()
+        false_positives = counters.get("voter_codes.false_positives", 0)
+        rejected = counters.get("voter_codes.rejected_without_db", 0)
+        invalid_lookups = false_positives + rejected
+        return false_positives / invalid_lookups if invalid_lookups else 0.0
+
+
+voter_code_index = VoterCodeIndex()
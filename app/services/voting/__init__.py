@@ -1,8 +1,23 @@
-from app.services.voting.candidate import tally_candidate_election
-from app.services.voting.cumulative import tally_cumulative_votes
-from app.services.voting.preference import tally_preference_sequential_irv
-from app.services.voting.score import tally_score_votes
-from app.services.voting.yes_no import tally_yes_no_abstain
+_ENGINES = {
+    "tally_candidate_election": "candidate",
+    "tally_cumulative_votes": "cumulative",
+    "tally_preference_sequential_irv": "preference",
+    "tally_score_votes": "score",
+    "tally_yes_no_abstain": "yes_no",
+}
+
+
+def __getattr__(name):
+    # Importing one submodule (``voting.source`` for ``OptionRow``) runs this
+    # package first; the engines are only loaded when a tally is asked for.
+    if name in _ENGINES:
+        from importlib import import_module
+
+        value = getattr(import_module(f"{__name__}.{_ENGINES[name]}"), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "tally_candidate_election",
@@ -1,10 +1,13 @@
+from app.services.voting.source import vote_entries
+
+
 def tally_candidate_election(motion):
     options_by_id = {option.id: option for option in motion.options}
     option_counts = {option_id: 0 for option_id in options_by_id}
 
-    for vote in motion.candidate_votes:
-        if vote.option_id in option_counts:
-            option_counts[vote.option_id] += 1
+    for _, option_id, _ in vote_entries(motion):
+        if option_id in option_counts:
+            option_counts[option_id] += 1
 
     total_votes = sum(option_counts.values())
     max_votes = max(option_counts.values(), default=0)
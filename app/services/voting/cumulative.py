@@ -1,3 +1,6 @@
+from app.services.voting.source import vote_entries
+
+
 def tally_cumulative_votes(motion):
     options_by_id = {option.id: option for option in motion.options}
     totals = {option_id: 0.0 for option_id in options_by_id}
@@ -7,16 +10,16 @@ def tally_cumulative_votes(motion):
     observed_points = set()
     voter_ids = set()
 
-    for vote in motion.cumulative_votes:
-        if vote.option_id in totals:
-            points_value = float(vote.points)
-            totals[vote.option_id] += points_value
-            counts[vote.option_id] += 1
-            level_counts[vote.option_id][points_value] = (
-                level_counts[vote.option_id].get(points_value, 0) + 1
+    for voter_id, option_id, points in vote_entries(motion):
+        if option_id in totals:
+            points_value = float(points)
+            totals[option_id] += points_value
+            counts[option_id] += 1
+            level_counts[option_id][points_value] = (
+                level_counts[option_id].get(points_value, 0) + 1
             )
             observed_points.add(points_value)
-            voter_ids.add(vote.voter_id)
+            voter_ids.add(voter_id)
 
     results = []
     for option_id, option in options_by_id.items():
@@ -0,0 +1,658 @@
+import heapq
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.voting.preference import irv_tie_break_loser
+from app.services.voting.source import ranked_ballots
+
+# Trie node layout: [ballots through this prefix, ballots ending here, children].
+COUNT, END, CHILDREN = 0, 1, 2
+# Memoised tallies kept per process before the cache is dropped and rebuilt.
+TALLY_CACHE_LIMIT = 100_000
+# Strongest rivals whose last-round win over the winner seeds the upper bound.
+RIVALS_SEEDED = 3
+
+# irv_tie_break_loser only needs ``.text`` for its log lines.
+_Label = namedtuple("_Label", "text")
+
+
+def _members(mask):
+    members = []
+    while mask:
+        low = mask & -mask
+        members.append(low.bit_length() - 1)
+        mask ^= low
+    return members
+
+
+def _first_in(ranking, mask):
+    for candidate in ranking:
+        if mask >> candidate & 1:
+            return candidate
+    return None
+
+
+def _level_bound(own, others):
+    """Fewest changed ballots that can leave a candidate with ``own`` votes
+    with no more votes than any of ``others``.
+
+    A changed ballot moves at most one vote away from one candidate and at
+    most one vote to another, so bringing the candidate down to ``x`` votes
+    and everyone else up to ``x`` takes at least ``max(removed, added)``
+    changes; the bound is the best ``x``.
+    """
+    if not others or own <= min(others):
+        return 0
+
+    def cost(x):
+        return max(own - x, sum(x - other for other in others if other < x))
+
+    low, high = 0, own
+    while low < high:
+        middle = (low + high) // 2
+        if sum(middle - other for other in others if other < middle) >= own - middle:
+            high = middle
+        else:
+            low = middle + 1
+    return min(cost(low), cost(low - 1)) if low > 0 else cost(low)
+
+
+def _bitplanes(weights, width):
+    """Split ``{position: weight}`` into binary planes of bitsets, so a
+    weighted count over a bitset is one popcount per plane.
+    """
+    largest = max(weights.values(), default=0)
+    planes = [bytearray(width) for _ in range(largest.bit_length())]
+    for position, weight in weights.items():
+        byte, bit = position >> 3, 1 << (position & 7)
+        for plane, bits in enumerate(planes):
+            if weight >> plane & 1:
+                bits[byte] |= bit
+    return [int.from_bytes(bits, "little") for bits in planes]
+
+
+class _Changes:
+    """Ballots taken out of a profile (by ranking position) and the ballots
+    written in their place (by ranking)."""
+
+    __slots__ = ("profile", "removed", "added", "cost", "partial", "_whole", "_planes")
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.removed = Counter()
+        self.added = Counter()
+        self.cost = 0
+        # Rankings with only some of their ballots removed; the rest are
+        # marked in a bitset so their weights come from the profile's planes.
+        self.partial = set()
+        self._whole = bytearray(profile.width)
+        self._planes = None
+
+    def remove(self, position, count):
+        self.removed[position] += count
+        self.cost += count
+        if self.removed[position] == self.profile.weights[position]:
+            self.partial.discard(position)
+            self._whole[position >> 3] |= 1 << (position & 7)
+            self._planes = None
+        else:
+            self.partial.add(position)
+
+    def planes(self):
+        """Weight planes of the wholly removed rankings."""
+        if self._planes is None:
+            whole = int.from_bytes(self._whole, "little")
+            self._planes = [bits & whole for bits in self.profile.planes]
+        return self._planes
+
+
+class _Profile:
+    """Ranked ballots over candidates ``0..n-1``.
+
+    Tallies for a set of continuing candidates come from a prefix trie when
+    most candidates continue (only the eliminated candidates' branches are
+    walked) and from bitsets over the distinct rankings otherwise; they are
+    memoised by candidate bitmask.
+    """
+
+    def __init__(self, rankings, size):
+        self.rankings = list(rankings)
+        self.weights = [rankings[ranking] for ranking in self.rankings]
+        self.size = size
+        self.full = (1 << size) - 1
+        self.total = sum(self.weights)
+        self.width = (len(self.rankings) + 7) // 8
+        self.root = [0, 0, {}]
+        for ranking, count in zip(self.rankings, self.weights):
+            node = self.root
+            node[COUNT] += count
+            for candidate in ranking:
+                node = node[CHILDREN].setdefault(candidate, [0, 0, {}])
+                node[COUNT] += count
+            node[END] += count
+        self._index_rankings()
+        self._tallies = {}
+
+    def _index_rankings(self):
+        # Bitsets over ranking positions: which rank each candidate, and which
+        # rank ``d`` above ``c``.
+        size = self.size
+        contains = [bytearray(self.width) for _ in range(size)]
+        above = [[None] * size for _ in range(size)]
+        holding = [[] for _ in range(size)]
+        for position, ranking in enumerate(self.rankings):
+            byte, bit = position >> 3, 1 << (position & 7)
+            for place, candidate in enumerate(ranking):
+                contains[candidate][byte] |= bit
+                holding[candidate].append((place, len(ranking), position))
+                row = above[candidate]
+                for earlier in ranking[:place]:
+                    if row[earlier] is None:
+                        row[earlier] = bytearray(self.width)
+                    row[earlier][byte] |= bit
+
+        def as_int(bits):
+            return int.from_bytes(bits, "little") if bits is not None else 0
+
+        self._contains = [as_int(bits) for bits in contains]
+        self._above = [[as_int(bits) for bits in row] for row in above]
+        self.planes = _bitplanes(dict(enumerate(self.weights)), self.width)
+        # Donor order: ballots ranking the candidate highest, then shortest.
+        self._holding = [[position for _, _, position in sorted(rows)] for rows in holding]
+        self._by_length = sorted(
+            range(len(self.rankings)), key=lambda position: len(self.rankings[position])
+        )
+
+    def tally(self, mask, changes=None):
+        """``(counts, exhausted)`` for the continuing candidates in ``mask``."""
+        cached = self._tallies.get(mask)
+        if cached is None:
+            members = _members(mask)
+            if len(members) * 3 > self.size * 2:
+                cached = self._walk(mask)
+            else:
+                counts = self._firsts(members, self.planes)
+                cached = (counts, self.total - sum(counts))
+            if len(self._tallies) >= TALLY_CACHE_LIMIT:
+                self._tallies.clear()
+            self._tallies[mask] = cached
+        if changes is None:
+            return cached
+
+        counts, exhausted = list(cached[0]), cached[1]
+        if changes.removed:
+            removed = self._firsts(_members(mask), changes.planes())
+            for position in changes.partial:
+                candidate = _first_in(self.rankings[position], mask)
+                if candidate is not None:
+                    removed[candidate] += changes.removed[position]
+            for candidate, count in enumerate(removed):
+                counts[candidate] -= count
+            exhausted -= changes.cost - sum(removed)
+        for ranking, count in changes.added.items():
+            candidate = _first_in(ranking, mask)
+            if candidate is None:
+                exhausted += count
+            else:
+                counts[candidate] += count
+        return counts, exhausted
+
+    def _walk(self, mask):
+        counts = [0] * self.size
+        exhausted = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            exhausted += node[END]
+            for candidate, child in node[CHILDREN].items():
+                if mask >> candidate & 1:
+                    counts[candidate] += child[COUNT]
+                else:
+                    stack.append(child)
+        return counts, exhausted
+
+    def _firsts(self, members, planes):
+        """Weighted count of rankings whose first choice among ``members`` is
+        each candidate."""
+        counts = [0] * self.size
+        for candidate in members:
+            row = self._above[candidate]
+            beaten = 0
+            for other in members:
+                if other != candidate:
+                    beaten |= row[other]
+            first = self._contains[candidate] & ~beaten
+            counts[candidate] = sum(
+                (first & bits).bit_count() << plane for plane, bits in enumerate(planes)
+            )
+        return counts
+
+    def run(self, changes=None):
+        """Count the election the way ``irv_single_winner`` does.
+
+        Returns the winner and one ``(mask, counts, eliminated)`` entry per
+        round that eliminated someone.
+        """
+        active = self.full
+        rounds = []
+        while active:
+            members = _members(active)
+            if len(members) == 1:
+                return members[0], rounds
+            counts = self.tally(active, changes)[0]
+            total = sum(counts[candidate] for candidate in members)
+            if total == 0:
+                return None, rounds
+            leader = max(members, key=counts.__getitem__)
+            if counts[leader] > total / 2:
+                return leader, rounds
+
+            zeros = [candidate for candidate in members if counts[candidate] == 0]
+            if zeros:
+                eliminated = zeros
+            else:
+                fewest = min(counts[candidate] for candidate in members)
+                lowest = [candidate for candidate in members if counts[candidate] == fewest]
+                if len(lowest) == 1:
+                    eliminated = lowest
+                else:
+                    eliminated = [self._break_tie(lowest, changes)]
+            rounds.append((active, counts, eliminated))
+            for candidate in eliminated:
+                active &= ~(1 << candidate)
+        return None, rounds
+
+    def _break_tie(self, lowest, changes):
+        removed = changes.removed if changes is not None else {}
+        ballots = []
+        for position, ranking in enumerate(self.rankings):
+            count = self.weights[position] - removed.get(position, 0)
+            if ranking and count > 0:
+                ballots.extend([list(ranking)] * count)
+        if changes is not None:
+            for ranking, count in changes.added.items():
+                ballots.extend([list(ranking)] * count)
+        labels = {candidate: _Label(str(candidate)) for candidate in range(self.size)}
+        loser, _ = irv_tie_break_loser(ballots, lowest, labels)
+        # Candidates are numbered in option id order, as the caller's fallback expects.
+        return min(lowest) if loser is None else loser
+
+    def donors(self, loser, mask):
+        """Yield ``(position, count)`` for rankings whose first choice among
+        ``mask`` is ``loser``, or that rank none of ``mask`` when ``loser`` is
+        None.
+        """
+        positions = self._by_length if loser is None else self._holding[loser]
+        for position in positions:
+            if _first_in(self.rankings[position], mask) == loser:
+                yield position, self.weights[position]
+
+
+class _Search:
+    """Branch and bound over elimination orders that end with someone other
+    than the winner.
+
+    A node is an order's tail ``(c_k, ..., c_1, winner')``: once only those
+    candidates remain, they go out in that order.  Its lower bound is the
+    largest ``_level_bound`` over its rounds, which only grows as the tail is
+    extended, so a node whose bound reaches the best manipulation found so
+    far is pruned.  At every node a greedy manipulation that forces the tail
+    is built and checked by recounting; if it costs no more than the bound
+    the node is solved.
+    """
+
+    def __init__(self, profile, winner):
+        self.profile = profile
+        self.winner = winner
+        self.first_preferences = profile.tally(profile.full)[0]
+        # The original elimination order; candidates still standing when
+        # someone reached a majority follow, weakest first.
+        _, rounds = profile.run()
+        self.order = [candidate for _, _, eliminated in rounds for candidate in eliminated]
+        if rounds:
+            mask, counts, eliminated = rounds[-1]
+            standing = [c for c in _members(mask) if c not in eliminated]
+        else:
+            counts, standing = self.first_preferences, _members(profile.full)
+        self.order += sorted(standing, key=counts.__getitem__)
+
+    def roots(self):
+        """The two-candidate tails ``(loser, alternative)``, cheapest first."""
+        tails = []
+        for alternative in range(self.profile.size):
+            if alternative == self.winner:
+                continue
+            for loser in range(self.profile.size):
+                if loser != alternative:
+                    mask = 1 << loser | 1 << alternative
+                    tails.append((self.bound(mask, loser), (loser, alternative)))
+        tails.sort()
+        return tails
+
+    def rivals(self, count):
+        """The ``count`` candidates closest to the winner head to head."""
+        others = [candidate for candidate in range(self.profile.size) if candidate != self.winner]
+        return sorted(
+            others, key=lambda rival: self.bound(1 << self.winner | 1 << rival, self.winner)
+        )[:count]
+
+    def bound(self, mask, loser):
+        """Cost of making ``loser`` the one eliminated when ``mask`` remains."""
+        counts = self.profile.tally(mask)[0]
+        return _level_bound(
+            counts[loser], [counts[other] for other in _members(mask) if other != loser]
+        )
+
+    def earlier_bound(self, mask, candidate):
+        """Lower bound for eliminating ``candidate`` while all of ``mask`` remain.
+
+        Whenever that happens the candidate holds at least its first
+        preferences, and each member of ``mask`` at most its tally with only
+        ``mask`` and the candidate left.
+        """
+        counts = self.profile.tally(mask | 1 << candidate)[0]
+        return _level_bound(
+            self.first_preferences[candidate], [counts[other] for other in _members(mask)]
+        )
+
+    def explore(self, roots, upper, budget):
+        """Best-first search below the ``(bound, tail)`` pairs in ``roots``.
+
+        Nodes are expanded cheapest bound first, so when ``budget`` seconds
+        run out the smallest bound left on the heap is a lower bound on every
+        manipulation under ``roots``.  Returns the best cost found (or None),
+        the candidate it elects, that lower bound, the nodes visited and
+        whether the search finished.
+        """
+        deadline = time.monotonic() + budget
+        best = None
+        alternative = None
+        lower = upper
+        heap = []
+        for order, (bound, tail) in enumerate(roots):
+            mask = 0
+            for candidate in tail:
+                mask |= 1 << candidate
+            heap.append((bound, -len(tail), order, tail, mask))
+        heapq.heapify(heap)
+        order = len(heap)
+        complete = True
+        nodes = 0
+        while heap:
+            if heap[0][0] >= upper:
+                break
+            if time.monotonic() > deadline:
+                lower = min(lower, heap[0][0])
+                complete = False
+                break
+            bound, _, _, tail, mask = heapq.heappop(heap)
+            # Everyone outside the tail goes out before it does.
+            outside = _members(self.profile.full & ~mask)
+            for candidate in outside:
+                bound = max(bound, self.earlier_bound(mask, candidate))
+                if bound >= upper:
+                    break
+            if bound >= upper:
+                continue
+            nodes += 1
+            # Until the winner is in the tail, nothing says how it goes out,
+            # and a construction would have to guess at the expensive part.
+            if self.winner in tail:
+                cost, elected = self.manipulate(tail)
+            else:
+                cost, elected = None, None
+            if cost is not None and cost < upper:
+                best = upper = cost
+                alternative = elected
+            if cost is not None and cost <= bound:
+                continue
+            if mask == self.profile.full:
+                # The construction may be beaten; only the bound is certain.
+                lower = min(lower, bound)
+                continue
+            for candidate in outside:
+                child_mask = mask | 1 << candidate
+                child_bound = max(bound, self.bound(child_mask, candidate))
+                if child_bound < upper:
+                    order += 1
+                    heapq.heappush(
+                        heap,
+                        (child_bound, -len(tail) - 1, order, (candidate,) + tail, child_mask),
+                    )
+        return {
+            "upper": best,
+            "alternative": alternative,
+            "lower": min(lower, upper),
+            "nodes": nodes,
+            "complete": complete,
+        }
+
+    def manipulate(self, tail):
+        """Cheapest verified manipulation forcing ``tail``, as ``(cost, elected)``.
+
+        Forcing only the tail leaves the other candidates to the count, which
+        may still elect the winner; the fallback also forces them out first,
+        in their original order.
+        """
+        orders = [tail]
+        if len(tail) < self.profile.size:
+            orders.append(tuple(c for c in self.order if c not in tail) + tail)
+        for order in orders:
+            for strict in (False, True):
+                changes = self._force(order, strict)
+                if changes is None:
+                    continue
+                elected, _ = self.profile.run(changes)
+                if elected is not None and elected != self.winner:
+                    return changes.cost, elected
+        return None, None
+
+    def _force(self, tail, strict):
+        """Greedily change ballots until each round of ``tail`` eliminates its
+        candidate; ties are left to the tie-break unless ``strict``.
+
+        Votes are moved to the weakest survivor on new ballots ranking it and
+        then the intended winner: first from ballots this manipulation already
+        wrote (free), then from the eliminated candidate's own ballots (closing
+        the gap by two), then from exhausted ballots.
+        """
+        changes = _Changes(self.profile)
+        target = tail[-1]
+        mask = 0
+        for candidate in tail:
+            mask |= 1 << candidate
+        for position, loser in enumerate(tail[:-1]):
+            counts = self.profile.tally(mask, changes)[0]
+            survivors = list(tail[position + 1 :])
+            sources = self._sources(changes, loser, mask)
+            kind, ranking, available = None, None, 0
+            while True:
+                survivors.sort(key=counts.__getitem__)
+                weakest = survivors[0]
+                gap = counts[loser] - counts[weakest]
+                if gap < 0 or (gap == 0 and not strict):
+                    break
+                if available <= 0:
+                    kind, ranking, available = next(sources, (None, None, 0))
+                    if kind is None:
+                        return None
+                if kind == "exhausted":
+                    needed = gap + 1 if strict else gap
+                else:
+                    needed = gap // 2 + 1 if strict else (gap + 1) // 2
+                if len(survivors) > 1:
+                    needed = min(needed, counts[survivors[1]] - counts[weakest] + 1)
+                needed = max(needed, 1)
+                replacement = (weakest,) if weakest == target else (weakest, target)
+
+                # Keep taking ballots of this kind until the gap is closed.
+                current = kind
+                while needed > 0 and kind == current:
+                    moved = min(needed, available)
+                    if kind == "rewritten":
+                        changes.added[ranking] -= moved
+                        if not changes.added[ranking]:
+                            del changes.added[ranking]
+                    else:
+                        changes.remove(ranking, moved)
+                    changes.added[replacement] += moved
+                    if kind != "exhausted":
+                        counts[loser] -= moved
+                    counts[weakest] += moved
+                    needed -= moved
+                    available -= moved
+                    if available <= 0 and needed > 0:
+                        kind, ranking, available = next(sources, (None, None, 0))
+                        if kind is None:
+                            return None
+            mask &= ~(1 << loser)
+        return changes
+
+    def _sources(self, changes, loser, mask):
+        for ranking, count in list(changes.added.items()):
+            if _first_in(ranking, mask) == loser:
+                yield "rewritten", ranking, count
+        for kind, loser in (("original", loser), ("exhausted", None)):
+            for position, count in self.profile.donors(loser, mask):
+                count -= changes.removed[position]
+                if count > 0:
+                    yield kind, position, count
+
+
+_worker_search = None
+
+
+def _init_worker(rankings, size, winner):
+    global _worker_search
+    _worker_search = _Search(_Profile(rankings, size), winner)
+
+
+def _explore(roots, upper, budget):
+    return _worker_search.explore(roots, upper, budget)
+
+
+def irv_margin(ballots, candidate_ids, time_budget=5.0, workers=0):
+    """Margin of victory of an IRV count of ``ballots`` among ``candidate_ids``.
+
+    ``margin_lower``/``margin_upper`` bracket the fewest ballots that must be
+    rewritten to elect someone else; they are equal (``exact``) unless the
+    ``time_budget`` ran out first, and ``runner_up`` is who a manipulation of
+    ``margin_upper`` ballots elects.  ``elimination_margin`` is the fewest
+    rewritten ballots that make some round eliminate a different candidate
+    (exact up to tie-breaks).  Subtrees are searched in ``workers`` processes;
+    0 or 1 searches in this process.
+    """
+    started = time.monotonic()
+    candidates = sorted(candidate_ids)
+    index = {candidate: position for position, candidate in enumerate(candidates)}
+    rankings = Counter(
+        tuple(index[candidate] for candidate in ballot if candidate in index)
+        for ballot in ballots
+    )
+    profile = _Profile(rankings, len(candidates))
+    winner, rounds = profile.run()
+
+    result = {
+        "winner": candidates[winner] if winner is not None else None,
+        "total_ballots": profile.total,
+        "elimination_margin": _elimination_margin(rounds),
+        "margin_lower": None,
+        "margin_upper": None,
+        "exact": False,
+        "runner_up": None,
+        "nodes": 0,
+        "timed_out": False,
+        "workers": max(workers, 1),
+    }
+    if winner is None or len(candidates) < 2:
+        result["elapsed_seconds"] = time.monotonic() - started
+        return result
+
+    search = _Search(profile, winner)
+    tails = search.roots()
+    # Rewriting every ballot to rank only the runner-up always works; beating
+    # the winner head to head in the last round is usually far cheaper.
+    upper, alternative = profile.total, None
+    for rival in search.rivals(RIVALS_SEEDED):
+        cost, elected = search.manipulate((winner, rival))
+        if cost is not None and cost < upper:
+            upper, alternative = cost, elected
+    lowers = []
+    budget = max(time_budget - (time.monotonic() - started), 0.0)
+
+    def record(outcome):
+        nonlocal upper, alternative
+        if outcome["upper"] is not None and outcome["upper"] < upper:
+            upper, alternative = outcome["upper"], outcome["alternative"]
+        lowers.append(outcome["lower"])
+        result["nodes"] += outcome["nodes"]
+        result["timed_out"] |= not outcome["complete"]
+
+    if workers <= 1:
+        record(search.explore(tails, upper, budget))
+    else:
+        # Dealt round-robin so every worker gets some of the cheapest tails.
+        shares = [tails[start::workers] for start in range(workers)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(rankings, len(candidates), winner),
+        ) as executor:
+            futures = [
+                executor.submit(_explore, share, upper, budget) for share in shares if share
+            ]
+            for future in futures:
+                record(future.result())
+
+    lower = min(lowers + [upper])
+    result.update(
+        margin_lower=lower,
+        margin_upper=upper,
+        exact=lower >= upper,
+        runner_up=candidates[alternative] if alternative is not None else None,
+        elapsed_seconds=time.monotonic() - started,
+    )
+    if alternative is None:
+        result["runner_up"] = next(
+            candidates[candidate] for candidate in range(len(candidates)) if candidate != winner
+        )
+    return result
+
+
+def _elimination_margin(rounds):
+    margins = []
+    for mask, counts, eliminated in rounds:
+        members = _members(mask)
+        if len(members) < 2:
+            continue
+        survivors = sorted(counts[c] for c in members if c not in eliminated)
+        weakest = max(counts[candidate] for candidate in eliminated)
+        # Moving ballots from the next-weakest to the eliminated candidate
+        # until the next-weakest is strictly behind changes this round.
+        margins.append((survivors[0] - weakest) // 2 + 1)
+    return min(margins, default=None)
+
+
+def analyse_preference_margins(motion, time_budget=5.0, workers=0):
+    """``irv_margin`` for each seat of a ``PREFERENCE`` motion.
+
+    Seats are counted as ``tally_preference_sequential_irv`` does, so a later
+    seat's margin is with the earlier winners already removed.
+    """
+    ballots = ranked_ballots(motion)
+    remaining = {option.id for option in motion.options}
+    seats = []
+    seat_count = motion.num_winners or 1
+    deadline = time.monotonic() + time_budget
+    for seat_index in range(seat_count):
+        if not remaining:
+            break
+        # Split what is left of the budget evenly over the remaining seats.
+        budget = max(deadline - time.monotonic(), 0.0) / (seat_count - seat_index)
+        analysis = irv_margin(ballots, remaining, budget, workers)
+        if analysis["winner"] is None:
+            break
+        seats.append({"seat_number": seat_index + 1, **analysis})
+        remaining.discard(analysis["winner"])
+    return {"seats": seats, "total_ballots": len(ballots)}
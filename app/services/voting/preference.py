@@ -1,16 +1,111 @@
-def build_ballots_for_motion(motion):
-    votes_by_voter = {}
-    for vote in motion.preference_votes:
-        votes_by_voter.setdefault(vote.voter_id, []).append(vote)
+from array import array
+from collections import Counter
+
+from app.services.voting.source import ranked_ballots
 
-    ballots = []
-    for votes in votes_by_voter.values():
-        sorted_votes = sorted(votes, key=lambda v: v.preference_rank)
-        ballot = [v.option_id for v in sorted_votes]
-        if ballot:
-            ballots.append(ballot)
 
-    return ballots
+def build_ballots_for_motion(motion):
+    return ranked_ballots(motion)
+
+
+class IrvTallier:
+    """First-preference counts kept current as candidates are eliminated.
+
+    Identical rankings are merged into one entry with a weight, and each entry
+    sits on the pile of its highest-ranked candidate still standing, so an
+    elimination only revisits the entries on the eliminated candidate's pile
+    instead of every ballot.  ``copy`` shares the rankings and the piles (a
+    pile is copied the first time the copy adds to it), so a tallier prepared
+    with every candidate standing can be reused for any number of counts.
+    ``add`` and ``remove`` change the ballots a tallier counts in place.
+    """
+
+    def __init__(self, ballots, candidates):
+        self.ballots = ballots
+        grouped = Counter(tuple(ballot) for ballot in ballots)
+        self.rankings = list(grouped)
+        self.weights = [grouped[ranking] for ranking in self.rankings]
+        self._index = {ranking: index for index, ranking in enumerate(self.rankings)}
+        self.standing = set(candidates)
+        self.positions = array("I", bytes(4 * len(self.rankings)))
+        self.piles = {candidate: [] for candidate in self.standing}
+        self.counts = dict.fromkeys(self.standing, 0)
+        self._owned = set(self.standing)
+        for index in range(len(self.rankings)):
+            self._place(index, 0)
+
+    def copy(self):
+        clone = object.__new__(IrvTallier)
+        clone.ballots = self.ballots
+        clone.rankings = self.rankings
+        clone.weights = self.weights
+        clone._index = self._index
+        clone.standing = set(self.standing)
+        clone.positions = self.positions[:]
+        clone.piles = dict(self.piles)
+        clone.counts = dict(self.counts)
+        clone._owned = set()
+        return clone
+
+    def _place(self, index, start):
+        ranking = self.rankings[index]
+        for position in range(start, len(ranking)):
+            candidate = ranking[position]
+            if candidate in self.standing:
+                if candidate not in self._owned:
+                    self.piles[candidate] = list(self.piles[candidate])
+                    self._owned.add(candidate)
+                self.piles[candidate].append(index)
+                self.positions[index] = position
+                self.counts[candidate] += self.weights[index]
+                return
+        # Exhausted: no standing candidate left on this ranking.
+
+    def add(self, ranking):
+        """Count one more ballot ranking ``ranking``."""
+        ranking = tuple(ranking)
+        index = self._index.get(ranking)
+        if index is None:
+            index = self._index[ranking] = len(self.rankings)
+            self.rankings.append(ranking)
+            self.weights.append(1)
+            self.positions.append(0)
+            self._place(index, 0)
+            return
+        self.weights[index] += 1
+        top = self._top(index)
+        if top is not None:
+            self.counts[top] += 1
+
+    def remove(self, ranking):
+        """Stop counting one ballot ranking ``ranking``; it must have been counted."""
+        index = self._index[tuple(ranking)]
+        self.weights[index] -= 1
+        top = self._top(index)
+        if top is not None:
+            self.counts[top] -= 1
+
+    def _top(self, index):
+        ranking = self.rankings[index]
+        position = self.positions[index]
+        if position < len(ranking) and ranking[position] in self.standing:
+            return ranking[position]
+        return None
+
+    def eliminate(self, candidates):
+        eliminated = [candidate for candidate in candidates if candidate in self.standing]
+        self.standing.difference_update(eliminated)
+        for candidate in eliminated:
+            del self.counts[candidate]
+            for index in self.piles.pop(candidate):
+                self._place(index, self.positions[index] + 1)
+
+    def first_preferences(self, active):
+        """Counts for ``active``, eliminating every other standing candidate first."""
+        if not self.standing.issuperset(active):
+            raise ValueError("A tallier cannot bring back an eliminated candidate.")
+        self.eliminate(self.standing - set(active))
+        return {candidate: self.counts[candidate] for candidate in active}
 
 
 def irv_tie_break_loser(ballots, tied_candidates, options_by_id):
@@ -149,127 +244,147 @@ def irv_tie_break_loser(ballots, tied_candidates, options_by_id):
     return None, log
 
 
-def irv_single_winner(ballots, active_candidates, options_by_id):
-    active = set(active_candidates)
-    rounds = []
-    round_logs = []
+def irv_round(ballots, counts, round_number, options_by_id, tie_break=None):
+    """Decide one IRV round from the first-preference ``counts`` of the active candidates.
+
+    Returns ``(outcome, log)``: the outcome is ``("elected", winner)``,
+    ``("exhausted", None)`` or ``("eliminated", candidates)``.  Only a tie for
+    lowest reads ``ballots``, through ``tie_break`` (``irv_tie_break_loser``
+    unless given).
+    """
 
     def name(cid):
         return options_by_id[cid].text
 
-    while active:
-        if len(active) == 1:
-            (only,) = active
-            round_logs.append([f"{name(only)} is the only remaining candidate and is elected."])
-            return only, rounds, round_logs
-
-        counts = {cid: 0 for cid in active}
-        for ballot in ballots:
-            for option_id in ballot:
-                if option_id in active:
-                    counts[option_id] += 1
-                    break
-
-        rounds.append(counts.copy())
-        round_number = len(rounds)
-        total_valid = sum(counts.values())
-
-        base_log = [
-            "Round {}: first-preference counts {}".format(
-                round_number,
-                ", ".join(f"{name(cid)} = {counts[cid]}" for cid in sorted(active)),
-            ),
-            f"Total valid ballots counted this round: {total_valid}.",
-        ]
-
-        if total_valid == 0:
-            base_log.append("No more usable ballots; no winner can be determined.")
-            round_logs.append(base_log)
-            return None, rounds, round_logs
-
-        winner_id = max(counts, key=counts.get)
-        if counts[winner_id] > total_valid / 2:
-            base_log.append(f"{name(winner_id)} has a majority (>50%) and is elected as winner.")
-            round_logs.append(base_log)
-            return winner_id, rounds, round_logs
-
-        zero_candidates = [cid for cid, value in counts.items() if value == 0]
-        non_zero_candidates = [cid for cid, value in counts.items() if value > 0]
-
-        if zero_candidates and non_zero_candidates:
-            if len(zero_candidates) == 1:
-                zero_name = name(zero_candidates[0])
-                base_log.append(
-                    f"{zero_name} has 0 first-preference votes and is eliminated automatically."
-                )
-            else:
-                zero_names = ", ".join(name(cid) for cid in sorted(zero_candidates))
-                base_log.append(
-                    "The following candidates have 0 first-preference votes and are "
-                    f"all eliminated automatically: {zero_names}."
-                )
-
-            for candidate in zero_candidates:
-                active.remove(candidate)
-
-            round_logs.append(base_log)
-            continue
-
-        min_votes = min(counts.values())
-        lowest = [cid for cid, value in counts.items() if value == min_votes]
-
-        if len(lowest) == 1:
-            loser = lowest[0]
+    total_valid = sum(counts.values())
+    base_log = [
+        "Round {}: first-preference counts {}".format(
+            round_number,
+            ", ".join(f"{name(cid)} = {counts[cid]}" for cid in sorted(counts)),
+        ),
+        f"Total valid ballots counted this round: {total_valid}.",
+    ]
+
+    if total_valid == 0:
+        base_log.append("No more usable ballots; no winner can be determined.")
+        return ("exhausted", None), base_log
+
+    winner_id = max(counts, key=counts.get)
+    if counts[winner_id] > total_valid / 2:
+        base_log.append(f"{name(winner_id)} has a majority (>50%) and is elected as winner.")
+        return ("elected", winner_id), base_log
+
+    zero_candidates = [cid for cid, value in counts.items() if value == 0]
+    non_zero_candidates = [cid for cid, value in counts.items() if value > 0]
+
+    if zero_candidates and non_zero_candidates:
+        if len(zero_candidates) == 1:
+            zero_name = name(zero_candidates[0])
             base_log.append(
-                f"No majority. {name(loser)} has the fewest first-preference votes "
-                f"({min_votes}) and is eliminated."
+                f"{zero_name} has 0 first-preference votes and is eliminated automatically."
             )
         else:
-            tied_names = ", ".join(name(cid) for cid in sorted(lowest))
+            zero_names = ", ".join(name(cid) for cid in sorted(zero_candidates))
             base_log.append(
-                f"No majority. Tie for lowest between: {tied_names}. "
-                "Applying deeper preference tie-break."
+                "The following candidates have 0 first-preference votes and are "
+                f"all eliminated automatically: {zero_names}."
             )
-            tie_loser, tie_log = irv_tie_break_loser(ballots, lowest, options_by_id)
-            base_log.extend(tie_log)
-            if tie_loser is None:
-                tie_loser = min(lowest)
-                base_log.append(
-                    "Deep preference tie-break cannot distinguish; "
-                    f"falling back to deterministic rule and eliminating {name(tie_loser)}."
-                )
-            else:
-                base_log.append(f"Result of tie-break: {name(tie_loser)} is eliminated.")
-            loser = tie_loser
+        return ("eliminated", tuple(sorted(zero_candidates))), base_log
 
-        active.remove(loser)
-        round_logs.append(base_log)
+    min_votes = min(counts.values())
+    lowest = [cid for cid, value in counts.items() if value == min_votes]
 
-    round_logs.append(["All candidates eliminated; no winner determined."])
-    return None, rounds, round_logs
+    if len(lowest) == 1:
+        loser = lowest[0]
+        base_log.append(
+            f"No majority. {name(loser)} has the fewest first-preference votes "
+            f"({min_votes}) and is eliminated."
+        )
+    else:
+        tied_names = ", ".join(name(cid) for cid in sorted(lowest))
+        base_log.append(
+            f"No majority. Tie for lowest between: {tied_names}. "
+            "Applying deeper preference tie-break."
+        )
+        tie_loser, tie_log = (tie_break or irv_tie_break_loser)(ballots, lowest, options_by_id)
+        base_log.extend(tie_log)
+        if tie_loser is None:
+            tie_loser = min(lowest)
+            base_log.append(
+                "Deep preference tie-break cannot distinguish; "
+                f"falling back to deterministic rule and eliminating {name(tie_loser)}."
+            )
+        else:
+            base_log.append(f"Result of tie-break: {name(tie_loser)} is eliminated.")
+        loser = tie_loser
 
+    return ("eliminated", (loser,)), base_log
 
-def tally_preference_sequential_irv(motion):
-    ballots = build_ballots_for_motion(motion)
-    options_by_id = {option.id: option for option in motion.options}
-    all_candidate_ids = set(options_by_id.keys())
 
-    num_seats = motion.num_winners or 1
-    winner_ids = []
-    seats_info = []
+def irv_steps(
+    ballots, active_candidates, options_by_id, tallier=None, round_number=1, tie_break=None
+):
+    """Yield an IRV count step by step as ``(active, counts, outcome, log)``.
 
-    for seat_index in range(num_seats):
-        active_candidates = all_candidate_ids - set(winner_ids)
-        if not active_candidates:
-            break
+    ``counts`` is None for the closing step that elects the last candidate
+    standing.  Stops after the step that elects a winner or exhausts the
+    ballots; ``round_number`` numbers the first round, for resumed counts.
+    """
+    active = set(active_candidates)
 
-        winner_id, rounds_raw, round_logs = irv_single_winner(
-            ballots, active_candidates, options_by_id
-        )
-        if winner_id is None:
-            break
+    def name(cid):
+        return options_by_id[cid].text
 
-        winner_ids.append(winner_id)
+    while active:
+        if len(active) == 1:
+            (only,) = active
+            yield frozenset(active), None, ("elected", only), [
+                f"{name(only)} is the only remaining candidate and is elected."
+            ]
+            return
+
+        if tallier is not None:
+            counts = tallier.first_preferences(active)
+        else:
+            counts = {cid: 0 for cid in active}
+            for ballot in ballots:
+                for option_id in ballot:
+                    if option_id in active:
+                        counts[option_id] += 1
+                        break
+
+        outcome, log = irv_round(ballots, counts, round_number, options_by_id, tie_break)
+        yield frozenset(active), counts, outcome, log
+        if outcome[0] != "eliminated":
+            return
+        active.difference_update(outcome[1])
+        round_number += 1
+
+    yield frozenset(), None, ("exhausted", None), [
+        "All candidates eliminated; no winner determined."
+    ]
+
+
+def irv_single_winner(ballots, active_candidates, options_by_id, tallier=None):
+    """Elect one winner by IRV; an ``IrvTallier`` over ``ballots`` speeds up the counts."""
+    winner_id = None
+    rounds = []
+    round_logs = []
+    for _, counts, (kind, candidate), log in irv_steps(
+        ballots, active_candidates, options_by_id, tallier=tallier
+    ):
+        if counts is not None:
+            rounds.append(dict(counts))
+        round_logs.append(log)
+        if kind == "elected":
+            winner_id = candidate
+    return winner_id, rounds, round_logs
+
+
+def sequential_irv_result(seats, options_by_id, num_seats, total_ballots):
+    """Assemble a sequential IRV result from ``(winner_id, rounds, round_logs)`` per seat won."""
+    seats_info = []
+    for seat_index, (winner_id, rounds_raw, round_logs) in enumerate(seats):
         rounds_info = []
         for index, counts in enumerate(rounds_raw):
             counts_list = []
@@ -294,11 +409,210 @@ def tally_preference_sequential_irv(motion):
             }
         )
 
-    winners = [options_by_id[candidate_id] for candidate_id in winner_ids]
+    winners = [options_by_id[winner_id] for winner_id, _, _ in seats]
 
     return {
         "winners": winners,
         "seats": seats_info,
         "num_winners": num_seats,
-        "total_ballots": len(ballots),
+        "total_ballots": total_ballots,
     }
+
+
+def tally_preference_sequential_irv(motion, excluded=(), tallier=None):
+    """Sequential IRV over ``motion``'s options, leaving out the ``excluded`` option ids.
+
+    ``tallier``, an ``IrvTallier`` prepared over the motion's ballots with
+    every option standing, supplies the ballots and is copied for each seat.
+    """
+    ballots = build_ballots_for_motion(motion) if tallier is None else tallier.ballots
+    options_by_id = {option.id: option for option in motion.options}
+    all_candidate_ids = set(options_by_id.keys()) - set(excluded)
+
+    num_seats = motion.num_winners or 1
+    seats = []
+
+    for _ in range(num_seats):
+        active_candidates = all_candidate_ids - {winner_id for winner_id, _, _ in seats}
+        if not active_candidates:
+            break
+
+        winner_id, rounds_raw, round_logs = irv_single_winner(
+            ballots,
+            active_candidates,
+            options_by_id,
+            tallier=tallier.copy() if tallier is not None else None,
+        )
+        if winner_id is None:
+            break
+        seats.append((winner_id, rounds_raw, round_logs))
+
+    return sequential_irv_result(seats, options_by_id, num_seats, len(ballots))
+
+
+class IncrementalIrv:
+    """Sequential IRV kept current as voters cast, replace or withdraw ballots.
+
+    Holds every step of the count of each seat: the candidates standing, their
+    first-preference counts and the round's outcome.  A changed ballot moves
+    one count in each round, which is then decided again; rounds are only
+    re-run from the first one whose outcome changes (with a copy of an
+    ``IrvTallier`` kept over the current ballots), and later seats only when
+    that seat's winner changes.  Tie-breaks are remembered until a changed
+    ballot ranks one of the tied candidates.  ``result`` matches
+    ``tally_preference_sequential_irv`` over the same ballots.
+    """
+
+    def __init__(self, rankings, options_by_id, num_winners):
+        self.options_by_id = options_by_id
+        self.num_seats = num_winners or 1
+        self.candidates = frozenset(options_by_id)
+        self.rankings = {
+            voter_id: tuple(ranking) for voter_id, ranking in rankings.items() if ranking
+        }
+        self.tallier = IrvTallier(list(self.rankings.values()), self.candidates)
+        self.seats = []
+        self._tie_breaks = {}
+        self._count_seats()
+
+    def replace(self, voter_id, ranking):
+        """Make ``ranking`` the voter's ballot; an empty ranking withdraws it."""
+        ranking = tuple(ranking)
+        previous = self.rankings.pop(voter_id, ())
+        if ranking:
+            self.rankings[voter_id] = ranking
+        if ranking == previous:
+            return
+        if previous:
+            self.tallier.remove(previous)
+        if ranking:
+            self.tallier.add(ranking)
+        changed = set(previous) | set(ranking)
+        if len(self.rankings) <= 1:
+            # Whether there are any ballots at all decides a tie-break too.
+            self._tie_breaks.clear()
+        else:
+            for tied in [tied for tied in self._tie_breaks if not changed.isdisjoint(tied)]:
+                del self._tie_breaks[tied]
+
+        # A live view: tie-breaks read the ballots, other rounds never do.
+        ballots = self.rankings.values()
+        for seat_index, steps in enumerate(self.seats):
+            winner_id = _step_winner(steps[-1])
+            for step_index, (active, counts, outcome, _) in enumerate(steps):
+                if counts is None:
+                    continue
+                _move_first_preference(counts, active, previous, -1)
+                _move_first_preference(counts, active, ranking, 1)
+                new_outcome, log = irv_round(
+                    ballots, counts, step_index + 1, self.options_by_id, self._tie_break
+                )
+                steps[step_index] = (active, counts, new_outcome, log)
+                if new_outcome != outcome:
+                    del steps[step_index + 1 :]
+                    if new_outcome[0] == "eliminated":
+                        steps.extend(
+                            irv_steps(
+                                ballots,
+                                active - set(new_outcome[1]),
+                                self.options_by_id,
+                                tallier=self.tallier.copy(),
+                                round_number=step_index + 2,
+                                tie_break=self._tie_break,
+                            )
+                        )
+                    break
+            if _step_winner(steps[-1]) != winner_id:
+                del self.seats[seat_index + 1 :]
+                self._count_seats()
+                return
+        self._count_seats()
+
+    def winners(self):
+        """Winning option ids so far, in seat order."""
+        winners = []
+        for steps in self.seats:
+            winner_id = _step_winner(steps[-1])
+            if winner_id is None:
+                break
+            winners.append(winner_id)
+        return winners
+
+    def provisional(self):
+        """Winners so far and each seat's latest round counts, in O(seats x candidates)."""
+        seats = []
+        for index, steps in enumerate(self.seats):
+            counted = [counts for _, counts, _, _ in steps if counts is not None]
+            winner_id = _step_winner(steps[-1])
+            seats.append(
+                {
+                    "seat_number": index + 1,
+                    "winner": self.options_by_id[winner_id] if winner_id is not None else None,
+                    "round_count": len(counted),
+                    "counts": [
+                        {"option": self.options_by_id[candidate_id], "count": count}
+                        for candidate_id, count in sorted(counted[-1].items())
+                    ]
+                    if counted
+                    else [],
+                }
+            )
+        return {
+            "winners": [self.options_by_id[winner_id] for winner_id in self.winners()],
+            "seats": seats,
+            "num_winners": self.num_seats,
+            "total_ballots": len(self.rankings),
+        }
+
+    def result(self):
+        """The full result, as ``tally_preference_sequential_irv`` returns it."""
+        seats = []
+        for steps in self.seats:
+            winner_id = _step_winner(steps[-1])
+            if winner_id is None:
+                break
+            rounds = [dict(counts) for _, counts, _, _ in steps if counts is not None]
+            seats.append((winner_id, rounds, [list(log) for _, _, _, log in steps]))
+        return sequential_irv_result(
+            seats, self.options_by_id, self.num_seats, len(self.rankings)
+        )
+
+    def _count_seats(self):
+        ballots = self.rankings.values()
+        winners = self.winners()
+        while len(self.seats) < self.num_seats and len(winners) == len(self.seats):
+            active = self.candidates - set(winners)
+            if not active:
+                break
+            steps = list(
+                irv_steps(
+                    ballots,
+                    active,
+                    self.options_by_id,
+                    tallier=self.tallier.copy(),
+                    tie_break=self._tie_break,
+                )
+            )
+            self.seats.append(steps)
+            winner_id = _step_winner(steps[-1])
+            if winner_id is not None:
+                winners.append(winner_id)
+
+    def _tie_break(self, ballots, tied_candidates, options_by_id):
+        # Only ballots ranking a tied candidate bear on the tie-break.
+        tied = frozenset(tied_candidates)
+        if tied not in self._tie_breaks:
+            self._tie_breaks[tied] = irv_tie_break_loser(ballots, tied, options_by_id)
+        return self._tie_breaks[tied]
+
+
+def _step_winner(step):
+    kind, candidate = step[2]
+    return candidate if kind == "elected" else None
+
+
+def _move_first_preference(counts, active, ranking, change):
+    for candidate in ranking:
+        if candidate in active:
+            counts[candidate] += change
+            return
@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+from app.services.archive import archive_store
+from app.services.packed_ballots import ballot_store
+
+# Motion type -> (Motion relationship holding its votes, per-option value attribute).
+VOTE_ROWS = {
+    "YES_NO": ("yes_no_votes", None),
+    "FPTP": ("candidate_votes", None),
+    "PREFERENCE": ("preference_votes", "preference_rank"),
+    "SCORE": ("score_votes", "score"),
+    "CUMULATIVE": ("cumulative_votes", "points"),
+}
+
+# A motion with its ballots loaded up front, as ``flask recount`` builds it
+# from Core rows or an archive file.  Carries what the tally engines read from
+# a motion; ``options`` are ``OptionRow``s and ``entries`` are
+# ``(voter_id, option_id, value)`` in voter, then rank or row, order.
+MotionSnapshot = namedtuple(
+    "MotionSnapshot", "id title type status num_winners approved_threshold_pct options entries"
+)
+OptionRow = namedtuple("OptionRow", "id text")
+
+
+def vote_entries(motion):
+    """Yield ``(voter_id, option_id, value)`` for every vote cast on ``motion``.
+
+    Reads the meeting's archive file once it is archived, the packed ballots
+    when ``BALLOT_STORE`` is ``packed`` and the per-option vote rows otherwise;
+    ``value`` is None for single-choice motions.
+    """
+    if isinstance(motion, MotionSnapshot):
+        yield from motion.entries
+        return
+
+    archive = archive_store.for_motion(motion)
+    if archive is not None:
+        yield from archive.entries(motion.id)
+        return
+
+    if ballot_store.reads_packed:
+        for voter_id, option_ids, values in ballot_store.ballots(motion.id):
+            if values is None:
+                for option_id in option_ids:
+                    yield voter_id, option_id, None
+            else:
+                for option_id, value in zip(option_ids, values):
+                    yield voter_id, option_id, value
+        return
+
+    relationship, value_field = VOTE_ROWS.get(motion.type, VOTE_ROWS["YES_NO"])
+    for vote in getattr(motion, relationship):
+        value = getattr(vote, value_field) if value_field else None
+        yield vote.voter_id, vote.option_id, value
+
+
+def ranked_ballots(motion):
+    """Each voter's ranking on a preference ``motion`` as a list of option ids."""
+    return [option_ids for _, option_ids in voter_rankings(motion) if option_ids]
+
+
+def voter_rankings(motion):
+    """Yield ``(voter_id, option_ids)`` for each voter's ranking on a preference ``motion``."""
+    if isinstance(motion, MotionSnapshot):
+        ballots = {}
+        for voter_id, option_id, _ in motion.entries:
+            ballots.setdefault(voter_id, []).append(option_id)
+        yield from ballots.items()
+        return
+
+    archive = archive_store.for_motion(motion)
+    if archive is not None:
+        yield from archive.ballots(motion.id)
+        return
+
+    if ballot_store.reads_packed:
+        for voter_id, option_ids, _ in ballot_store.ballots(motion.id):
+            yield voter_id, option_ids.tolist()
+        return
+
+    votes_by_voter = {}
+    for vote in motion.preference_votes:
+        votes_by_voter.setdefault(vote.voter_id, []).append(vote)
+
+    for voter_id, votes in votes_by_voter.items():
+        sorted_votes = sorted(votes, key=lambda v: v.preference_rank)
+        yield voter_id, [v.option_id for v in sorted_votes]
@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+
+from app.services.metrics import metrics
+from app.services.results import preference_result_data, results_cache
+
+
+def _winner_ids(result):
+    return [winner["id"] for winner in result["winners"]]
+
+
+def withdrawal_diff(actual, alternative):
+    """What changes between two serialized sequential IRV results.
+
+    Winners gained and lost, and each seat whose winner or round count differs.
+    """
+    actual_ids = _winner_ids(actual)
+    alternative_ids = _winner_ids(alternative)
+    seats = []
+    for index in range(max(len(actual["seats"]), len(alternative["seats"]))):
+        before = actual["seats"][index] if index < len(actual["seats"]) else None
+        after = alternative["seats"][index] if index < len(alternative["seats"]) else None
+        change = {
+            "seat_number": index + 1,
+            "actual_winner": before["winner"] if before else None,
+            "alternative_winner": after["winner"] if after else None,
+            "actual_rounds": len(before["rounds"]) if before else 0,
+            "alternative_rounds": len(after["rounds"]) if after else 0,
+        }
+        if change["actual_winner"] != change["alternative_winner"] or (
+            change["actual_rounds"] != change["alternative_rounds"]
+        ):
+            seats.append(change)
+
+    return {
+        "winners_changed": actual_ids != alternative_ids,
+        "elected": [w for w in alternative["winners"] if w["id"] not in actual_ids],
+        "unseated": [w for w in actual["winners"] if w["id"] not in alternative_ids],
+        "seats": seats,
+    }
+
+
+class WithdrawalPreviews:
+    """What-if counts of a preference motion with some candidates withdrawn.
+
+    Keeps a per-process LRU of ``IrvTallier``s keyed by ``(motion.id,
+    motion.vote_version)``, each holding the motion's merged rankings and
+    first-preference piles with every option standing.  A preview copies the
+    prepared tallier and eliminates the withdrawn options, so only ballots
+    whose top choice was withdrawn are moved before the count continues.  The
+    actual result comes from ``results_cache``, as the results pages show it.
+    """
+
+    def __init__(self):
+        self.max_entries = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def init_app(self, app):
+        self.max_entries = app.config["WHATIF_CACHE_SIZE"]
+        metrics.register_gauge("whatif_cache.entries", lambda: len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def tallier(self, motion):
+        # Imported on first use so workers that never preview skip the engines.
+        from app.services.voting.preference import IrvTallier
+        from app.services.voting.source import ranked_ballots
+
+        key = (motion.id, motion.vote_version)
+        with self._lock:
+            tallier = self._entries.get(key)
+            if tallier is not None:
+                self._entries.move_to_end(key)
+        if tallier is not None:
+            metrics.increment("whatif_cache.hits")
+            return tallier
+
+        metrics.increment("whatif_cache.misses")
+        tallier = IrvTallier(ranked_ballots(motion), [option.id for option in motion.options])
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = tallier
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return tallier
+
+    def preview(self, motion, excluded):
+        """The actual result, the result without the ``excluded`` option ids, and their diff.
+
+        The diff also lists the first-preference counts the withdrawal moves:
+        the withdrawn options' ballots and the options they transfer to.
+        """
+        from app.services.voting.preference import tally_preference_sequential_irv
+
+        prepared = self.tallier(motion)
+        actual = results_cache.data(motion)["result"]
+        alternative = preference_result_data(
+            tally_preference_sequential_irv(motion, excluded=excluded, tallier=prepared)
+        )
+
+        withdrawn = prepared.copy()
+        withdrawn.eliminate(excluded)
+        first_preferences = []
+        for option in sorted(motion.options, key=lambda option: option.id):
+            before = prepared.counts[option.id]
+            after = withdrawn.counts.get(option.id, 0)
+            if before != after:
+                first_preferences.append(
+                    {
+                        "option": {"id": option.id, "label": option.text},
+                        "actual": before,
+                        "alternative": after,
+                        "change": after - before,
+                    }
+                )
+        return {
+            "excluded": sorted(excluded),
+            "actual": actual,
+            "alternative": alternative,
+            "diff": {
+                **withdrawal_diff(actual, alternative),
+                "first_preferences": first_preferences,
+            },
+        }
+
+
+withdrawal_previews = WithdrawalPreviews()
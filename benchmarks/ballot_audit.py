@@ -0,0 +1,142 @@
+"""Measure what the ballot audit log adds to storing ballots, and proof cost.
+
+Stores ``--ballots`` ballots (a mix of first submissions and replacements)
+on a SQLite database with the audit log off and on, committing each ballot
+on its own (as a submission does) and in batches of ``--batch`` (as the
+ballot buffer and the SQLite single writer do).  Then times inclusion proofs
+for random voters and a full ``verify`` of the motion's tree.
+
+    python benchmarks/ballot_audit.py --ballots 20000 --voters 5000 --batch 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _load(database):
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    from app.config import Config
+
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    from app import create_app
+
+    return create_app(with_migrations=False)
+
+
+def seed(args):
+    from app.extensions import db
+    from app.models import Meeting, Motion, Option, Voter
+
+    db.create_all()
+    meeting = Meeting(title="Benchmark")
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.execute(
+        db.insert(Voter),
+        [
+            {"meeting_id": meeting.id, "name": f"Voter {index}", "code": f"A{index:08d}"}
+            for index in range(args.voters)
+        ],
+    )
+    voter_ids = [voter_id for (voter_id,) in db.session.query(Voter.id)]
+    motions = []
+    for label in ("audit off", "audit on"):
+        for batch in (1, args.batch):
+            motion = Motion(
+                meeting_id=meeting.id,
+                title=f"{label}, batch {batch}",
+                type="PREFERENCE",
+                status="OPEN",
+                num_winners=1,
+            )
+            db.session.add(motion)
+            db.session.flush()
+            options = [Option(motion_id=motion.id, text=text) for text in "ABCDEF"]
+            db.session.add_all(options)
+            db.session.flush()
+            motions.append((label, batch, motion, [option.id for option in options]))
+    db.session.commit()
+    return voter_ids, motions
+
+
+def store(args, voter_ids, motion, option_ids, batch, rng):
+    from app.extensions import db
+    from app.services.ballots import store_ballot
+
+    started = time.perf_counter()
+    for number in range(1, args.ballots + 1):
+        ranked = rng.sample(option_ids, 3)
+        choices = [(option_id, rank) for rank, option_id in enumerate(ranked, 1)]
+        store_ballot(rng.choice(voter_ids), motion, choices)
+        if number % batch == 0:
+            db.session.commit()
+    db.session.commit()
+    return args.ballots / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ballots", type=int, default=20000)
+    parser.add_argument("--voters", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--proofs", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    database = os.path.join(ROOT, "instance", "ballot-audit-bench.db")
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+    app = _load(database)
+
+    from app.services.ballot_audit import ballot_audit
+
+    try:
+        with app.app_context():
+            voter_ids, motions = seed(args)
+            print(f"{args.ballots} ballots from {args.voters} voters")
+            audited = None
+            for label, batch, motion, option_ids in motions:
+                ballot_audit.enabled = label == "audit on"
+                rate = store(args, voter_ids, motion, option_ids, batch, random.Random(args.seed))
+                print(f"{label:>9}, {batch:4d} per commit: {rate:8.0f} ballots/s")
+                if ballot_audit.enabled:
+                    audited = motion
+
+            rng = random.Random(args.seed)
+            timings = []
+            path_lengths = []
+            for _ in range(args.proofs):
+                voter_id = rng.choice(voter_ids)
+                started = time.perf_counter()
+                proofs = ballot_audit.proofs(audited.id, voter_id)
+                timings.append((time.perf_counter() - started) * 1000)
+                path_lengths.extend(len(proof["path"]) for proof in proofs)
+            summary = ballot_audit.summary(audited.id)
+            print(
+                f"proofs for one voter over {summary['size']} leaves: "
+                f"p50 {statistics.median(timings):.2f} ms, "
+                f"max path {max(path_lengths, default=0)} hashes"
+            )
+            started = time.perf_counter()
+            problems = ballot_audit.verify(audited.id)
+            print(
+                f"verify: {time.perf_counter() - started:.2f} s, "
+                f"{'ok' if not problems else problems[0]}"
+            )
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Compare the per-option vote tables with packed ballots: size on disk and tally time.
+
+Seeds a SQLite database with one motion per type (``--options`` options each)
+and ``--voters`` ballots on each, written to both layouts, then reports the
+bytes each layout takes (tables plus their indexes, from SQLite's ``dbstat``),
+the packed payload bytes per motion, and the median tally time reading rows
+versus packed ballots.
+
+    python benchmarks/ballot_store.py --voters 10000 --options 30 --rounds 3
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MOTION_TYPES = ["CUMULATIVE", "SCORE", "PREFERENCE", "FPTP"]
+
+ROW_TABLES = {
+    "CUMULATIVE": "cumulative_votes",
+    "SCORE": "score_votes",
+    "PREFERENCE": "preference_votes",
+    "FPTP": "candidate_votes",
+}
+
+
+def _load(database):
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ["BALLOT_STORE"] = "dual"
+    from app.config import Config
+
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    from app import create_app
+
+    return create_app(with_migrations=False)
+
+
+def _choices(motion_type, option_ids, budget, rng):
+    if motion_type == "CUMULATIVE":
+        points = [0] * len(option_ids)
+        for _ in range(budget):
+            points[rng.randrange(len(points))] += 1
+        return list(zip(option_ids, map(float, points)))
+    if motion_type == "SCORE":
+        return [(option_id, float(rng.randint(0, 10))) for option_id in option_ids]
+    if motion_type == "PREFERENCE":
+        ranked = rng.sample(option_ids, rng.randint(1, min(len(option_ids), 10)))
+        return [(option_id, rank) for rank, option_id in enumerate(ranked, 1)]
+    return [(rng.choice(option_ids), None)]
+
+
+def seed(args):
+    from app.extensions import db
+    from app.models import Meeting, Motion, Option, PackedBallot, Voter
+    from app.services.ballots import ballot_model_for
+    from app.services.packed_ballots import encode_ballot
+
+    db.create_all()
+    rng = random.Random(args.seed)
+    meeting = Meeting(title="Benchmark")
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.execute(
+        db.insert(Voter),
+        [
+            {"meeting_id": meeting.id, "name": f"Voter {index}", "code": f"B{index:08d}"}
+            for index in range(args.voters)
+        ],
+    )
+    voter_ids = [voter_id for (voter_id,) in db.session.query(Voter.id)]
+
+    motions = {}
+    for motion_type in MOTION_TYPES:
+        motion = Motion(
+            meeting_id=meeting.id,
+            title=motion_type,
+            type=motion_type,
+            status="CLOSED",
+            num_winners=1 if motion_type == "PREFERENCE" else None,
+            score_max=10 if motion_type == "SCORE" else None,
+            budget_points=args.options if motion_type == "CUMULATIVE" else None,
+        )
+        db.session.add(motion)
+        db.session.flush()
+        db.session.execute(
+            db.insert(Option),
+            [
+                {"motion_id": motion.id, "text": f"Option {index}"}
+                for index in range(args.options)
+            ],
+        )
+        option_ids = [option.id for option in motion.options]
+
+        vote_model, value_field = ballot_model_for(motion_type)
+        rows, packed = [], []
+        for voter_id in voter_ids:
+            choices = _choices(motion_type, option_ids, args.options, rng)
+            for option_id, value in choices:
+                row = {"voter_id": voter_id, "motion_id": motion.id, "option_id": option_id}
+                if value_field:
+                    row[value_field] = value
+                rows.append(row)
+            packed.append(
+                {
+                    "motion_id": motion.id,
+                    "voter_id": voter_id,
+                    "payload": encode_ballot(motion_type, choices),
+                }
+            )
+        db.session.execute(db.insert(vote_model), rows)
+        db.session.execute(db.insert(PackedBallot), packed)
+        motions[motion_type] = (motion.id, len(rows))
+    db.session.commit()
+    return motions
+
+
+def storage(db):
+    sizes = {}
+    rows = db.session.execute(
+        db.text(
+            "SELECT coalesce(m.tbl_name, s.name), SUM(s.pgsize) FROM dbstat AS s "
+            "LEFT JOIN sqlite_master AS m ON m.name = s.name GROUP BY 1"
+        )
+    )
+    for table, size in rows:
+        sizes[table] = size
+    return sizes
+
+
+def time_tally(motion_id, mode, rounds):
+    from app.extensions import db
+    from app.models import Motion
+    from app.services.packed_ballots import ballot_store
+    from app.services.results import tally_motion
+
+    ballot_store.mode = mode
+    timings = []
+    for _ in range(rounds):
+        db.session.expire_all()
+        motion = db.session.get(Motion, motion_id)
+        started = time.perf_counter()
+        result = tally_motion(motion)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voters", type=int, default=10000)
+    parser.add_argument("--options", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    database = os.path.join(ROOT, "instance", "ballot-store-bench.db")
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    if os.path.exists(database):
+        os.remove(database)
+    app = _load(database)
+    try:
+        with app.app_context():
+            from app.extensions import db
+
+            motions = seed(args)
+            try:
+                sizes = storage(db)
+            except Exception:
+                sizes = {}
+                print("SQLite was built without dbstat; sizes are not available.")
+
+            print(f"{args.voters} voters, {args.options} options per motion")
+            packed_total = sizes.get("packed_ballots", 0)
+            for motion_type, (motion_id, row_count) in motions.items():
+                row_ms, row_result = time_tally(motion_id, "rows", args.rounds)
+                packed_ms, packed_result = time_tally(motion_id, "packed", args.rounds)
+                same = "same result" if row_result == packed_result else "RESULTS DIFFER"
+                payload_bytes = db.session.execute(
+                    db.text(
+                        "SELECT SUM(length(payload)) FROM packed_ballots "
+                        "WHERE motion_id = :motion_id"
+                    ),
+                    {"motion_id": motion_id},
+                ).scalar()
+                print(
+                    f"{motion_type:>10}: {row_count:8d} rows "
+                    f"{sizes.get(ROW_TABLES[motion_type], 0) / 1024:9.0f} KiB  "
+                    f"packed payloads {payload_bytes / 1024:7.0f} KiB  "
+                    f"tally rows {row_ms:8.1f} ms  packed {packed_ms:8.1f} ms  "
+                    f"({row_ms / packed_ms if packed_ms else 0:4.1f}x, {same})"
+                )
+            print(
+                f"packed_ballots: {args.voters * len(motions):8d} rows "
+                f"{packed_total / 1024:9.0f} KiB for all {len(motions)} motions"
+            )
+    finally:
+        if os.path.exists(database):
+            os.remove(database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Measure bytes on the wire and time to first byte of the big admin pages.
+
+Seeds a SQLite meeting with ``--motions`` motions and ``--voters`` ballots,
+serves the app on a local port and fetches the meeting page and the results
+page over HTTP uncompressed, with gzip and with brotli (when installed), each
+with and without ``MINIFY_HTML``.  The results cache is cleared before every request
+unless ``--warm`` is given, so the results page includes its tallies.
+
+    python benchmarks/compression.py --motions 40 --voters 500 --rounds 5
+"""
+
+import argparse
+import http.client
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MOTION_TYPES = ["YES_NO", "FPTP", "PREFERENCE", "SCORE", "CUMULATIVE"]
+
+
+def _load(database):
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    from app.config import Config
+
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    from app import create_app
+
+    return create_app(with_migrations=False)
+
+
+def seed(args):
+    from werkzeug.security import generate_password_hash
+
+    from app.extensions import db
+    from app.models import Meeting, Motion, Option, User, Voter
+    from app.services.ballots import store_ballot
+
+    db.create_all()
+    rng = random.Random(args.seed)
+    user = User(
+        username="bench",
+        email="bench@example.com",
+        password_hash=generate_password_hash("bench-password"),
+    )
+    db.session.add(user)
+    db.session.flush()
+    meeting = Meeting(title="Annual general meeting", admin_id=user.id)
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.execute(
+        db.insert(Voter),
+        [
+            {"meeting_id": meeting.id, "name": f"Member {index}", "code": f"C{index:08d}"}
+            for index in range(args.voters)
+        ],
+    )
+    voter_ids = [voter_id for (voter_id,) in db.session.query(Voter.id)]
+
+    for index in range(args.motions):
+        motion_type = MOTION_TYPES[index % len(MOTION_TYPES)]
+        motion = Motion(
+            meeting_id=meeting.id,
+            title=f"Motion {index + 1}: {motion_type.replace('_', ' ').title()}",
+            type=motion_type,
+            status="CLOSED",
+            num_winners=1 if motion_type == "PREFERENCE" else None,
+            score_max=10 if motion_type == "SCORE" else None,
+            budget_points=10 if motion_type == "CUMULATIVE" else None,
+            approved_threshold_pct=50.0 if motion_type == "YES_NO" else None,
+        )
+        db.session.add(motion)
+        db.session.flush()
+        texts = (
+            ["Yes", "No", "Abstain"]
+            if motion_type == "YES_NO"
+            else [f"Candidate {letter}" for letter in "ABCDEFGH"]
+        )
+        options = [Option(motion_id=motion.id, text=text) for text in texts]
+        db.session.add_all(options)
+        db.session.flush()
+        option_ids = [option.id for option in options]
+
+        for voter_id in voter_ids:
+            if motion_type == "PREFERENCE":
+                ranked = rng.sample(option_ids, 4)
+                choices = [(option_id, rank) for rank, option_id in enumerate(ranked, 1)]
+            elif motion_type == "SCORE":
+                choices = [(option_id, float(rng.randint(0, 10))) for option_id in option_ids]
+            elif motion_type == "CUMULATIVE":
+                choices = [(rng.choice(option_ids), 10.0)]
+            else:
+                choices = [(rng.choice(option_ids), None)]
+            store_ballot(voter_id, motion, choices, bump_version=False)
+    db.session.commit()
+    return meeting.id
+
+
+def _serve(app):
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _login(port):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request(
+        "POST",
+        "/login",
+        body=urlencode({"username": "bench", "password": "bench-password"}),
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    response = connection.getresponse()
+    response.read()
+    cookie = response.getheader("Set-Cookie", "").split(";", 1)[0]
+    connection.close()
+    return cookie
+
+
+def fetch(port, path, cookie, accept_encoding):
+    headers = {"Cookie": cookie}
+    if accept_encoding:
+        headers["Accept-Encoding"] = accept_encoding
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    started = time.perf_counter()
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    first = response.read(1)
+    first_byte = time.perf_counter()
+    rest = response.read()
+    finished = time.perf_counter()
+    encoding = response.getheader("Content-Encoding") or "identity"
+    connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"GET {path} returned {response.status}")
+    return {
+        "bytes": len(first) + len(rest),
+        "ttfb_ms": (first_byte - started) * 1000,
+        "total_ms": (finished - started) * 1000,
+        "encoding": encoding,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--motions", type=int, default=40)
+    parser.add_argument("--voters", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--warm", action="store_true", help="Keep the results cache.")
+    args = parser.parse_args()
+
+    database = os.path.join(ROOT, "instance", "compression-bench.db")
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    if os.path.exists(database):
+        os.remove(database)
+    app = _load(database)
+
+    from app.services.compression import response_compressor
+    from app.services.results import results_cache
+
+    encodings = [("identity", None), ("gzip", "gzip")]
+    if response_compressor._brotli is not None:
+        encodings.append(("br", "br, gzip"))
+    variants = [
+        (f"{name}+minify" if minify else name, accept_encoding, minify)
+        for minify in (False, True)
+        for name, accept_encoding in encodings
+    ]
+
+    try:
+        with app.app_context():
+            meeting_id = seed(args)
+        server = _serve(app)
+        port = server.server_port
+        cookie = _login(port)
+        pages = {
+            "meeting": f"/admin/meetings/{meeting_id}",
+            "results": f"/admin/meetings/{meeting_id}/results",
+        }
+        print(f"{args.motions} motions, {args.voters} voters")
+        for page, path in pages.items():
+            for label, accept_encoding, minify in variants:
+                response_compressor.minify = results_cache.minify = minify
+                samples = []
+                for _ in range(args.rounds):
+                    if not args.warm:
+                        results_cache.clear()
+                    samples.append(fetch(port, path, cookie, accept_encoding))
+                print(
+                    f"{page:>8} {label:>12}: {samples[0]['bytes']:9d} bytes "
+                    f"({samples[0]['encoding']:>8})  "
+                    f"TTFB p50 {statistics.median(s['ttfb_ms'] for s in samples):7.1f} ms  "
+                    f"total p50 {statistics.median(s['total_ms'] for s in samples):7.1f} ms"
+                )
+        server.shutdown()
+    finally:
+        if os.path.exists(database):
+            os.remove(database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Time what-if counts of preference motions with one candidate withdrawn.
+
+Builds a synthetic election like ``irv_margin.py`` and, for each of the
+``--withdrawals`` strongest candidates, counts the motion without that
+candidate twice: from scratch, and from an ``IrvTallier`` prepared once with
+every candidate standing (what ``withdrawal_previews`` caches).  Prints both
+times, the share of ballots the withdrawal moves, and checks the two results
+match.
+
+    python benchmarks/irv_whatif.py --candidates 20 --ballots 50000 --seats 3 --withdrawals 5
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _load():
+    # Only the engines are needed; the app itself is never built.
+    from app.services.voting import preference, source
+
+    return preference, source
+
+
+def election(seed, candidates, ballots):
+    rng = random.Random(seed)
+    positions = [(rng.gauss(0, 1), rng.gauss(0, 1)) for _ in range(candidates)]
+    popularity = [rng.uniform(0.2, 3) for _ in range(candidates)]
+    entries = []
+    for voter in range(ballots):
+        x, y = rng.gauss(0, 1), rng.gauss(0, 1)
+        ranking = sorted(
+            range(candidates),
+            key=lambda c: math.hypot(positions[c][0] - x, positions[c][1] - y) / popularity[c]
+            + rng.gauss(0, 0.3),
+        )
+        for rank, candidate in enumerate(ranking[: rng.randint(1, 8)], 1):
+            entries.append((voter, candidate + 1, rank))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--ballots", type=int, default=50000)
+    parser.add_argument("--seats", type=int, default=3)
+    parser.add_argument("--withdrawals", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    preference, source = _load()
+    options = [source.OptionRow(cid, f"Candidate {cid}") for cid in range(1, args.candidates + 1)]
+    motion = source.MotionSnapshot(
+        1, "What-if", "PREFERENCE", "CLOSED", args.seats, None, options,
+        election(args.seed, args.candidates, args.ballots),
+    )
+
+    started = time.perf_counter()
+    actual = preference.tally_preference_sequential_irv(motion)
+    print(f"{args.ballots} ballots, {args.candidates} candidates, {args.seats} seats: "
+          f"full count {time.perf_counter() - started:.2f} s")
+
+    started = time.perf_counter()
+    prepared = preference.IrvTallier(source.ranked_ballots(motion), [o.id for o in options])
+    print(f"prepared tallier in {time.perf_counter() - started:.2f} s "
+          f"({len(prepared.rankings)} distinct rankings)")
+
+    strongest = sorted(prepared.counts, key=prepared.counts.get, reverse=True)
+    for candidate in strongest[: args.withdrawals]:
+        started = time.perf_counter()
+        scratch = preference.tally_preference_sequential_irv(motion, excluded={candidate})
+        scratch_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        reused = preference.tally_preference_sequential_irv(
+            motion, excluded={candidate}, tallier=prepared
+        )
+        reused_s = time.perf_counter() - started
+
+        assert reused == scratch, f"results differ without candidate {candidate}"
+        moved = prepared.counts[candidate] / args.ballots
+        winners = [option.id for option in reused["winners"]]
+        before = [option.id for option in actual["winners"]]
+        print(
+            f"without {candidate:3d}: from scratch {scratch_s:6.2f} s, reused {reused_s:6.2f} s "
+            f"({scratch_s / reused_s:4.1f}x), {moved:5.1%} of ballots move, "
+            f"winners {before} -> {winners}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Time the live IRV count of an open preference motion as ballots arrive.
+
+Builds a synthetic election like ``irv_margin.py`` with ``--ballots`` voters,
+then streams ``--updates`` new or replaced ballots into an ``IncrementalIrv``.
+Prints the build time, the mean cost of applying a ballot and of reading the
+provisional result, and the cost of the batch count each refresh used to
+run; every ``--check-every`` ballots the live result is compared with the
+batch one.
+
+    python benchmarks/live_irv.py --candidates 20 --ballots 50000 --seats 3 --updates 2000
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _load():
+    # Only the engines are needed; the app itself is never built.
+    from app.services.voting import preference, source
+
+    return preference, source
+
+
+def voter_model(seed, candidates):
+    rng = random.Random(seed)
+    positions = [(rng.gauss(0, 1), rng.gauss(0, 1)) for _ in range(candidates)]
+    popularity = [rng.uniform(0.2, 3) for _ in range(candidates)]
+
+    def ballot():
+        x, y = rng.gauss(0, 1), rng.gauss(0, 1)
+        ranking = sorted(
+            range(candidates),
+            key=lambda c: math.hypot(positions[c][0] - x, positions[c][1] - y) / popularity[c]
+            + rng.gauss(0, 0.3),
+        )
+        return [c + 1 for c in ranking[: rng.randint(1, 8)]]
+
+    return rng, ballot
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--ballots", type=int, default=50000)
+    parser.add_argument("--seats", type=int, default=3)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--check-every", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    preference, source = _load()
+    options = {
+        cid: source.OptionRow(cid, f"Candidate {cid}") for cid in range(1, args.candidates + 1)
+    }
+    rng, ballot = voter_model(args.seed, args.candidates)
+    rankings = {voter: ballot() for voter in range(args.ballots)}
+
+    def batch():
+        entries = [
+            (voter, option_id, rank)
+            for voter, ranking in rankings.items()
+            for rank, option_id in enumerate(ranking, 1)
+        ]
+        motion = source.MotionSnapshot(
+            1, "Live", "PREFERENCE", "OPEN", args.seats, None, list(options.values()), entries
+        )
+        started = time.perf_counter()
+        result = preference.tally_preference_sequential_irv(motion)
+        return result, time.perf_counter() - started
+
+    started = time.perf_counter()
+    live = preference.IncrementalIrv(rankings, options, args.seats)
+    print(f"{args.ballots} ballots, {args.candidates} candidates, {args.seats} seats: "
+          f"live count built in {time.perf_counter() - started:.2f} s")
+
+    applied = read = 0.0
+    batch_s = []
+    for number in range(1, args.updates + 1):
+        # Half new voters, half voters changing their ballot.
+        voter = rng.randrange(args.ballots) if number % 2 else args.ballots + number
+        rankings[voter] = ballot()
+        started = time.perf_counter()
+        live.replace(voter, rankings[voter])
+        applied += time.perf_counter() - started
+        started = time.perf_counter()
+        live.provisional()
+        read += time.perf_counter() - started
+        if number % args.check_every == 0 or number == args.updates:
+            expected, elapsed = batch()
+            batch_s.append(elapsed)
+            assert live.result() == expected, f"live result differs after {number} ballots"
+
+    print(f"{args.updates} ballots: {applied / args.updates * 1000:.3f} ms to apply, "
+          f"{read / args.updates * 1000:.3f} ms to read the provisional result; "
+          f"batch count {sum(batch_s) / len(batch_s):.2f} s per refresh; "
+          f"{len(batch_s)} checks identical")
+
+
+if __name__ == "__main__":
+    main()
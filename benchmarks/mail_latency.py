@@ -0,0 +1,89 @@
+"""Measure /forgot-password latency with inline vs. queued mail delivery.
+
+Runs the app on a throwaway SQLite database against a local SMTP sink that
+sleeps ``--connect-delay`` seconds per connection to stand in for the TLS
+handshake and login of a real relay.
+
+    python benchmarks/mail_latency.py --requests 50 --connect-delay 0.3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(mode, args, sink):
+    from app import create_app
+    from app.config import Config
+    from app.extensions import db
+    from app.models import User
+    from app.services.mail import mailer
+
+    host, port = sink.address
+    Config.MAIL_SERVER = host
+    Config.MAIL_PORT = port
+    Config.MAIL_USE_TLS = False
+    Config.MAIL_USERNAME = "bench"
+    Config.MAIL_PASSWORD = "bench"
+    Config.MAIL_DEFAULT_SENDER = "noreply@example.com"
+    Config.MAIL_ASYNC = mode == "queued"
+    app = create_app()
+    app.config["RATE_LIMIT_ENABLED"] = False
+
+    with app.app_context():
+        db.create_all()
+        if not User.query.filter_by(email="bench@example.com").first():
+            db.session.add(
+                User(username="bench", email="bench@example.com", password_hash="x")
+            )
+            db.session.commit()
+
+    client = app.test_client()
+    timings = []
+    before = sink.delivered
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        request_started = time.perf_counter()
+        client.post("/forgot-password", data={"email": "bench@example.com"})
+        timings.append((time.perf_counter() - request_started) * 1000)
+    mailer.join(timeout=120)
+    drained = time.perf_counter() - started
+
+    timings.sort()
+    print(
+        f"{mode:>7}: p50 {statistics.median(timings):7.1f} ms  "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:7.1f} ms  "
+        f"all mail delivered in {drained:5.2f} s  "
+        f"({sink.delivered - before} messages)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--connect-delay", type=float, default=0.3)
+    args = parser.parse_args()
+
+    database = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    from app.config import Config
+
+    # SQLite does not accept the MySQL ssl connect_args.
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+
+    from app.services.smtp_sink import SMTPSink
+
+    with SMTPSink(connect_delay=args.connect_delay, keep_messages=False) as sink:
+        run("inline", args, sink)
+        run("queued", args, sink)
+        print(f"SMTP connections opened: {sink.connections}")
+    os.remove(database)
+
+
+if __name__ == "__main__":
+    main()
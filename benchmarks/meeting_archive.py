@@ -0,0 +1,175 @@
+"""Measure cold archival of a closed meeting: file size, export, purge and tallies.
+
+Seeds one meeting with ``--voters`` voters who all vote on a preference, a
+score and a yes/no motion, closes it, then times ``archive_store.archive``
+(export, read-back check) and ``purge`` (batched deletes), and compares the
+archive file with the database pages the vote rows occupied.  Tallies of every
+motion are timed from the rows before archiving and from the memory-mapped
+file after, and must agree.
+
+    python benchmarks/meeting_archive.py --voters 20000 --batch 2000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _load(database):
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    from app.config import Config
+
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    from app import create_app
+
+    return create_app(with_migrations=False)
+
+
+def seed(args, rng):
+    from app.extensions import db
+    from app.models import Meeting, Motion, Option, PreferenceVote, ScoreVote, Voter, YesNoVote
+
+    db.create_all()
+    meeting = Meeting(title="Benchmark")
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.execute(
+        db.insert(Voter),
+        [
+            {"meeting_id": meeting.id, "name": f"Voter {index}", "code": f"A{index:08d}"}
+            for index in range(args.voters)
+        ],
+    )
+    voter_ids = [voter_id for (voter_id,) in db.session.query(Voter.id)]
+
+    def motion(motion_type, texts, **fields):
+        created = Motion(
+            meeting_id=meeting.id, title=motion_type, type=motion_type, status="CLOSED", **fields
+        )
+        db.session.add(created)
+        db.session.flush()
+        options = [Option(motion_id=created.id, text=text) for text in texts]
+        db.session.add_all(options)
+        db.session.flush()
+        return created, [option.id for option in options]
+
+    preference, candidates = motion("PREFERENCE", "ABCDEFGHIJ", num_winners=1)
+    score, scored = motion("SCORE", "ABCDE", score_max=10)
+    yes_no, answers = motion("YES_NO", ("Yes", "No", "Abstain"), approved_threshold_pct=50.0)
+
+    rows = {PreferenceVote: [], ScoreVote: [], YesNoVote: []}
+    for voter_id in voter_ids:
+        for rank, option_id in enumerate(rng.sample(candidates, rng.randint(1, 6)), 1):
+            rows[PreferenceVote].append(
+                {
+                    "motion_id": preference.id,
+                    "voter_id": voter_id,
+                    "option_id": option_id,
+                    "preference_rank": rank,
+                }
+            )
+        for option_id in scored:
+            rows[ScoreVote].append(
+                {
+                    "motion_id": score.id,
+                    "voter_id": voter_id,
+                    "option_id": option_id,
+                    "score": float(rng.randint(0, 10)),
+                }
+            )
+        rows[YesNoVote].append(
+            {"motion_id": yes_no.id, "voter_id": voter_id, "option_id": rng.choice(answers)}
+        )
+    for model, values in rows.items():
+        db.session.execute(db.insert(model), values)
+    db.session.commit()
+    return meeting, [preference, score, yes_no], sum(len(values) for values in rows.values())
+
+
+def tally_all(motions):
+    from app.services.voting import (
+        tally_preference_sequential_irv,
+        tally_score_votes,
+        tally_yes_no_abstain,
+    )
+
+    started = time.perf_counter()
+    results = [
+        tally_preference_sequential_irv(motions[0]),
+        tally_score_votes(motions[1]),
+        tally_yes_no_abstain(motions[2]),
+    ]
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voters", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    database = os.path.join(ROOT, "instance", "meeting-archive-bench.db")
+    directory = os.path.join(ROOT, "instance", "meeting-archive-bench")
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+    app = _load(database)
+
+    from app.extensions import db
+    from app.services.archive import archive_path, archive_store
+
+    archive_store.directory = directory
+    archive_store.batch_size = args.batch
+    try:
+        with app.app_context():
+            meeting, motions, rows = seed(args, random.Random(args.seed))
+            database_size = os.path.getsize(database)
+            print(f"{args.voters} voters, {rows} vote rows, database {database_size} bytes")
+
+            from_rows, rows_seconds = tally_all(motions)
+
+            started = time.perf_counter()
+            archive_store.archive(meeting)
+            export_seconds = time.perf_counter() - started
+            size = os.path.getsize(archive_path(directory, meeting.id))
+            print(
+                f"export: {export_seconds:.2f} s, "
+                f"archive {size} bytes ({size / rows:.2f} B/row)"
+            )
+
+            started = time.perf_counter()
+            deleted = archive_store.purge(meeting.id)
+            print(
+                f"purge: {deleted} rows in {time.perf_counter() - started:.2f} s, "
+                f"batches of {args.batch}"
+            )
+
+            free_pages = db.session.execute(db.text("PRAGMA freelist_count")).scalar()
+            page_size = db.session.execute(db.text("PRAGMA page_size")).scalar()
+            print(f"database pages freed for reuse: {free_pages * page_size} bytes")
+
+            db.session.expire_all()
+            archive_store.get(meeting.id)
+            from_archive, archive_seconds = tally_all(motions)
+            print(
+                f"tally all motions: rows {rows_seconds * 1000:.0f} ms, "
+                f"archive {archive_seconds * 1000:.0f} ms, "
+                f"{'identical' if from_archive == from_rows else 'DIFFERENT'}"
+            )
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
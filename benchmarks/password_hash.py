@@ -0,0 +1,117 @@
+"""Report password hash cost per PASSWORD_HASH_METHOD, and sign-in burst latency.
+
+For each method the script times single hash and verify calls, then fires
+``--burst`` concurrent verifications through the bounded worker pool to show
+how long the last sign-in of a burst waits with ``--workers`` threads.
+
+    python benchmarks/password_hash.py --rounds 5 --burst 24 --workers 2
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_METHODS = [
+    "pbkdf2:sha256",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:260000",
+    "scrypt:32768:8:1",
+    "scrypt:16384:8:1",
+]
+
+
+class _App:
+    def __init__(self, method, workers, max_pending):
+        self.config = {
+            "PASSWORD_HASH_METHOD": method,
+            "PASSWORD_HASH_WORKERS": workers,
+            "PASSWORD_HASH_MAX_PENDING": max_pending,
+            "PASSWORD_HASH_TIMEOUT_SECONDS": 120.0,
+        }
+
+
+def _load():
+    # Only the hasher is needed; the app itself is never built.
+    from app.services import passwords
+
+    return passwords
+
+
+def _median_ms(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _burst(hasher, pwhash, size, busy_error):
+    latencies = []
+    rejected = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(size)
+
+    def sign_in():
+        nonlocal rejected
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            hasher.verify(pwhash, "correct horse battery staple")
+        except busy_error:
+            with lock:
+                rejected += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=sign_in) for _ in range(size)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return latencies, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=32)
+    args = parser.parse_args()
+    passwords = _load()
+
+    print(f"{os.cpu_count()} CPUs, burst of {args.burst}, {args.workers} hash workers")
+    for method in args.methods:
+        hasher = passwords.PasswordHasher()
+        hasher.init_app(_App(method, args.workers, args.max_pending))
+        password = "correct horse battery staple"
+        pwhash = hasher.hash(password)
+
+        hash_ms = _median_ms(lambda: hasher.hash(password), args.rounds)
+        verify_ms = _median_ms(lambda: hasher.verify(pwhash, password), args.rounds)
+        latencies, rejected = _burst(
+            hasher, pwhash, args.burst, passwords.PasswordHasherBusy
+        )
+        burst = (
+            f"burst p50 {statistics.median(latencies):8.1f} ms  "
+            f"max {latencies[-1]:8.1f} ms"
+            if latencies
+            else "burst: all rejected"
+        )
+        print(
+            f"{passwords.normalize_method(method):>24}: hash {hash_ms:7.1f} ms  "
+            f"verify {verify_ms:7.1f} ms  {burst}  rejected {rejected}"
+        )
+
+
+if __name__ == "__main__":
+    main()
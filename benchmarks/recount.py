@@ -0,0 +1,162 @@
+"""Time ``flask recount`` over many motions, serially and on a process pool.
+
+Seeds ``--meetings`` meetings of ``--motions`` motions each (cycling through
+every motion type) with ``--voters`` voters who all vote, then recounts all
+of them with one process and with ``--workers`` processes.  Prints the wall
+time, the summed per-motion load / recount / shown times, and the parent's
+peak RSS, which should not grow with the number of motions.
+
+    python benchmarks/recount.py --meetings 50 --motions 20 --voters 200 --workers 4
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TYPES = ("PREFERENCE", "FPTP", "SCORE", "CUMULATIVE", "YES_NO")
+
+
+def _load(database):
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    from app.config import Config
+
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    from app import create_app
+
+    return create_app(with_migrations=False)
+
+
+def seed(args, rng):
+    from app.extensions import db
+    from app.models import Meeting, Motion, Option, Voter
+    from app.services.ballots import BALLOT_MODELS
+
+    db.create_all()
+    rows = {model: [] for model, _ in BALLOT_MODELS.values()}
+    for meeting_number in range(args.meetings):
+        meeting = Meeting(title=f"Meeting {meeting_number}")
+        db.session.add(meeting)
+        db.session.flush()
+        db.session.execute(
+            db.insert(Voter),
+            [
+                {
+                    "meeting_id": meeting.id,
+                    "name": f"Voter {index}",
+                    "code": f"M{meeting.id:05d}V{index:06d}",
+                }
+                for index in range(args.voters)
+            ],
+        )
+        voter_ids = [
+            voter_id
+            for (voter_id,) in db.session.query(Voter.id).filter(Voter.meeting_id == meeting.id)
+        ]
+        for number in range(args.motions):
+            motion_type = TYPES[number % len(TYPES)]
+            motion = Motion(
+                meeting_id=meeting.id,
+                title=f"Motion {number}",
+                type=motion_type,
+                status="CLOSED",
+                num_winners=2 if motion_type == "PREFERENCE" else None,
+                approved_threshold_pct=50.0 if motion_type == "YES_NO" else None,
+                score_max=10 if motion_type == "SCORE" else None,
+                budget_points=10 if motion_type == "CUMULATIVE" else None,
+            )
+            db.session.add(motion)
+            db.session.flush()
+            texts = ("Yes", "No", "Abstain") if motion_type == "YES_NO" else "ABCDEFGH"
+            options = [Option(motion_id=motion.id, text=text) for text in texts]
+            db.session.add_all(options)
+            db.session.flush()
+            option_ids = [option.id for option in options]
+            vote_model, value_field = BALLOT_MODELS[motion_type]
+            for voter_id in voter_ids:
+                if motion_type == "PREFERENCE":
+                    ranked = rng.sample(option_ids, rng.randint(1, len(option_ids)))
+                    choices = [(option_id, rank) for rank, option_id in enumerate(ranked, 1)]
+                elif motion_type == "SCORE":
+                    choices = [(option_id, float(rng.randint(0, 10))) for option_id in option_ids]
+                elif motion_type == "CUMULATIVE":
+                    choices = [(option_id, 5.0) for option_id in rng.sample(option_ids, 2)]
+                else:
+                    choices = [(rng.choice(option_ids), None)]
+                for option_id, value in choices:
+                    row = {"motion_id": motion.id, "voter_id": voter_id, "option_id": option_id}
+                    if value_field:
+                        row[value_field] = value
+                    rows[vote_model].append(row)
+        for model, values in rows.items():
+            if values:
+                db.session.execute(db.insert(model), values)
+            values.clear()
+        db.session.commit()
+
+
+def run(motion_ids, workers):
+    from app.services.recount import recount_motions
+
+    totals = {"load_ms": 0.0, "recount_ms": 0.0, "shown_ms": 0.0}
+    differing = 0
+    started = time.perf_counter()
+    for report in recount_motions(motion_ids, workers):
+        for key in totals:
+            totals[key] += report[key]
+        differing += bool(report["difference_count"])
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{workers} processes: {elapsed:6.2f} s wall, "
+        f"load {totals['load_ms'] / 1000:.2f} s, recount {totals['recount_ms'] / 1000:.2f} s, "
+        f"shown {totals['shown_ms'] / 1000:.2f} s summed; "
+        f"{differing} differ; parent peak RSS {peak_mb:.0f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--meetings", type=int, default=50)
+    parser.add_argument("--motions", type=int, default=20)
+    parser.add_argument("--voters", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    database = os.path.join(ROOT, "instance", "recount-bench.db")
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+    app = _load(database)
+
+    from app.extensions import db
+    from app.models import Motion
+
+    try:
+        with app.app_context():
+            started = time.perf_counter()
+            seed(args, random.Random(args.seed))
+            motion_ids = [motion_id for (motion_id,) in db.session.query(Motion.id)]
+            db.session.remove()
+            print(
+                f"{len(motion_ids)} motions, {args.voters} voters each "
+                f"(seeded in {time.perf_counter() - started:.1f} s, peak RSS "
+                f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB)"
+            )
+            run(motion_ids, 1)
+            run(motion_ids, args.workers)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+
+
+if __name__ == "__main__":
+    main()
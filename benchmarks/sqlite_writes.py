@@ -0,0 +1,222 @@
+"""Hammer ``POST /api/vote/...`` on SQLite from many clients at once.
+
+Each profile runs in its own process against a fresh database file: the old
+defaults (rollback journal, ``synchronous=FULL``, one commit per ballot),
+WAL with the tuned pragmas, and WAL plus the single writer.  ``--workers``
+forked server processes share the file, like gunicorn workers, and
+``--clients`` threads submit ``--ballots`` ballots between them over HTTP.
+The script reports ballots per second, latency percentiles and how many
+requests failed (mostly "database is locked").
+
+    python benchmarks/sqlite_writes.py --workers 4 --clients 32 --ballots 4000
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROFILES = {
+    "rollback journal": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_SINGLE_WRITER": "false",
+    },
+    "wal": {"SQLITE_SINGLE_WRITER": "false"},
+    "wal + single writer": {"SQLITE_SINGLE_WRITER": "true"},
+}
+
+
+def _load(database):
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    from app import create_app
+
+    return create_app(with_migrations=False)
+
+
+def seed(args):
+    from app.extensions import db
+    from app.models import Meeting, Motion, Option, Voter
+
+    db.create_all()
+    meeting = Meeting(title="Benchmark")
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.execute(
+        db.insert(Voter),
+        [
+            {"meeting_id": meeting.id, "name": f"Voter {index}", "code": f"W{index:08d}"}
+            for index in range(args.voters)
+        ],
+    )
+    motions = []
+    for motion_type in ("YES_NO", "PREFERENCE"):
+        motion = Motion(
+            meeting_id=meeting.id,
+            title=motion_type,
+            type=motion_type,
+            status="OPEN",
+            num_winners=1 if motion_type == "PREFERENCE" else None,
+        )
+        db.session.add(motion)
+        db.session.flush()
+        texts = ["Yes", "No", "Abstain"] if motion_type == "YES_NO" else list("ABCDEF")
+        options = [Option(motion_id=motion.id, text=text) for text in texts]
+        db.session.add_all(options)
+        db.session.flush()
+        motions.append((motion.id, motion_type, [option.id for option in options]))
+    db.session.commit()
+    return motions
+
+
+def _payload(motion_type, option_ids, rng):
+    if motion_type == "PREFERENCE":
+        ranked = rng.sample(option_ids, 3)
+        return {f"opt_{option_id}_rank": rank for rank, option_id in enumerate(ranked, 1)}
+    return {"option": rng.choice(option_ids)}
+
+
+def _serve(app, ready):
+    from werkzeug.serving import make_server
+
+    from app.extensions import db
+
+    with app.app_context():
+        # Connections opened before the fork belong to the parent.
+        db.engine.dispose(close=False)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def _client(port, jobs, latencies, errors, lock):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    while True:
+        with lock:
+            if not jobs:
+                break
+            path, body = jobs.pop()
+        started = time.perf_counter()
+        try:
+            connection.request(
+                "POST", path, body=body, headers={"Content-Type": "application/json"}
+            )
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(path)
+    connection.close()
+
+
+def run_profile(args):
+    database = os.path.join(ROOT, "instance", "sqlite-writes-bench.db")
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+    app = _load(database)
+    app.logger.disabled = True
+    try:
+        with app.app_context():
+            motions = seed(args)
+        rng = random.Random(args.seed)
+        jobs = []
+        for _ in range(args.ballots):
+            motion_id, motion_type, option_ids = rng.choice(motions)
+            code = f"W{rng.randrange(args.voters):08d}"
+            body = json.dumps(_payload(motion_type, option_ids, rng))
+            jobs.append((f"/api/vote/{code}/motion/{motion_id}", body))
+
+        context = multiprocessing.get_context("fork")
+        ready = context.Queue()
+        workers = [
+            context.Process(target=_serve, args=(app, ready), daemon=True)
+            for _ in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        ports = [ready.get() for _ in workers]
+        latencies, errors, lock = [], [], threading.Lock()
+        clients = [
+            threading.Thread(
+                target=_client,
+                args=(ports[index % len(ports)], jobs, latencies, errors, lock),
+            )
+            for index in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+        latencies.sort()
+        return {
+            "per_second": (len(latencies) - len(errors)) / elapsed,
+            "p50": statistics.median(latencies),
+            "p99": latencies[int(len(latencies) * 0.99) - 1],
+            "errors": len(errors),
+        }
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--ballots", type=int, default=4000)
+    parser.add_argument("--voters", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    os.makedirs(os.path.join(ROOT, "instance"), exist_ok=True)
+    print(f"{args.workers} workers, {args.clients} clients, {args.ballots} ballots")
+    for name, overrides in PROFILES.items():
+        # Config is read at import time, so every profile gets a fresh interpreter.
+        output = subprocess.run(
+            [sys.executable, __file__, "--profile", name, *sys.argv[1:]],
+            env={**os.environ, **overrides},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:>20}: {result['per_second']:7.0f} ballots/s  "
+            f"p50 {result['p50']:7.1f} ms  p99 {result['p99']:8.1f} ms  "
+            f"failed {result['errors']:5d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Measure worker startup: import time, app build time, first request and RSS.
+
+``cold`` runs each sample in a fresh interpreter, like a worker started
+without ``--preload``.  ``preload`` imports ``wsgi`` once, then forks
+``--workers`` children the way ``gunicorn --preload`` does and reports how long
+each takes to serve its first request and how much memory it does not share
+with the parent.  ``--precompile-templates`` sets ``PRECOMPILE_TEMPLATES``.
+
+    python benchmarks/startup.py --samples 5 --workers 4 --precompile-templates
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from app.config import Config
+Config.SQLALCHEMY_ENGINE_OPTIONS = {{}}
+import wsgi
+built = time.perf_counter()
+client = wsgi.app.test_client()
+client.get("/login")
+served = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (built - started) * 1000,
+    "first_request_ms": (served - built) * 1000,
+    "rss_mb": _rss_mb(),
+    "modules": len(sys.modules),
+}}))
+"""
+
+RSS_HELPER = """
+def _rss_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+"""
+
+
+def _env(args, database):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{database}"
+    env["PRECOMPILE_TEMPLATES"] = "true" if args.precompile_templates else "false"
+    return env
+
+
+def cold(args, database):
+    samples = []
+    for _ in range(args.samples):
+        output = subprocess.run(
+            [sys.executable, "-c", RSS_HELPER + COLD_SCRIPT.format(root=ROOT)],
+            env=_env(args, database),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    def median(key):
+        return statistics.median(sample[key] for sample in samples)
+
+    print(
+        f"cold:    import+build {median('import_ms'):7.1f} ms  "
+        f"first request {median('first_request_ms'):6.1f} ms  "
+        f"RSS {median('rss_mb'):6.1f} MB  modules {median('modules'):.0f}"
+    )
+
+
+def _private_mb(pid):
+    # Pages this process has written since the fork and no longer shares.
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as rollup:
+            fields = dict(line.split(":", 1) for line in rollup if ":" in line)
+    except OSError:
+        return 0.0
+    return sum(
+        int(fields.get(name, "0 kB").split()[0])
+        for name in ("Private_Clean", "Private_Dirty")
+    ) / 1024
+
+
+def preload(args, database):
+    os.environ.update(_env(args, database))
+    sys.path.insert(0, ROOT)
+    from app.config import Config
+
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    started = time.perf_counter()
+    import wsgi
+
+    parent_ms = (time.perf_counter() - started) * 1000
+
+    results = []
+    for _ in range(args.workers):
+        read_fd, write_fd = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            wsgi.app.test_client().get("/login")
+            ready_ms = (time.perf_counter() - forked) * 1000
+            os.write(write_fd, json.dumps({"ready_ms": ready_ms}).encode())
+            os.close(write_fd)
+            time.sleep(0.5)
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            result = json.loads(pipe.read())
+        result["private_mb"] = _private_mb(pid)
+        os.waitpid(pid, 0)
+        results.append(result)
+
+    print(
+        f"preload: parent import+build {parent_ms:7.1f} ms  "
+        f"worker ready p50 "
+        f"{statistics.median(result['ready_ms'] for result in results):6.1f} ms  "
+        f"private memory p50 "
+        f"{statistics.median(result['private_mb'] for result in results):5.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--precompile-templates", action="store_true")
+    args = parser.parse_args()
+
+    database = os.path.join(ROOT, "instance", "startup-bench.db")
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    try:
+        cold(args, database)
+        if hasattr(os, "fork"):
+            preload(args, database)
+    finally:
+        if os.path.exists(database):
+            os.remove(database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""add ballot uniqueness constraints and submission keys
+
+Revision ID: a1c4e5f6b7d8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a1c4e5f6b7d8"
+down_revision = "f2a3b4c5d6e7"
+branch_labels = None
+depends_on = None
+
+
+BALLOT_KEYS = {
+    "yes_no_votes": ("uq_yes_no_votes_voter_motion", ["voter_id", "motion_id"]),
+    "candidate_votes": ("uq_candidate_votes_voter_motion", ["voter_id", "motion_id"]),
+    "preference_votes": (
+        "uq_preference_votes_voter_motion_option",
+        ["voter_id", "motion_id", "option_id"],
+    ),
+    "score_votes": (
+        "uq_score_votes_voter_motion_option",
+        ["voter_id", "motion_id", "option_id"],
+    ),
+    "cumulative_votes": (
+        "uq_cumulative_votes_voter_motion_option",
+        ["voter_id", "motion_id", "option_id"],
+    ),
+}
+
+
+def upgrade():
+    for table, (constraint_name, columns) in BALLOT_KEYS.items():
+        # Keep the most recent row of any duplicate ballot before enforcing uniqueness.
+        op.execute(
+            sa.text(
+                f"""
+                DELETE FROM {table}
+                WHERE id NOT IN (
+                    SELECT keep_id FROM (
+                        SELECT MAX(id) AS keep_id
+                        FROM {table}
+                        GROUP BY {", ".join(columns)}
+                    ) AS latest
+                )
+                """
+            )
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_unique_constraint(constraint_name, columns)
+
+    op.create_table(
+        "ballot_submissions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("idempotency_key", sa.String(length=64), nullable=False),
+        sa.Column("voter_id", sa.Integer(), sa.ForeignKey("voters.id"), nullable=False),
+        sa.Column("motion_id", sa.Integer(), sa.ForeignKey("motions.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("idempotency_key"),
+    )
+
+
+def downgrade():
+    op.drop_table("ballot_submissions")
+    for table, (constraint_name, _columns) in BALLOT_KEYS.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(constraint_name, type_="unique")
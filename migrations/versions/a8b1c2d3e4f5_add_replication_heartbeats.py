@@ -0,0 +1,29 @@
+"""add replication heartbeats
+
+Revision ID: a8b1c2d3e4f5
+Revises: f7a0b1c2d3e4
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a8b1c2d3e4f5"
+down_revision = "f7a0b1c2d3e4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "replication_heartbeats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("beat_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("replication_heartbeats")
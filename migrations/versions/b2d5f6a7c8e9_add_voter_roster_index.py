@@ -0,0 +1,25 @@
+"""add voter roster index
+
+Revision ID: b2d5f6a7c8e9
+Revises: a1c4e5f6b7d8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b2d5f6a7c8e9"
+down_revision = "a1c4e5f6b7d8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_voters_meeting_id_name", "voters", ["meeting_id", "name", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_voters_meeting_id_name", table_name="voters")
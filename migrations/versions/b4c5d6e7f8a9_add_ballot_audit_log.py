@@ -0,0 +1,66 @@
+"""add ballot audit log
+
+Revision ID: b4c5d6e7f8a9
+Revises: a8b1c2d3e4f5
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b4c5d6e7f8a9"
+down_revision = "a8b1c2d3e4f5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ballot_audit_records",
+        sa.Column("motion_id", sa.Integer(), nullable=False),
+        sa.Column("leaf_index", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("voter_id", sa.Integer(), nullable=False),
+        sa.Column("action", sa.String(length=10), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("leaf_hash", sa.LargeBinary(length=32), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["motion_id"], ["motions.id"]),
+        sa.PrimaryKeyConstraint("motion_id", "leaf_index"),
+    )
+    op.create_index(
+        "ix_ballot_audit_records_motion_voter",
+        "ballot_audit_records",
+        ["motion_id", "voter_id"],
+        unique=False,
+    )
+    op.create_table(
+        "ballot_audit_nodes",
+        sa.Column("motion_id", sa.Integer(), nullable=False),
+        sa.Column("level", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("position", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("hash", sa.LargeBinary(length=32), nullable=False),
+        sa.ForeignKeyConstraint(["motion_id"], ["motions.id"]),
+        sa.PrimaryKeyConstraint("motion_id", "level", "position"),
+    )
+    op.create_table(
+        "ballot_audit_trees",
+        sa.Column("motion_id", sa.Integer(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("peaks", sa.LargeBinary(), nullable=False),
+        sa.Column("published_root", sa.String(length=64), nullable=True),
+        sa.Column("published_size", sa.Integer(), nullable=True),
+        sa.Column("published_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["motion_id"], ["motions.id"]),
+        sa.PrimaryKeyConstraint("motion_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("ballot_audit_trees")
+    op.drop_table("ballot_audit_nodes")
+    op.drop_index(
+        "ix_ballot_audit_records_motion_voter", table_name="ballot_audit_records"
+    )
+    op.drop_table("ballot_audit_records")
@@ -0,0 +1,27 @@
+"""add motion vote version
+
+Revision ID: c3f7a8b9d0e1
+Revises: b2d5f6a7c8e9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c3f7a8b9d0e1"
+down_revision = "b2d5f6a7c8e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "motions",
+        sa.Column("vote_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_column("motions", "vote_version")
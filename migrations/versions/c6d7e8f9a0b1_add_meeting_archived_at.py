@@ -0,0 +1,24 @@
+"""add meeting archived_at
+
+Revision ID: c6d7e8f9a0b1
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c6d7e8f9a0b1"
+down_revision = "b4c5d6e7f8a9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("meetings", sa.Column("archived_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("meetings", "archived_at")
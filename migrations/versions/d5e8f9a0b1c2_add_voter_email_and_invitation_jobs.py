@@ -0,0 +1,39 @@
+"""add voter email and invitation jobs
+
+Revision ID: d5e8f9a0b1c2
+Revises: c3f7a8b9d0e1
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d5e8f9a0b1c2"
+down_revision = "c3f7a8b9d0e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("voters", sa.Column("email", sa.String(length=150), nullable=True))
+    op.create_table(
+        "invitation_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("meeting_id", sa.Integer(), sa.ForeignKey("meetings.id"), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("link_template", sa.String(length=500), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("sent", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("last_voter_id", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("invitation_jobs")
+    op.drop_column("voters", "email")
@@ -0,0 +1,33 @@
+"""add vote motion indexes
+
+Revision ID: d8e9f0a1b2c3
+Revises: c6d7e8f9a0b1
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d8e9f0a1b2c3"
+down_revision = "c6d7e8f9a0b1"
+branch_labels = None
+depends_on = None
+
+VOTE_TABLES = (
+    "yes_no_votes",
+    "candidate_votes",
+    "preference_votes",
+    "score_votes",
+    "cumulative_votes",
+)
+
+
+def upgrade():
+    for table in VOTE_TABLES:
+        op.create_index(f"ix_{table}_motion_voter", table, ["motion_id", "voter_id"])
+
+
+def downgrade():
+    for table in VOTE_TABLES:
+        op.drop_index(f"ix_{table}_motion_voter", table_name=table)
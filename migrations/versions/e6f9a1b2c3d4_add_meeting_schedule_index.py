@@ -0,0 +1,27 @@
+"""add meeting schedule index
+
+Revision ID: e6f9a1b2c3d4
+Revises: d5e8f9a0b1c2
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "e6f9a1b2c3d4"
+down_revision = "d5e8f9a0b1c2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_meetings_admin_schedule",
+        "meetings",
+        ["admin_id", "meeting_date", "start_time", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_meetings_admin_schedule", table_name="meetings")
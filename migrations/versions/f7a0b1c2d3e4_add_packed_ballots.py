@@ -0,0 +1,36 @@
+"""add packed ballots
+
+Revision ID: f7a0b1c2d3e4
+Revises: e6f9a1b2c3d4
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f7a0b1c2d3e4"
+down_revision = "e6f9a1b2c3d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "packed_ballots",
+        sa.Column("motion_id", sa.Integer(), nullable=False),
+        sa.Column("voter_id", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["motion_id"], ["motions.id"]),
+        sa.ForeignKeyConstraint(["voter_id"], ["voters.id"]),
+        sa.PrimaryKeyConstraint("motion_id", "voter_id"),
+    )
+    op.create_index(
+        "ix_packed_ballots_voter_id", "packed_ballots", ["voter_id"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_packed_ballots_voter_id", table_name="packed_ballots")
+    op.drop_table("packed_ballots")
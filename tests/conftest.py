@@ -0,0 +1,140 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Config reads the URL at import; the fixtures point each test at its own file.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Build the app on a fresh file-backed SQLite database under ``tmp_path``.
+
+    Keyword arguments override ``Config`` attributes before the app is built.
+    """
+    from app import create_app
+    from app.config import Config
+    from app.extensions import db
+    from app.services.live_irv import live_irv
+    from app.services.margins import margin_analyses
+    from app.services.results import results_cache
+    from app.services.whatif import withdrawal_previews
+
+    def make(**overrides):
+        settings = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {},
+            "SQLALCHEMY_BINDS": {},
+            "ARCHIVE_DIR": str(tmp_path / "archive"),
+            "BALLOT_BUFFER_DIR": str(tmp_path / "ballot-buffer"),
+            # Cheap hashes; no test here is about password strength.
+            "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+            **overrides,
+        }
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value)
+        # The per-process caches key on motion ids, which every test database reuses.
+        for cache in (live_irv, margin_analyses, results_cache, withdrawal_previews):
+            cache.clear()
+        app = create_app(with_migrations=False)
+        app.config["TESTING"] = True
+        with app.app_context():
+            db.create_all()
+        return app
+
+    return make
+
+
+@pytest.fixture
+def login():
+    """Sign ``client`` in as a new admin user and return the user's id."""
+    from werkzeug.security import generate_password_hash
+
+    from app.extensions import db
+    from app.models import User
+
+    def log_in(app, client, username="admin"):
+        with app.app_context():
+            user = User(
+                username=username,
+                email=f"{username}@example.com",
+                password_hash=generate_password_hash("password1", "pbkdf2:sha256:1000"),
+            )
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        response = client.post("/login", data={"username": username, "password": "password1"})
+        assert response.status_code == 302
+        return user_id
+
+    return log_in
+
+
+MOTION_TYPES = ["YES_NO", "FPTP", "PREFERENCE", "SCORE", "CUMULATIVE"]
+
+
+@pytest.fixture
+def meeting():
+    """Create a meeting with one motion of each type and random ballots.
+
+    Returns ``(meeting_id, {motion type: motion id})``; every motion has three
+    options and every one of ``voters`` voters has voted on each.
+    """
+    import random
+
+    from app.extensions import db
+    from app.models import Meeting, Motion, Option, Voter
+    from app.services.ballots import store_ballot
+
+    def create(app, admin_id=None, voters=12, status="OPEN", seed=0):
+        rng = random.Random(seed)
+        with app.app_context():
+            meeting = Meeting(title="AGM", admin_id=admin_id)
+            db.session.add(meeting)
+            db.session.flush()
+            motions = {}
+            for motion_type in MOTION_TYPES:
+                motion = Motion(
+                    meeting_id=meeting.id,
+                    title=motion_type.title(),
+                    type=motion_type,
+                    status=status,
+                    num_winners=2 if motion_type == "PREFERENCE" else None,
+                    approved_threshold_pct=50.0 if motion_type == "YES_NO" else None,
+                    score_max=10 if motion_type == "SCORE" else None,
+                    budget_points=10 if motion_type == "CUMULATIVE" else None,
+                )
+                db.session.add(motion)
+                db.session.flush()
+                for text in ["Alice", "Bob", "Carol"]:
+                    db.session.add(Option(motion_id=motion.id, text=text))
+                motions[motion_type] = motion
+            db.session.flush()
+
+            for index in range(voters):
+                voter = Voter(
+                    meeting_id=meeting.id, name=f"Voter {index}", code=f"M{meeting.id}V{index:04d}"
+                )
+                db.session.add(voter)
+                db.session.flush()
+                for motion_type, motion in motions.items():
+                    ids = [option.id for option in motion.options]
+                    store_ballot(voter.id, motion, _random_choices(rng, motion_type, ids))
+            db.session.commit()
+            return meeting.id, {motion_type: motion.id for motion_type, motion in motions.items()}
+
+    return create
+
+
+def _random_choices(rng, motion_type, ids):
+    if motion_type in ("YES_NO", "FPTP"):
+        return [(rng.choice(ids), None)]
+    if motion_type == "PREFERENCE":
+        ranking = rng.sample(ids, rng.randint(1, len(ids)))
+        return [(option_id, rank) for rank, option_id in enumerate(ranking, 1)]
+    if motion_type == "SCORE":
+        return [(option_id, float(rng.randint(0, 10))) for option_id in ids]
+    points = rng.randint(0, 10)
+    return [(ids[0], float(points)), (ids[1], float(10 - points))]
@@ -0,0 +1,15 @@
+def test_metrics_are_hidden_without_a_configured_token(make_app):
+    client = make_app(METRICS_TOKEN="").test_client()
+    assert client.get("/admin/metrics").status_code == 404
+    assert client.get("/admin/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+
+def test_metrics_need_the_operator_token(make_app):
+    client = make_app(METRICS_TOKEN="s3cret").test_client()
+    assert client.get("/admin/metrics").status_code == 404
+    wrong = client.get("/admin/metrics", headers={"Authorization": "Bearer guess"})
+    assert wrong.status_code == 404
+
+    response = client.get("/admin/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "voter_codes.entries" in response.json
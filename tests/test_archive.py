@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from app.extensions import db
+from app.models import BallotSubmission, Meeting, Motion, PreferenceVote, Voter
+from app.services.archive import archive_path, archive_store
+from app.services.results import motion_result_data
+from app.services.voting.source import vote_entries
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(ARCHIVE_BATCH_SIZE=7)
+
+
+def _results(motion_ids):
+    return {
+        motion_id: motion_result_data(db.session.get(Motion, motion_id))["result"]
+        for motion_id in motion_ids
+    }
+
+
+def test_archive_keeps_results_and_purges_the_rows(app, meeting):
+    meeting_id, motions = meeting(app, status="CLOSED")
+    with app.app_context():
+        before = _results(motions.values())
+        choices = {
+            motion_id: sorted(vote_entries(db.session.get(Motion, motion_id)))
+            for motion_id in motions.values()
+        }
+        voter_id = Voter.query.filter_by(meeting_id=meeting_id).first().id
+
+    result = app.test_cli_runner().invoke(args=["archive", "meetings"])
+
+    assert result.exit_code == 0, result.output
+    assert f"Meeting {meeting_id}: wrote " in result.output
+    with app.app_context():
+        assert db.session.get(Meeting, meeting_id).archived_at is not None
+        assert os.path.exists(archive_path(archive_store.directory, meeting_id))
+        assert PreferenceVote.query.count() == 0
+        assert BallotSubmission.query.count() == 0
+
+        assert _results(motions.values()) == before
+        archive = archive_store.get(meeting_id)
+        for motion_id in motions.values():
+            assert sorted(vote_entries(db.session.get(Motion, motion_id))) == choices[motion_id]
+            assert archive.voter_choices(motion_id, voter_id) == [
+                (option_id, value)
+                for entry_voter_id, option_id, value in choices[motion_id]
+                if entry_voter_id == voter_id
+            ]
+        assert archive.voted_motion_ids(voter_id) == set(motions.values())
+        assert archive.ballot_count() == 12 * len(motions)
+
+        assert archive_store.purge(meeting_id) == 0
+        assert archive_store.eligible_meetings() == []
+
+
+def test_only_meetings_with_every_motion_closed_are_archived(app, meeting):
+    open_id, _ = meeting(app)
+    closed_id, _ = meeting(app, status="CLOSED", seed=1)
+
+    result = app.test_cli_runner().invoke(args=["archive", "meetings", "--dry-run"])
+
+    assert result.exit_code == 0, result.output
+    assert f"Meeting {closed_id} (AGM): eligible." in result.output
+    assert f"Meeting {open_id} " not in result.output
+    with app.app_context():
+        assert db.session.get(Meeting, closed_id).archived_at is None
+
+
+def test_rerunning_for_an_archived_meeting_finishes_the_purge(app, meeting):
+    meeting_id, _ = meeting(app, status="CLOSED")
+    with app.app_context():
+        archive_store.archive(db.session.get(Meeting, meeting_id))
+        assert PreferenceVote.query.count() > 0
+
+    result = app.test_cli_runner().invoke(
+        args=["archive", "meetings", "--meeting-id", str(meeting_id)]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "wrote" not in result.output
+    with app.app_context():
+        assert PreferenceVote.query.count() == 0
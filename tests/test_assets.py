@@ -0,0 +1,66 @@
+import gzip
+import json
+
+from flask import url_for
+
+from app.services.assets import DIST_DIR, MANIFEST_NAME, build_assets, static_assets
+
+CSS = b"body { margin: 0; }\n" * 200
+
+
+def _static_folder(tmp_path, css=CSS):
+    folder = tmp_path / "static"
+    (folder / "css").mkdir(parents=True, exist_ok=True)
+    (folder / "css" / "site.css").write_bytes(css)
+    (folder / "data.bin").write_bytes(b"\x00\x01")
+    return folder
+
+
+def test_build_fingerprints_and_compresses(tmp_path):
+    folder = _static_folder(tmp_path)
+
+    report = {name: row for name, *row in build_assets(str(folder))}
+
+    manifest = json.loads((folder / DIST_DIR / MANIFEST_NAME).read_text())
+    assert set(manifest) == {"css/site.css", "data.bin"}
+    hashed = manifest["css/site.css"]
+    assert hashed.startswith(f"{DIST_DIR}/css/site.") and hashed.endswith(".css")
+    assert (folder / hashed).read_bytes() == CSS
+    assert gzip.decompress((folder / f"{hashed}.gz").read_bytes()) == CSS
+    assert report["css/site.css"][2] < len(CSS)
+    assert not (folder / f"{manifest['data.bin']}.gz").exists()
+
+    _static_folder(tmp_path, css=CSS + b"a { color: red; }\n")
+    build_assets(str(folder))
+    rebuilt = json.loads((folder / DIST_DIR / MANIFEST_NAME).read_text())
+    assert rebuilt["css/site.css"] != hashed
+    assert rebuilt["data.bin"] == manifest["data.bin"]
+    assert not (folder / hashed).exists()
+
+
+def test_fingerprinted_assets_are_served_immutable_and_precompressed(
+    make_app, tmp_path, monkeypatch
+):
+    app = make_app()
+    folder = _static_folder(tmp_path)
+    build_assets(str(folder))
+    app.static_folder = str(folder)
+    monkeypatch.setattr(
+        static_assets, "manifest", json.loads((folder / DIST_DIR / MANIFEST_NAME).read_text())
+    )
+
+    with app.test_request_context():
+        url = url_for("static", filename="css/site.css")
+    assert url == f"/static/{static_assets.manifest['css/site.css']}"
+
+    client = app.test_client()
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.cache_control.immutable
+    assert "Accept-Encoding" in response.vary
+    assert gzip.decompress(response.data) == CSS
+
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data == CSS
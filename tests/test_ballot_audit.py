@@ -0,0 +1,68 @@
+import pytest
+
+from app.extensions import db
+from app.models import BallotAuditRecord, Motion, Voter
+from app.services.ballot_audit import ballot_audit, leaf_hash, verify_inclusion
+from app.services.ballots import store_ballot
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(BALLOT_AUDIT_ENABLED=True, VOTER_CODE_FILTER_REFRESH_SECONDS=0)
+
+
+def test_each_record_has_a_proof_against_the_root(app, meeting):
+    meeting_id, motions = meeting(app, voters=13)
+    motion_id = motions["PREFERENCE"]
+    with app.app_context():
+        motion = db.session.get(Motion, motion_id)
+        voter = Voter.query.filter_by(meeting_id=meeting_id).order_by(Voter.id).first()
+        option_ids = [option.id for option in motion.options]
+        store_ballot(voter.id, motion, [(option_ids[2], 1)])
+        db.session.commit()
+
+        summary = ballot_audit.summary(motion_id)
+        assert summary["size"] == 14
+        root = bytes.fromhex(summary["root"])
+        proofs = ballot_audit.proofs(motion_id, voter.id)
+        assert [proof["action"] for proof in proofs] == ["SUBMIT", "REPLACE"]
+        for proof in proofs:
+            assert proof["verified"]
+            leaf = bytes.fromhex(proof["leaf_hash"])
+            assert leaf == leaf_hash(proof["payload"])
+            path = [bytes.fromhex(digest) for digest in proof["path"]]
+            assert verify_inclusion(leaf, proof["leaf_index"], summary["size"], path, root)
+            assert not verify_inclusion(leaf, proof["leaf_index"] ^ 1, summary["size"], path, root)
+        assert ballot_audit.verify(motion_id) == []
+
+
+def test_voters_fetch_their_proofs_by_code(app, meeting):
+    meeting_id, motions = meeting(app, voters=5)
+    motion_id = motions["FPTP"]
+
+    response = app.test_client().get(f"/api/vote/M{meeting_id}V0002/motion/{motion_id}/audit")
+
+    assert response.status_code == 200
+    assert response.json["size"] == 5
+    [record] = response.json["records"]
+    assert record["verified"]
+
+
+def test_verify_reports_a_tampered_payload(app, meeting):
+    _, motions = meeting(app, voters=6)
+    motion_id = motions["SCORE"]
+    with app.app_context():
+        ballot_audit.publish(db.session.get(Motion, motion_id))
+        db.session.commit()
+        assert ballot_audit.verify(motion_id) == []
+
+        record = BallotAuditRecord.query.filter_by(motion_id=motion_id, leaf_index=3).one()
+        record.payload = record.payload.replace('"SUBMIT"', '"REPLACE"')
+        db.session.commit()
+        problems = ballot_audit.verify(motion_id)
+
+    assert "Leaf 3 does not match its payload." in problems
+
+    result = app.test_cli_runner().invoke(args=["audit", "verify", "--motion-id", str(motion_id)])
+    assert result.exit_code != 0
+    assert "Leaf 3 does not match its payload." in result.output
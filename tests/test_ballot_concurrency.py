@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from app.extensions import db
+from app.models import (
+    BallotSubmission,
+    Meeting,
+    Motion,
+    Option,
+    PreferenceVote,
+    User,
+    Voter,
+    YesNoVote,
+)
+from app.services.ballots import submit_ballot
+
+THREADS = 8
+
+
+@pytest.fixture(params=[True, False], ids=["single-writer", "retry"])
+def app(request, make_app):
+    return make_app(SQLITE_SINGLE_WRITER=request.param)
+
+
+def _setup(app, motion_type, num_winners=None):
+    with app.app_context():
+        user = User(username="admin", email="admin@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        meeting = Meeting(title="AGM", admin_id=user.id)
+        db.session.add(meeting)
+        db.session.flush()
+        motion = Motion(
+            meeting_id=meeting.id,
+            title="Motion",
+            type=motion_type,
+            status="OPEN",
+            num_winners=num_winners,
+        )
+        db.session.add(motion)
+        db.session.flush()
+        for text in ["Alice", "Bob", "Carol", "Dave"]:
+            db.session.add(Option(motion_id=motion.id, text=text))
+        voter = Voter(meeting_id=meeting.id, name="Voter", code="CODE0001")
+        db.session.add(voter)
+        db.session.commit()
+        return voter.id, motion.id, [option.id for option in motion.options]
+
+
+def _submit_concurrently(app, voter_id, motion_id, ballots, idempotency_key=None):
+    barrier = threading.Barrier(len(ballots))
+    results = [None] * len(ballots)
+
+    def submit(index):
+        with app.app_context():
+            motion = db.session.get(Motion, motion_id)
+            barrier.wait()
+            try:
+                results[index] = submit_ballot(
+                    voter_id, motion, ballots[index], idempotency_key
+                )
+            except Exception as error:
+                results[index] = error
+
+    threads = [threading.Thread(target=submit, args=(index,)) for index in range(len(ballots))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_same_idempotency_key_stores_the_first_ballot_once(app):
+    voter_id, motion_id, option_ids = _setup(app, "YES_NO")
+    ballots = [[(option_ids[index % len(option_ids)], None)] for index in range(THREADS)]
+
+    results = _submit_concurrently(app, voter_id, motion_id, ballots, "key-1")
+
+    assert sorted(results, key=repr) == [False] * (THREADS - 1) + [True]
+    first = ballots[results.index(True)]
+    with app.app_context():
+        assert BallotSubmission.query.count() == 1
+        rows = YesNoVote.query.filter_by(voter_id=voter_id, motion_id=motion_id).all()
+        assert [(row.option_id, None) for row in rows] == first
+
+        motion = db.session.get(Motion, motion_id)
+        assert submit_ballot(voter_id, motion, ballots[0], "key-1") is False
+        assert [(row.option_id, None) for row in YesNoVote.query.all()] == first
+
+
+def test_racing_replacements_leave_one_whole_ballot(app):
+    voter_id, motion_id, option_ids = _setup(app, "PREFERENCE", num_winners=1)
+    rankings = [option_ids[index % 4:] + option_ids[: index % 4] for index in range(THREADS)]
+    ballots = [
+        [(option_id, rank) for rank, option_id in enumerate(ranking[: 1 + index % 3], 1)]
+        for index, ranking in enumerate(rankings)
+    ]
+
+    results = _submit_concurrently(app, voter_id, motion_id, ballots)
+
+    assert results == [True] * THREADS
+    with app.app_context():
+        rows = PreferenceVote.query.filter_by(voter_id=voter_id, motion_id=motion_id).all()
+        stored = sorted((row.option_id, row.preference_rank) for row in rows)
+        assert stored in [sorted(ballot) for ballot in ballots]
@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(RECOUNT_WORKERS=1)
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_recount_finds_no_differences(app, meeting, workers):
+    meeting_id, motions = meeting(app, status="CLOSED")
+
+    result = app.test_cli_runner().invoke(args=["recount", "--workers", workers])
+
+    assert result.exit_code == 0, result.output
+    for motion_id in motions.values():
+        assert f"Motion {motion_id} (" in result.output
+    assert result.output.count("matches.") == len(motions)
+    assert "; 0 differ." in result.output
+
+
+def test_recount_filters_by_meeting(app, meeting):
+    meeting(app)
+    other_id, motions = meeting(app, seed=1)
+
+    result = app.test_cli_runner().invoke(args=["recount", "--meeting-id", str(other_id)])
+
+    assert result.exit_code == 0, result.output
+    assert f"Recounted {len(motions)} motions" in result.output
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from app.services.voting.preference import IncrementalIrv, tally_preference_sequential_irv
+from app.services.voting.source import MotionSnapshot, OptionRow
+
+STEPS = 150
+
+
+def _batch_result(rankings, options, num_winners):
+    entries = [
+        (voter_id, option_id, rank)
+        for voter_id, ranking in rankings.items()
+        for rank, option_id in enumerate(ranking, 1)
+    ]
+    motion = MotionSnapshot(
+        1, "Live", "PREFERENCE", "OPEN", num_winners, None, list(options.values()), entries
+    )
+    return tally_preference_sequential_irv(motion)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_live_count_matches_batch_count_after_every_change(seed):
+    rng = random.Random(seed)
+    candidates = rng.randint(2, 6)
+    num_winners = rng.randint(1, min(3, candidates))
+    options = {cid: OptionRow(cid, f"Candidate {cid}") for cid in range(1, candidates + 1)}
+    # Few voters and short rankings, so counts tie and ballots exhaust often.
+    voters = rng.randint(3, 25)
+
+    def ballot():
+        return rng.sample(list(options), rng.randint(1, candidates))
+
+    rankings = {voter: ballot() for voter in range(rng.randint(0, voters))}
+    live = IncrementalIrv(rankings, options, num_winners)
+    assert live.result() == _batch_result(rankings, options, num_winners)
+
+    for step in range(STEPS):
+        voter = rng.randrange(voters)
+        action = rng.random()
+        if action < 0.2:
+            rankings.pop(voter, None)
+            live.replace(voter, [])
+        elif action < 0.3 and voter in rankings:
+            # Resubmitting the same ballot must leave the count alone.
+            live.replace(voter, rankings[voter])
+        else:
+            rankings[voter] = ballot()
+            live.replace(voter, rankings[voter])
+        expected = _batch_result(rankings, options, num_winners)
+        assert live.result() == expected, f"seed {seed}: differs after step {step}"
+        assert live.winners() == [option.id for option in expected["winners"]]
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from app.extensions import db
+from app.models import Meeting, Motion, Option, Voter
+from app.services.ballots import store_ballot
+from app.services.metrics import metrics
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(MARGIN_WORKERS=0, MARGIN_TIME_BUDGET_SECONDS=2)
+
+
+def _preference_motion(app, admin_id):
+    with app.app_context():
+        meeting = Meeting(title="AGM", admin_id=admin_id)
+        db.session.add(meeting)
+        db.session.flush()
+        motion = Motion(
+            meeting_id=meeting.id, title="Chair", type="PREFERENCE", status="OPEN", num_winners=1
+        )
+        db.session.add(motion)
+        db.session.flush()
+        for text in ["Alice", "Bob", "Carol"]:
+            db.session.add(Option(motion_id=motion.id, text=text))
+        db.session.flush()
+        ids = [option.id for option in motion.options]
+        rankings = [[0, 1], [0], [1, 0], [2, 1], [0, 2]]
+        for index, ranking in enumerate(rankings):
+            voter = Voter(meeting_id=meeting.id, name=f"V{index}", code=f"CODE{index:04d}")
+            db.session.add(voter)
+            db.session.flush()
+            store_ballot(voter.id, motion, [(ids[c], rank) for rank, c in enumerate(ranking, 1)])
+        db.session.commit()
+        return motion.id, ids
+
+
+def _poll(client, path):
+    deadline = time.monotonic() + 10
+    while True:
+        response = client.get(path)
+        if response.status_code != 202 or time.monotonic() > deadline:
+            return response
+        assert response.headers["Retry-After"] == "2"
+        time.sleep(0.05)
+
+
+def test_margin_is_computed_in_the_background_and_cached(app, login):
+    client = app.test_client()
+    motion_id, ids = _preference_motion(app, login(app, client))
+    path = f"/api/motions/{motion_id}/margin"
+
+    first = client.get(path)
+    assert first.status_code == 202
+    assert first.json == {"ok": True, "motion_id": motion_id, "pending": True}
+
+    response = _poll(client, path)
+    assert response.status_code == 200
+    seat = response.json["seats"][0]
+    assert seat["winner"] == ids[0]
+    assert seat["exact"]
+
+    misses = metrics.counters().get("margins.misses", 0)
+    assert client.get(path).json == response.json
+    assert metrics.counters().get("margins.misses", 0) == misses
+
+
+def test_a_new_ballot_starts_a_new_analysis(app, login):
+    client = app.test_client()
+    motion_id, ids = _preference_motion(app, login(app, client))
+    path = f"/api/motions/{motion_id}/margin"
+    assert _poll(client, path).json["total_ballots"] == 5
+
+    with app.app_context():
+        motion = db.session.get(Motion, motion_id)
+        voter = Voter(meeting_id=motion.meeting_id, name="Late", code="LATE0001")
+        db.session.add(voter)
+        db.session.flush()
+        store_ballot(voter.id, motion, [(ids[1], 1)])
+        db.session.commit()
+
+    assert client.get(path).status_code == 202
+    assert _poll(client, path).json["total_ballots"] == 6
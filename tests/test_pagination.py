@@ -0,0 +1,66 @@
+import pytest
+
+from app.extensions import db
+from app.models import Meeting, Voter
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(VOTER_CODE_FILTER_ENABLED=False, RATE_LIMIT_ENABLED=False)
+
+
+def _voters(app, admin_id):
+    with app.app_context():
+        meeting = Meeting(title="AGM", admin_id=admin_id)
+        db.session.add(meeting)
+        db.session.flush()
+        # Few distinct names, so most pages end inside a run of equal names.
+        for index in range(23):
+            db.session.add(
+                Voter(meeting_id=meeting.id, name=f"Name {index % 4}", code=f"CODE{index:04d}")
+            )
+        db.session.commit()
+        voters = Voter.query.filter_by(meeting_id=meeting.id).all()
+        return meeting.id, [(voter.name, voter.id) for voter in voters]
+
+
+def _walk(client, path, key, max_pages=10):
+    """Every row of a keyset-paginated listing, and the page totals."""
+    rows, totals = [], []
+    cursor = None
+    for _ in range(max_pages):
+        response = client.get(path + (f"&after={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        rows += response.json[key]
+        totals.append(response.json["total"])
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            return rows, totals
+    pytest.fail(f"{path} did not end within {max_pages} pages.")
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_voter_pages_cover_every_voter_once_in_order(app, login, direction):
+    client = app.test_client()
+    meeting_id, voters = _voters(app, login(app, client))
+
+    path = f"/admin/meetings/{meeting_id}/voters.json?sort=name&dir={direction}&limit=5"
+
+    rows, totals = _walk(client, path, "voters")
+
+    assert [row["id"] for row in rows] == [
+        voter_id for _, voter_id in sorted(voters, reverse=direction == "desc")
+    ]
+    assert totals == [23, None, None, None, None]
+
+
+def test_motion_pages_follow_the_cursor(app, login, meeting):
+    client = app.test_client()
+    meeting_id, motions = meeting(app, admin_id=login(app, client), voters=1)
+    path = f"/admin/meetings/{meeting_id}/motions.json?limit=2"
+
+    rows, totals = _walk(client, path, "motions")
+
+    assert [row["id"] for row in rows] == sorted(motions.values())
+    assert totals == [len(motions), None, None]
+    assert client.get(f"{path}&after=not-a-cursor").json["total"] == len(motions)
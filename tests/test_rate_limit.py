@@ -0,0 +1,66 @@
+from app.extensions import db
+from app.models import Meeting, Voter
+from app.services.metrics import metrics
+from app.services.rate_limit import MemoryBucketStore
+from app.services.voter_codes import voter_code_index
+
+
+def _app(make_app, ip_capacity, voter_capacity):
+    app = make_app(
+        RATE_LIMIT_IP_CAPACITY=ip_capacity,
+        RATE_LIMIT_IP_REFILL_PER_SEC=0.001,
+        RATE_LIMIT_VOTER_CAPACITY=voter_capacity,
+        RATE_LIMIT_VOTER_REFILL_PER_SEC=0.001,
+        TRUSTED_PROXY_COUNT=1,
+        VOTER_CODE_FILTER_REFRESH_SECONDS=0,
+    )
+    with app.app_context():
+        meeting = Meeting(title="AGM")
+        db.session.add(meeting)
+        db.session.flush()
+        for index in range(3):
+            db.session.add(Voter(meeting_id=meeting.id, name=f"V{index}", code=f"CODE{index}"))
+        db.session.commit()
+        # The limiter only reads the filter; the first lookup builds it.
+        voter_code_index.might_exist("CODE0")
+    return app
+
+
+def _statuses(client, path, count, forwarded_for="203.0.113.7"):
+    headers = {"X-Forwarded-For": forwarded_for}
+    return [client.get(path, headers=headers).status_code for _ in range(count)]
+
+
+def test_each_voter_behind_one_address_has_their_own_bucket(make_app):
+    client = _app(make_app, ip_capacity=20, voter_capacity=2).test_client()
+    assert _statuses(client, "/vote/CODE0", 3) == [200, 200, 429]
+    assert _statuses(client, "/vote/CODE1", 2) == [200, 200]
+    assert _statuses(client, "/vote/code2 ", 2) == [200, 200]
+
+
+def test_guessed_codes_are_throttled_by_address_before_any_lookup(make_app):
+    client = _app(make_app, ip_capacity=2, voter_capacity=100).test_client()
+    assert _statuses(client, "/vote/NOPE1", 2) == [200, 200]
+
+    counters = metrics.counters()
+    assert _statuses(client, "/vote/NOPE2", 20) == [429] * 20
+    after = metrics.counters()
+    assert after.get("voter_codes.rebuilds", 0) == counters.get("voter_codes.rebuilds", 0)
+    assert after.get("voter_codes.rejected_without_db", 0) == counters.get(
+        "voter_codes.rejected_without_db", 0
+    )
+
+    assert _statuses(client, "/vote/NOPE3", 1, forwarded_for="198.51.100.1") == [200]
+
+
+def test_memory_store_drops_idle_and_least_recent_buckets(monkeypatch):
+    monkeypatch.setattr(MemoryBucketStore, "MAX_KEYS", 3)
+    store = MemoryBucketStore()
+    for index in range(3):
+        store.take(f"k{index}", 5, 1, now=0)
+    store.take("k0", 5, 1, now=1)
+    store.take("k3", 5, 1, now=2)
+    assert list(store._buckets) == ["k2", "k0", "k3"]
+
+    store.take("k4", 5, 1, now=2 + MemoryBucketStore.IDLE_SECONDS)
+    assert list(store._buckets) == ["k3", "k4"]
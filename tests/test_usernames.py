@@ -0,0 +1,19 @@
+from app.extensions import db
+from app.models import User
+from app.services.usernames import username_index
+
+
+def test_usernames_committed_out_of_id_order_are_taken(make_app):
+    app = make_app(USERNAME_INDEX_REFRESH_SECONDS=0, USERNAME_CHECK_CACHE_SECONDS=0)
+    with app.app_context():
+        for user_id, username in [(1, "alice"), (3, "carol")]:
+            email = f"{username}@example.com"
+            db.session.add(User(id=user_id, username=username, email=email, password_hash="x"))
+        db.session.commit()
+        assert username_index.exists("Alice")
+        assert not username_index.exists("bob")
+
+        # Another worker's signup took id 2 earlier but commits only now.
+        db.session.add(User(id=2, username="bob", email="bob@example.com", password_hash="x"))
+        db.session.commit()
+        assert username_index.exists("bob")
@@ -0,0 +1,62 @@
+import pytest
+
+from app.extensions import db
+from app.models import Meeting, Motion, Option, Voter, YesNoVote
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(RATE_LIMIT_ENABLED=False, VOTER_CODE_FILTER_ENABLED=False)
+
+
+def _motion(app, status):
+    with app.app_context():
+        meeting = Meeting(title="AGM")
+        db.session.add(meeting)
+        db.session.flush()
+        motion = Motion(
+            meeting_id=meeting.id,
+            title="Motion",
+            type="YES_NO",
+            status=status,
+            approved_threshold_pct=50.0,
+        )
+        db.session.add(motion)
+        db.session.flush()
+        for text in ["Yes", "No", "Abstain"]:
+            db.session.add(Option(motion_id=motion.id, text=text))
+        db.session.add(Voter(meeting_id=meeting.id, name="Voter", code="CODE0001"))
+        db.session.commit()
+        return motion.id, motion.options[0].id
+
+
+@pytest.mark.parametrize("status", ["DRAFT", "CLOSED"])
+def test_api_refuses_ballots_for_motions_that_are_not_open(app, status):
+    motion_id, option_id = _motion(app, status)
+    response = app.test_client().post(
+        f"/api/vote/CODE0001/motion/{motion_id}", json={"option": option_id}
+    )
+    assert response.status_code == 409
+    assert response.json == {"ok": False, "error": "This motion is not open for voting."}
+    with app.app_context():
+        assert YesNoVote.query.count() == 0
+
+
+def test_form_refuses_ballots_for_closed_motions(app):
+    motion_id, option_id = _motion(app, "CLOSED")
+    response = app.test_client().post(
+        f"/vote/CODE0001/motion/{motion_id}", data={"option": option_id}
+    )
+    assert response.status_code == 302
+    with app.app_context():
+        assert YesNoVote.query.count() == 0
+
+
+def test_api_stores_ballots_for_open_motions(app):
+    motion_id, option_id = _motion(app, "OPEN")
+    response = app.test_client().post(
+        f"/api/vote/CODE0001/motion/{motion_id}", json={"option": option_id}
+    )
+    assert response.json["ok"] is True
+    with app.app_context():
+        assert YesNoVote.query.one().option_id == option_id
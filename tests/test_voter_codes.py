@@ -0,0 +1,56 @@
+from app.extensions import db
+from app.models import Meeting, Voter
+from app.services.metrics import metrics
+from app.services.voter_codes import voter_code_index
+
+
+def _rebuilds():
+    return metrics.counters().get("voter_codes.rebuilds", 0)
+
+
+def test_misses_are_answered_from_the_filter_alone(make_app):
+    app = make_app(VOTER_CODE_FILTER_REFRESH_SECONDS=0)
+    with app.app_context():
+        meeting = Meeting(title="AGM")
+        db.session.add(meeting)
+        db.session.flush()
+        db.session.add(Voter(meeting_id=meeting.id, name="First", code="FIRST001"))
+        db.session.commit()
+        assert voter_code_index.might_exist("first001")
+
+        rebuilds = _rebuilds()
+        for index in range(50):
+            assert not voter_code_index.might_exist(f"GUESS{index:03d}")
+        assert _rebuilds() == rebuilds
+
+
+def test_codes_committed_out_of_id_order_are_found_after_a_rebuild(make_app):
+    app = make_app(VOTER_CODE_FILTER_REFRESH_SECONDS=0)
+    with app.app_context():
+        meeting = Meeting(title="AGM")
+        db.session.add(meeting)
+        db.session.flush()
+        db.session.add(Voter(id=1, meeting_id=meeting.id, name="First", code="FIRST001"))
+        db.session.add(Voter(id=3, meeting_id=meeting.id, name="Third", code="THIRD003"))
+        db.session.commit()
+        assert not voter_code_index.might_exist("SECOND02")
+
+        # Another worker's transaction took id 2 earlier but commits only now.
+        db.session.add(Voter(id=2, meeting_id=meeting.id, name="Second", code="SECOND02"))
+        db.session.commit()
+        voter_code_index.rebuild()
+        assert voter_code_index.find_voter("SECOND02").id == 2
+
+
+def test_codes_are_added_as_voters_are_created(make_app):
+    app = make_app(VOTER_CODE_FILTER_REFRESH_SECONDS=0)
+    with app.app_context():
+        meeting = Meeting(title="AGM")
+        db.session.add(meeting)
+        db.session.commit()
+        assert not voter_code_index.might_exist("NEWCODE1")
+
+        db.session.add(Voter(meeting_id=meeting.id, name="New", code="NEWCODE1"))
+        db.session.commit()
+        voter_code_index.add("NEWCODE1")
+        assert voter_code_index.might_exist("newcode1")
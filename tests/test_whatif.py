@@ -0,0 +1,100 @@
+import pytest
+
+from app.extensions import db
+from app.models import Meeting, Motion, Option, Voter
+from app.services.ballots import store_ballot
+from app.services.whatif import withdrawal_diff
+
+
+def _result(*seats):
+    """A serialized sequential IRV result: each seat is ``(winner id, round count)``."""
+    return {
+        "winners": [{"id": winner, "label": f"O{winner}"} for winner, _ in seats],
+        "seats": [
+            {"winner": {"id": winner, "label": f"O{winner}"}, "rounds": [{}] * rounds}
+            for winner, rounds in seats
+        ],
+    }
+
+
+def test_diff_of_identical_results_is_empty():
+    result = _result((1, 2), (2, 1))
+    assert withdrawal_diff(result, result) == {
+        "winners_changed": False,
+        "elected": [],
+        "unseated": [],
+        "seats": [],
+    }
+
+
+def test_diff_lists_changed_winners_and_seats():
+    diff = withdrawal_diff(_result((1, 2), (2, 1)), _result((1, 3), (3, 2), (4, 1)))
+
+    assert diff["winners_changed"]
+    assert diff["elected"] == [{"id": 3, "label": "O3"}, {"id": 4, "label": "O4"}]
+    assert diff["unseated"] == [{"id": 2, "label": "O2"}]
+    assert [
+        (seat["seat_number"], seat["actual_rounds"], seat["alternative_rounds"])
+        for seat in diff["seats"]
+    ] == [(1, 2, 3), (2, 1, 2), (3, 0, 1)]
+    assert diff["seats"][2]["actual_winner"] is None
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(VOTER_CODE_FILTER_ENABLED=False, RATE_LIMIT_ENABLED=False)
+
+
+def _preference_motion(app, admin_id):
+    with app.app_context():
+        meeting = Meeting(title="AGM", admin_id=admin_id)
+        db.session.add(meeting)
+        db.session.flush()
+        motion = Motion(
+            meeting_id=meeting.id, title="Chair", type="PREFERENCE", status="OPEN", num_winners=1
+        )
+        db.session.add(motion)
+        db.session.flush()
+        for text in ["Alice", "Bob", "Carol"]:
+            db.session.add(Option(motion_id=motion.id, text=text))
+        db.session.flush()
+        ids = [option.id for option in motion.options]
+        # Alice leads on first preferences; Carol's voters all prefer Bob next.
+        rankings = [[0], [0], [0], [1], [1], [2, 1]]
+        for index, ranking in enumerate(rankings):
+            voter = Voter(meeting_id=meeting.id, name=f"V{index}", code=f"CODE{index:04d}")
+            db.session.add(voter)
+            db.session.flush()
+            store_ballot(voter.id, motion, [(ids[c], rank) for rank, c in enumerate(ranking, 1)])
+        db.session.commit()
+        return motion.id, ids
+
+
+def test_withdrawing_the_winner_elects_the_runner_up(app, login):
+    client = app.test_client()
+    motion_id, (alice, bob, carol) = _preference_motion(app, login(app, client))
+
+    response = client.get(f"/api/motions/{motion_id}/what-if?exclude={alice}")
+
+    assert response.status_code == 200
+    assert response.json["excluded"] == [alice]
+    assert response.json["actual"]["winners"] == [{"id": alice, "label": "Alice"}]
+    diff = response.json["diff"]
+    assert diff["winners_changed"]
+    assert diff["elected"] == [{"id": bob, "label": "Bob"}]
+    assert diff["unseated"] == [{"id": alice, "label": "Alice"}]
+    assert [
+        (change["option"]["id"], change["actual"], change["alternative"])
+        for change in diff["first_preferences"]
+    ] == [(alice, 3, 0)]
+
+
+def test_what_if_rejects_bad_exclusions(app, login):
+    client = app.test_client()
+    motion_id, ids = _preference_motion(app, login(app, client))
+    path = f"/api/motions/{motion_id}/what-if"
+
+    assert client.get(path).status_code == 400
+    assert client.get(f"{path}?exclude=abc").status_code == 400
+    assert client.get(f"{path}?exclude=999999").status_code == 400
+    assert client.get(f"{path}?exclude={','.join(map(str, ids))}").status_code == 400
@@ -1 +1,4 @@
-from app import app
\ No newline at end of file
+from app import create_app
+
+# Built at import so ``gunicorn --preload wsgi:app`` shares it across workers.
+app = create_app(with_migrations=False)